@@ -14,18 +14,30 @@
 #    under the License.
 #
 
+from concurrent import futures
+import functools
 import logging
 import os
+import time
+import urllib.parse as urlparse
 
 import debtcollector.renames
 from keystoneauth1 import access
 from keystoneauth1 import adapter
+from keystoneauth1 import exceptions as ksa_exc
 from oslo_serialization import jsonutils
 from oslo_utils import importutils
 import requests
+from urllib3 import connection as urllib3_connection
+from urllib3 import connectionpool
 
 from neutronclient._i18n import _
+from neutronclient.common import auth_cache as auth_cache_utils
+from neutronclient.common import compression
 from neutronclient.common import exceptions
+from neutronclient.common import load_balancer
+from neutronclient.common import metrics as metrics_utils
+from neutronclient.common import tracing
 from neutronclient.common import utils
 
 osprofiler_web = importutils.try_import("osprofiler.web")
@@ -44,6 +56,71 @@ logging.getLogger("requests").setLevel(_requests_log_level)
 MAX_URI_LEN = 8192
 USER_AGENT = 'python-neutronclient'
 REQ_ID_HEADER = 'X-OpenStack-Request-ID'
+# Defaults of the connection pool owned by HTTPClient. pool_connections
+# is the number of per-host pools to cache and pool_maxsize the number of
+# connections kept alive to a single host.
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+
+def _compression_stats(enabled):
+    return compression.TransferStats() if enabled else None
+
+
+def _record_transfer(stats, body, data, resp, received):
+    last = stats.record(len(body or ''), len(data or ''),
+                        len(resp.content), received)
+    _logger.debug('%(method)s %(url)s transferred %(sent)d/%(body)d request '
+                  'and %(received)d/%(decoded)d response bytes',
+                  {'method': resp.request.method, 'url': resp.url,
+                   'sent': last['request_bytes_sent'],
+                   'body': last['request_bytes'],
+                   'received': last['response_bytes_received'],
+                   'decoded': last['response_bytes']})
+
+
+def _record_response_timing(resp, started, stream):
+    """Split the time spent in a request between ttfb and body_read."""
+    timing = metrics_utils.current()
+    if timing is None:
+        return
+    ttfb = resp.elapsed.total_seconds() if resp.elapsed else 0.0
+    timing.add('ttfb', ttfb)
+    if not stream:
+        timing.add('body_read', time.monotonic() - started - ttfb)
+
+
+def _response_body(resp, raw):
+    # resp.text copies the body into a str, guessing its charset from the
+    # content when the response does not give one.
+    return resp.content if raw else resp.text
+
+
+class _TimedConnectMixin(object):
+    def connect(self):
+        started = time.monotonic()
+        try:
+            return super(_TimedConnectMixin, self).connect()
+        finally:
+            metrics_utils.add_phase('connect', time.monotonic() - started)
+
+
+class _TimedHTTPConnection(_TimedConnectMixin,
+                           urllib3_connection.HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin,
+                            urllib3_connection.HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(connectionpool.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
 
 
 class HTTPClient(object):
@@ -63,7 +140,13 @@ class HTTPClient(object):
                  endpoint_type='publicURL',
                  auth_strategy='keystone', ca_cert=None, cert=None,
                  log_credentials=False, service_type='network',
-                 global_request_id=None, **kwargs):
+                 global_request_id=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 keepalive=True, compression=False,
+                 request_compression_threshold=None, auth_cache=None,
+                 circuit_breaker=None, endpoint_urls=None,
+                 hedge_percentile=None, metrics=None, **kwargs):
 
         self.username = username
         self.user_id = user_id
@@ -87,6 +170,61 @@ class HTTPClient(object):
             self.verify_cert = False
         else:
             self.verify_cert = ca_cert if ca_cert else True
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keepalive = keepalive
+        self.compression = compression
+        self.request_compression_threshold = request_compression_threshold
+        self.transfer_stats = _compression_stats(compression)
+        self.auth_cache = auth_cache
+        self.circuit_breaker = circuit_breaker
+        self.metrics = metrics
+        self.endpoints = None
+        if endpoint_urls:
+            self.endpoints = load_balancer.EndpointSet(
+                endpoint_urls, hedge_percentile=hedge_percentile)
+            self.endpoint_url = self.endpoint_url or self.endpoints.urls[0]
+        self._session = None
+        self._executor = None
+
+    @property
+    def session(self):
+        """The pooled requests session shared by all calls of this client.
+
+        The session is created on first use so that a client which is never
+        used does not open any connection.
+        """
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        session = requests.Session()
+        # NOTE: Connections (and therefore TLS sessions) are reused as long
+        # as they are kept alive in the pool. max_retries is left to 0 as
+        # retries are handled by ClientBase.retry_request.
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block)
+        if self.metrics is not None:
+            # Time the opening of new connections.
+            adapter.poolmanager.pool_classes_by_scheme = {
+                'http': _TimedHTTPConnectionPool,
+                'https': _TimedHTTPSConnectionPool}
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        """Close all pooled connections of this client."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
     def _cs_request(self, *args, **kwargs):
         kargs = {}
@@ -96,6 +234,12 @@ class HTTPClient(object):
         if 'body' in kwargs:
             kargs['body'] = kwargs['body']
 
+        if kwargs.get('stream'):
+            kargs['stream'] = True
+
+        if kwargs.get('raw_body'):
+            kargs['raw_body'] = True
+
         if self.log_credentials:
             log_kargs = kargs
         else:
@@ -106,6 +250,8 @@ class HTTPClient(object):
             resp, body = self.request(*args, **kargs)
         except requests.exceptions.SSLError as e:
             raise exceptions.SslCertificateValidationError(reason=str(e))
+        except exceptions.EndpointCircuitOpen:
+            raise
         except Exception as e:
             # Wrap the low-level connection error (socket timeout, redirect
             # limit, decompression error, etc) into our custom high-level
@@ -125,14 +271,16 @@ class HTTPClient(object):
                            'response_request_id': request_id})
 
         if resp.status_code == 401:
-            raise exceptions.Unauthorized(message=body)
+            raise exceptions.Unauthorized(message=resp.text)
         return resp, body
 
     def _strip_credentials(self, kwargs):
         if kwargs.get('body') and self.password:
             log_kwargs = kwargs.copy()
-            log_kwargs['body'] = kwargs['body'].replace(self.password,
-                                                        'REDACTED')
+            body = kwargs['body']
+            if isinstance(body, bytes):
+                body = body.decode('utf-8', 'replace')
+            log_kwargs['body'] = body.replace(self.password, 'REDACTED')
             return log_kwargs
         else:
             return kwargs
@@ -141,12 +289,21 @@ class HTTPClient(object):
         if not self.auth_token:
             self.authenticate()
         elif not self.endpoint_url:
-            self.endpoint_url = self._get_endpoint_url()
+            if self.auth_cache:
+                self.endpoint_url = self._get_cached_endpoint_url()
+            else:
+                self.endpoint_url = self._get_endpoint_url()
 
     def request(self, url, method, body=None, headers=None, **kwargs):
-        """Request without authentication."""
+        """Request without authentication.
+
+        With ``stream=True`` the body is left unread on the response for the
+        caller to consume and None is returned instead of the body. The body
+        is returned as bytes instead of text with ``raw_body=True``.
+        """
 
         content_type = kwargs.pop('content_type', None) or 'application/json'
+        raw_body = kwargs.pop('raw_body', False)
         headers = headers or {}
         headers.setdefault('Accept', content_type)
 
@@ -156,23 +313,45 @@ class HTTPClient(object):
         if self.global_request_id:
             headers.setdefault(REQ_ID_HEADER, self.global_request_id)
 
+        if not self.keepalive:
+            headers['Connection'] = 'close'
+
+        stream = kwargs.get('stream', False)
+        data = body
+        if self.compression:
+            headers.setdefault('Accept-Encoding', compression.GZIP)
+            kwargs.setdefault('stream', True)
+            data = compression.prepare_body(
+                body, headers, self.request_compression_threshold)
+
         headers['User-Agent'] = USER_AGENT
         # NOTE(dbelova): osprofiler_web.get_trace_id_headers does not add any
         # headers in case if osprofiler is not initialized.
         if osprofiler_web:
             headers.update(osprofiler_web.get_trace_id_headers())
 
-        resp = requests.request(
+        send = self.session.request
+        if self.circuit_breaker:
+            send = functools.partial(self.circuit_breaker.call, url, send)
+        started = time.monotonic()
+        resp = send(
             method,
             url,
-            data=body,
+            data=data,
             headers=headers,
             verify=self.verify_cert,
             cert=self.cert,
             timeout=self.timeout,
             **kwargs)
 
-        return resp, resp.text
+        if stream:
+            _record_response_timing(resp, started, stream)
+            return resp, None
+        if self.compression:
+            received = compression.read_content(resp)
+            _record_transfer(self.transfer_stats, body, data, resp, received)
+        _record_response_timing(resp, started, stream)
+        return resp, _response_body(resp, raw_body)
 
     def _check_uri_length(self, action):
         uri_len = len(self.endpoint_url) + len(action)
@@ -181,6 +360,14 @@ class HTTPClient(object):
                 excess=uri_len - MAX_URI_LEN)
 
     def do_request(self, url, method, **kwargs):
+        if self.metrics is None:
+            return self._do_request(url, method, **kwargs)
+        with self.metrics.request(method, url) as timing:
+            resp, body = self._do_request(url, method, **kwargs)
+            timing.status_code = resp.status_code
+            return resp, body
+
+    def _do_request(self, url, method, **kwargs):
         # Ensure client always has correct uri - do not guesstimate anything
         self.authenticate_and_fetch_endpoint_url()
         self._check_uri_length(url)
@@ -193,30 +380,115 @@ class HTTPClient(object):
             if self.auth_token is None:
                 self.auth_token = ""
             kwargs['headers']['X-Auth-Token'] = self.auth_token
-            resp, body = self._cs_request(self.endpoint_url + url, method,
-                                          **kwargs)
+            resp, body = self._send_request(url, method, **kwargs)
             return resp, body
         except exceptions.Unauthorized:
             self.authenticate()
             kwargs['headers'] = kwargs.get('headers') or {}
             kwargs['headers']['X-Auth-Token'] = self.auth_token
-            resp, body = self._cs_request(
-                self.endpoint_url + url, method, **kwargs)
+            resp, body = self._send_request(url, method, **kwargs)
+            return resp, body
+
+    def _send_request(self, url, method, **kwargs):
+        if not self.endpoints:
+            return self._cs_request(self.endpoint_url + url, method,
+                                    **kwargs)
+        if method == 'GET' and not kwargs.get('stream'):
+            delay = self.endpoints.hedge_delay()
+            if delay is not None:
+                return self._hedged_request(url, method, delay, **kwargs)
+        return self._endpoint_request(self.endpoints.acquire(), url, method,
+                                      **kwargs)
+
+    def _endpoint_request(self, endpoint, url, method, **kwargs):
+        """Send a request to an endpoint acquired from self.endpoints."""
+        started = time.monotonic()
+        success = False
+        try:
+            resp, body = self._cs_request(endpoint + url, method, **kwargs)
+            success = resp.status_code < 500
             return resp, body
+        except exceptions.Unauthorized:
+            success = True
+            raise
+        finally:
+            latency = time.monotonic() - started if method == 'GET' else None
+            self.endpoints.release(endpoint, success, latency)
+
+    def _hedged_request(self, url, method, delay, **kwargs):
+        """Send a GET, duplicated to another endpoint if it is too slow.
+
+        The first successful response wins, the other one is read and
+        dropped in the background.
+        """
+        if self._executor is None:
+            self._executor = futures.ThreadPoolExecutor(
+                max_workers=self.pool_maxsize,
+                thread_name_prefix='neutronclient-hedge')
+        timing = metrics_utils.current()
+        span_context = tracing.context()
+        first = self.endpoints.acquire()
+        attempts = [self._executor.submit(
+            self._hedge_attempt, timing, span_context, first, url, method,
+            **dict(kwargs, headers=dict(kwargs['headers'])))]
+        done, _pending = futures.wait(attempts, timeout=delay)
+        if not done:
+            second = self.endpoints.acquire(exclude=[first])
+            if second is not None:
+                _logger.debug('Hedging GET %(url)s to %(endpoint)s after '
+                              '%(delay).3f seconds',
+                              {'url': url, 'endpoint': second,
+                               'delay': delay})
+                attempts.append(self._executor.submit(
+                    self._hedge_attempt, timing, span_context, second, url,
+                    method, **dict(kwargs, headers=dict(kwargs['headers']))))
+        error = None
+        for attempt in futures.as_completed(attempts):
+            try:
+                result, attempt_timing = attempt.result()
+            except Exception as e:
+                error = e
+                continue
+            if len(attempts) > 1:
+                self.endpoints.record_hedge(attempt is attempts[1])
+            if attempt_timing is not None:
+                for phase, seconds in attempt_timing.phases.items():
+                    timing.add(phase, seconds)
+            return result
+        raise error
+
+    def _hedge_attempt(self, timing, span_context, endpoint, url, method,
+                       **kwargs):
+        """Run an attempt of _hedged_request in a worker thread.
+
+        Its spans are nested under the span of the caller. Its phases are
+        timed apart, to be added to the caller's timing only if it wins.
+        """
+        attempt_timing = None
+        if timing is not None:
+            attempt_timing = metrics_utils.RequestTiming(method, url)
+        with metrics_utils.attach(attempt_timing), tracing.attach(
+                span_context):
+            return (self._endpoint_request(endpoint, url, method, **kwargs),
+                    attempt_timing)
 
     def _extract_service_catalog(self, body):
         """Set the client's service catalog from the response data."""
         self.auth_ref = access.create(body=body)
+        self._auth_body = body
         self.service_catalog = self.auth_ref.service_catalog
         self.auth_token = self.auth_ref.auth_token
         self.auth_tenant_id = self.auth_ref.tenant_id
         self.auth_user_id = self.auth_ref.user_id
 
         if not self.endpoint_url:
-            self.endpoint_url = self.service_catalog.url_for(
-                region_name=self.region_name,
-                service_type=self.service_type,
-                interface=self.endpoint_type)
+            self.endpoint_url = self._catalog_endpoint_url()
+
+    def _catalog_endpoint_url(self):
+        return self.service_catalog.url_for(
+            region_name=self.region_name,
+            service_type=self.service_type,
+            interface=self.endpoint_type)
 
     def _authenticate_keystone(self):
         if self.user_id:
@@ -242,7 +514,7 @@ class HTTPClient(object):
                                            content_type="application/json",
                                            allow_redirects=True)
         if resp.status_code != 200:
-            raise exceptions.Unauthorized(message=resp_body)
+            raise exceptions.Unauthorized(message=resp.text)
         if resp_body:
             try:
                 resp_body = jsonutils.loads(resp_body)
@@ -259,9 +531,54 @@ class HTTPClient(object):
                         'using --os-url')
             raise exceptions.Unauthorized(message=message)
 
+    def _authenticate_keystone_cached(self):
+        key = auth_cache_utils.make_key(
+            'token', self.auth_url, self.user_id or self.username,
+            self.project_id or self.project_name, self.region_name,
+            self.service_type, self.endpoint_type)
+        # A token which has just been rejected must not be reused even if
+        # it is still in the cache.
+        rejected_token = self.auth_token
+        with self.auth_cache.lock(key):
+            entry = self.auth_cache.get(key)
+            if entry and entry['token'] != rejected_token:
+                if not self.endpoint_url:
+                    self.endpoint_url = entry['endpoint_url']
+                self._extract_service_catalog(entry['access'])
+                return
+            self._authenticate_keystone()
+            # The endpoint may have been given by the caller, share the one
+            # of the catalog instead. The catalog need not list it when the
+            # caller supplied the endpoint.
+            try:
+                endpoint_url = self._catalog_endpoint_url()
+            except ksa_exc.EndpointNotFound:
+                endpoint_url = None
+            entry = {'token': self.auth_token,
+                     'endpoint_url': endpoint_url,
+                     'access': self._auth_body}
+            if self.auth_ref.expires:
+                entry['expires_at'] = self.auth_ref.expires.timestamp()
+            self.auth_cache.set(key, entry)
+
+    def _get_cached_endpoint_url(self):
+        key = auth_cache_utils.make_key(
+            'endpoint', self.auth_url, self.auth_token, self.region_name,
+            self.endpoint_type)
+        with self.auth_cache.lock(key):
+            entry = self.auth_cache.get(key)
+            if entry:
+                return entry['endpoint_url']
+            endpoint_url = self._get_endpoint_url()
+            self.auth_cache.set(key, {'endpoint_url': endpoint_url})
+            return endpoint_url
+
     def authenticate(self):
         if self.auth_strategy == 'keystone':
-            self._authenticate_keystone()
+            if self.auth_cache:
+                self._authenticate_keystone_cached()
+            else:
+                self._authenticate_keystone()
         elif self.auth_strategy == 'noauth':
             self._authenticate_noauth()
         else:
@@ -304,11 +621,21 @@ class HTTPClient(object):
 
 class SessionClient(adapter.Adapter):
 
+    def __init__(self, *args, **kwargs):
+        self.compression = kwargs.pop('compression', False)
+        self.request_compression_threshold = kwargs.pop(
+            'request_compression_threshold', None)
+        self.transfer_stats = _compression_stats(self.compression)
+        self.circuit_breaker = kwargs.pop('circuit_breaker', None)
+        self.metrics = kwargs.pop('metrics', None)
+        super(SessionClient, self).__init__(*args, **kwargs)
+
     def request(self, *args, **kwargs):
         kwargs.setdefault('authenticated', False)
         kwargs.setdefault('raise_exc', False)
 
         content_type = kwargs.pop('content_type', None) or 'application/json'
+        raw_body = kwargs.pop('raw_body', False)
 
         headers = kwargs.get('headers') or {}
         headers.setdefault('Accept', content_type)
@@ -326,9 +653,30 @@ class SessionClient(adapter.Adapter):
         if kwargs.get('data'):
             headers.setdefault('Content-Type', content_type)
 
+        body = kwargs.get('data')
+        if self.compression:
+            # NOTE: requests decodes the gzip response while reading it.
+            headers.setdefault('Accept-Encoding', compression.GZIP)
+            if body:
+                kwargs['data'] = compression.prepare_body(
+                    body, headers, self.request_compression_threshold)
+
         kwargs['headers'] = headers
-        resp = super(SessionClient, self).request(*args, **kwargs)
-        return resp, resp.text
+        send = super(SessionClient, self).request
+        if self.circuit_breaker:
+            url = args[0]
+            if not urlparse.urlsplit(url).netloc:
+                url = self.get_endpoint()
+            send = functools.partial(self.circuit_breaker.call, url, send)
+        started = time.monotonic()
+        resp = send(*args, **kwargs)
+        _record_response_timing(resp, started, kwargs.get('stream'))
+        if kwargs.get('stream'):
+            return resp, None
+        if self.compression:
+            _record_transfer(self.transfer_stats, body, kwargs.get('data'),
+                             resp, compression.received_bytes(resp))
+        return resp, _response_body(resp, raw_body)
 
     def _check_uri_length(self, url):
         uri_len = len(self.endpoint_url) + len(url)
@@ -339,7 +687,12 @@ class SessionClient(adapter.Adapter):
     def do_request(self, url, method, **kwargs):
         kwargs.setdefault('authenticated', True)
         self._check_uri_length(url)
-        return self.request(url, method, **kwargs)
+        if self.metrics is None:
+            return self.request(url, method, **kwargs)
+        with self.metrics.request(method, url) as timing:
+            resp, body = self.request(url, method, **kwargs)
+            timing.status_code = resp.status_code
+            return resp, body
 
     @property
     def endpoint_url(self):
@@ -405,6 +758,17 @@ def construct_http_client(username=None,
                           service_type='network',
                           session=None,
                           global_request_id=None,
+                          pool_connections=DEFAULT_POOL_CONNECTIONS,
+                          pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                          pool_block=False,
+                          keepalive=True,
+                          compression=False,
+                          request_compression_threshold=None,
+                          auth_cache=None,
+                          circuit_breaker=None,
+                          endpoint_urls=None,
+                          hedge_percentile=None,
+                          metrics=None,
                           **kwargs):
 
     if session:
@@ -414,6 +778,11 @@ def construct_http_client(username=None,
                              service_type=service_type,
                              region_name=region_name,
                              global_request_id=global_request_id,
+                             compression=compression,
+                             request_compression_threshold=(
+                                 request_compression_threshold),
+                             circuit_breaker=circuit_breaker,
+                             metrics=metrics,
                              **kwargs)
     else:
         # FIXME(bklei): username and password are now optional. Need
@@ -436,4 +805,16 @@ def construct_http_client(username=None,
                           cert=cert,
                           log_credentials=log_credentials,
                           auth_strategy=auth_strategy,
-                          global_request_id=global_request_id)
+                          global_request_id=global_request_id,
+                          pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block,
+                          keepalive=keepalive,
+                          compression=compression,
+                          request_compression_threshold=(
+                              request_compression_threshold),
+                          auth_cache=auth_cache,
+                          circuit_breaker=circuit_breaker,
+                          endpoint_urls=endpoint_urls,
+                          hedge_percentile=hedge_percentile,
+                          metrics=metrics)
@@ -0,0 +1,187 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""On-disk cache of keystone tokens and resolved endpoints.
+
+The cache lets short-lived processes using ``HTTPClient`` share a token and
+the endpoint URL found in the service catalog instead of authenticating
+against keystone each time. Every entry is stored in its own file named
+after a hash of its key; files are only readable by their owner, replaced
+atomically and written under an exclusive lock so that concurrent
+processes authenticate only once.
+"""
+
+import contextlib
+import errno
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+
+fcntl = importutils.try_import('fcntl')
+
+_logger = logging.getLogger(__name__)
+
+# Entries expiring in less than this many seconds are considered expired.
+EXPIRY_MARGIN = 60
+# Lifetime of entries whose expiry is not known (e.g. endpoint lookups).
+DEFAULT_TTL = 3600
+SUFFIX = '.json'
+LOCK_SUFFIX = '.lock'
+
+
+def default_directory():
+    base = (os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, 'neutronclient', 'auth')
+
+
+def make_key(*parts):
+    """Build a cache key from the values identifying an authentication."""
+    data = '\0'.join('' if p is None else str(p) for p in parts)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class AuthCache(object):
+    """Token and endpoint cache shared between processes of the same user.
+
+    :param directory: directory holding the entries, created with 0700
+                      permissions. Defaults to
+                      ``$XDG_CACHE_HOME/neutronclient/auth``.
+    :param expiry_margin: seconds before the actual expiry at which an
+                          entry stops being returned.
+    """
+
+    def __init__(self, directory=None, expiry_margin=EXPIRY_MARGIN):
+        self.directory = directory or default_directory()
+        self.expiry_margin = expiry_margin
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        os.chmod(self.directory, 0o700)
+
+    def _path(self, key, suffix=SUFFIX):
+        return os.path.join(self.directory, key + suffix)
+
+    @contextlib.contextmanager
+    def lock(self, key, blocking=True):
+        """Hold an exclusive inter-process lock on an entry.
+
+        Yields False when ``blocking`` is False and the lock is held by
+        someone else.
+        """
+        fd = os.open(self._path(key, LOCK_SUFFIX), os.O_RDWR | os.O_CREAT,
+                     0o600)
+        try:
+            if fcntl:
+                flags = fcntl.LOCK_EX
+                if not blocking:
+                    flags |= fcntl.LOCK_NB
+                try:
+                    fcntl.flock(fd, flags)
+                except OSError as e:
+                    if e.errno not in (errno.EAGAIN, errno.EACCES):
+                        raise
+                    yield False
+                    return
+            try:
+                yield True
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _is_expired(self, entry, now=None):
+        now = now or time.time()
+        return entry.get('expires_at', 0) - self.expiry_margin <= now
+
+    def _load(self, path):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        with os.fdopen(fd, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if (st.st_mode & 0o077 or
+                    hasattr(os, 'getuid') and st.st_uid != os.getuid()):
+                _logger.warning('Ignoring auth cache entry %s with unsafe '
+                                'ownership or permissions', path)
+                return None
+            try:
+                return jsonutils.loads(f.read())
+            except ValueError:
+                return None
+
+    def get(self, key):
+        """Return the entry stored under key unless it expired."""
+        path = self._path(key)
+        entry = self._load(path)
+        if entry is None:
+            return None
+        if self._is_expired(entry):
+            self._remove(key)
+            return None
+        return entry
+
+    def set(self, key, entry, ttl=DEFAULT_TTL, purge=True):
+        """Atomically store entry, a JSON serializable dict.
+
+        ``entry['expires_at']`` (seconds since the epoch) defaults to ttl
+        seconds from now. Expired entries of the cache are evicted unless
+        purge is False.
+        """
+        entry = dict(entry)
+        entry.setdefault('expires_at', time.time() + ttl)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(jsonutils.dump_as_bytes(entry))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+        if purge:
+            self.purge()
+
+    def delete(self, key):
+        with self.lock(key):
+            self._remove(key)
+
+    def _remove(self, key):
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._path(key))
+
+    def purge(self):
+        """Evict all expired entries which are not being written."""
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            key = name[:-len(SUFFIX)]
+            entry = self._load(self._path(key))
+            if entry is not None and not self._is_expired(entry, now):
+                continue
+            with self.lock(key, blocking=False) as locked:
+                if not locked:
+                    continue
+                entry = self._load(self._path(key))
+                # The lock file is kept: unlinking it while it is held
+                # would let the next writer lock a new inode while a
+                # waiter still locks the old one.
+                if entry is None or self._is_expired(entry, now):
+                    self._remove(key)
@@ -0,0 +1,128 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Chunking and reporting of bulk create requests."""
+
+import threading
+
+# Default of the max_request_body_size option of the Neutron API server.
+DEFAULT_MAX_BODY_BYTES = 114688
+DEFAULT_CHUNK_SIZE = 100
+# Bytes of JSON wrapping the resources of a chunk, e.g. '{"ports": []}'
+# plus some margin for the collection name.
+_BODY_OVERHEAD = 64
+
+
+def chunks(resources, max_count, max_bytes, sizeof):
+    """Split resources in lists of (index, resource) small enough to send.
+
+    A chunk holds at most max_count resources whose JSON takes at most
+    max_bytes. A resource bigger than max_bytes alone is sent in its own
+    chunk, for the server to accept or reject.
+    """
+    chunk = []
+    size = _BODY_OVERHEAD
+    for index, resource in enumerate(resources):
+        # The separating comma.
+        resource_size = sizeof(resource) + 1
+        if chunk and (len(chunk) >= max_count or
+                      (max_bytes and size + resource_size > max_bytes)):
+            yield chunk
+            chunk = []
+            size = _BODY_OVERHEAD
+        chunk.append((index, resource))
+        size += resource_size
+    if chunk:
+        yield chunk
+
+
+class BulkItem(object):
+    """Outcome of the creation of one resource of a bulk request."""
+
+    __slots__ = ('index', 'request', 'resource', 'error')
+
+    def __init__(self, index, request, resource=None, error=None):
+        self.index = index
+        self.request = request
+        self.resource = resource
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return '<BulkItem %d: %s>' % (self.index,
+                                          (self.resource or {}).get('id'))
+        return '<BulkItem %d: %r>' % (self.index, self.error)
+
+
+class BulkResult(object):
+    """Per-resource report of a bulk create, in the order of the request.
+
+    Failures do not raise: each :class:`BulkItem` carries either the
+    created resource or the exception which prevented its creation.
+    """
+
+    def __init__(self, collection, resources):
+        self.collection = collection
+        self.items = [BulkItem(index, resource)
+                      for index, resource in enumerate(resources)]
+        self.request_ids = []
+        self.chunks = 0
+        self.fallback_chunks = 0
+        self._lock = threading.Lock()
+
+    def add_request_ids(self, request_ids):
+        with self._lock:
+            self.request_ids.extend(request_ids or [])
+
+    def count_chunk(self, fallback=False):
+        with self._lock:
+            self.chunks += 1
+            if fallback:
+                self.fallback_chunks += 1
+
+    @property
+    def resources(self):
+        """The created resources."""
+        return [item.resource for item in self.items if item.ok]
+
+    @property
+    def errors(self):
+        """The items which failed."""
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def to_dict(self):
+        errors = self.errors
+        return {'collection': self.collection,
+                'total': len(self.items),
+                'created': len(self.items) - len(errors),
+                'failed': len(errors),
+                'chunks': self.chunks,
+                'fallback_chunks': self.fallback_chunks,
+                'errors': [{'index': item.index,
+                            'status_code': getattr(item.error,
+                                                   'status_code', None),
+                            'message': str(item.error)}
+                           for item in errors]}
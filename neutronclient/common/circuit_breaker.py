@@ -0,0 +1,212 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Per-endpoint circuit breaker of the HTTP clients.
+
+A circuit is kept for every endpoint (scheme, host and port) the client
+talks to. It is *closed* while the endpoint is healthy. After
+``failure_threshold`` consecutive failures (connection errors, timeouts,
+5xx responses or, optionally, responses slower than
+``slow_call_threshold``) it *opens*: requests to the endpoint then fail
+immediately with :class:`~neutronclient.common.exceptions.EndpointCircuitOpen`
+instead of waiting for the timeout. Once ``recovery_timeout`` seconds have
+passed the circuit is *half open* and lets a limited number of probe
+requests through; it closes again when a probe succeeds and reopens when
+one fails.
+"""
+
+import logging
+import threading
+import time
+import urllib.parse as urlparse
+
+from keystoneauth1 import exceptions as ksa_exc
+import requests
+
+from neutronclient.common import exceptions
+
+_logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Exceptions raised by the transport which count as endpoint failures.
+FAILURE_EXCEPTIONS = (requests.exceptions.RequestException,
+                      ksa_exc.ConnectionError)
+# Weight of the last call in the moving average of the latency.
+LATENCY_SMOOTHING = 0.2
+
+
+def endpoint_of(url):
+    """Return the scheme://host:port part of url."""
+    parts = urlparse.urlsplit(url)
+    return '%s://%s' % (parts.scheme, parts.netloc)
+
+
+class _Circuit(object):
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probes = 0
+        self.latency = None
+        self.calls = 0
+        self.rejected = 0
+
+    def to_dict(self):
+        return {'state': self.state, 'failures': self.failures,
+                'latency': self.latency, 'calls': self.calls,
+                'rejected': self.rejected}
+
+
+class CircuitBreaker(object):
+    """Thread safe circuit breaker keyed by endpoint URL.
+
+    :param failure_threshold: consecutive failures opening the circuit.
+    :param recovery_timeout: seconds the circuit stays open before probe
+                             requests are let through.
+    :param slow_call_threshold: responses taking longer than this many
+                                seconds count as failures. None disables
+                                latency tracking as a failure criteria.
+    :param half_open_max_calls: probe requests allowed concurrently while
+                                the circuit is half open.
+    :param clock: monotonic clock, ``time.monotonic`` by default.
+    """
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0,
+                 slow_call_threshold=None, half_open_max_calls=1,
+                 clock=None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock or time.monotonic
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, endpoint):
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            circuit = self._circuits[endpoint] = _Circuit()
+        return circuit
+
+    def state(self, url):
+        """Return the state of the circuit of the endpoint of url."""
+        endpoint = endpoint_of(url)
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None:
+                return CLOSED
+            if (circuit.state == OPEN and
+                    self.clock() - circuit.opened_at >=
+                    self.recovery_timeout):
+                return HALF_OPEN
+            return circuit.state
+
+    def before_request(self, url):
+        """Admit a request to url or raise EndpointCircuitOpen.
+
+        Returns the endpoint to pass to :meth:`record`.
+        """
+        endpoint = endpoint_of(url)
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == OPEN:
+                remaining = (circuit.opened_at + self.recovery_timeout -
+                             self.clock())
+                if remaining > 0:
+                    circuit.rejected += 1
+                    raise exceptions.EndpointCircuitOpen(
+                        endpoint=endpoint, retry_after=remaining)
+                _logger.debug('Circuit breaker of %s is half open',
+                              endpoint)
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_max_calls:
+                    circuit.rejected += 1
+                    raise exceptions.EndpointCircuitOpen(endpoint=endpoint)
+                circuit.probes += 1
+            circuit.calls += 1
+        return endpoint
+
+    def record(self, endpoint, success, elapsed=None):
+        """Record the outcome of a request admitted by before_request."""
+        if (success and elapsed is not None and
+                self.slow_call_threshold is not None and
+                elapsed > self.slow_call_threshold):
+            success = False
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if elapsed is not None:
+                if circuit.latency is None:
+                    circuit.latency = elapsed
+                else:
+                    circuit.latency += LATENCY_SMOOTHING * (
+                        elapsed - circuit.latency)
+            if circuit.state == HALF_OPEN:
+                circuit.probes = max(0, circuit.probes - 1)
+            if success:
+                if circuit.state != CLOSED:
+                    _logger.debug('Circuit breaker of %s is closed',
+                                  endpoint)
+                circuit.state = CLOSED
+                circuit.failures = 0
+                return
+            circuit.failures += 1
+            if (circuit.state == HALF_OPEN or
+                    circuit.failures >= self.failure_threshold):
+                if circuit.state != OPEN:
+                    _logger.warning('Circuit breaker of %(endpoint)s opened '
+                                    'after %(failures)d failures',
+                                    {'endpoint': endpoint,
+                                     'failures': circuit.failures})
+                circuit.state = OPEN
+                circuit.opened_at = self.clock()
+
+    def _release(self, endpoint):
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == HALF_OPEN:
+                circuit.probes = max(0, circuit.probes - 1)
+
+    def call(self, url, func, *args, **kwargs):
+        """Send a request to url through func, a requests-like callable."""
+        endpoint = self.before_request(url)
+        started = time.monotonic()
+        try:
+            resp = func(*args, **kwargs)
+        except FAILURE_EXCEPTIONS:
+            self.record(endpoint, False, time.monotonic() - started)
+            raise
+        except Exception:
+            # Not a failure of the endpoint, only give the probe back.
+            self._release(endpoint)
+            raise
+        self.record(endpoint, resp.status_code < 500,
+                    time.monotonic() - started)
+        return resp
+
+    def reset(self, url=None):
+        """Close the circuit of the endpoint of url, or all circuits."""
+        with self._lock:
+            if url is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(endpoint_of(url), None)
+
+    def to_dict(self):
+        with self._lock:
+            return dict((endpoint, circuit.to_dict())
+                        for endpoint, circuit in self._circuits.items())
@@ -0,0 +1,131 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""JSON codecs encoding request bodies and decoding response bodies.
+
+A codec turns a dictionary into the bytes of a request body with
+``dumps`` and decodes the bytes of a response body (or a str) with
+``loads``. :class:`JSONCodec` uses the ``json`` module of the standard
+library, :class:`OrjsonCodec` the optional ``orjson`` library which is
+several times faster on large lists. :func:`get_codec` picks the fastest
+codec available unless told otherwise.
+
+Objects JSON cannot represent are encoded as their ``str()``, as
+:class:`neutronclient.common.serializer.JSONDictSerializer` does.
+"""
+
+import json
+
+from oslo_utils import importutils
+
+from neutronclient._i18n import _
+from neutronclient.common import exceptions
+
+orjson = importutils.try_import('orjson')
+
+
+class Codec(object):
+    """Base class of the codecs."""
+
+    name = None
+
+    def dumps(self, data):
+        """Return data encoded as the bytes of a request body."""
+        raise NotImplementedError()
+
+    def _loads(self, data):
+        raise NotImplementedError()
+
+    def loads(self, data):
+        """Decode a response body given as bytes or str."""
+        try:
+            return self._loads(data)
+        except ValueError:
+            msg = _("Cannot understand JSON")
+            raise exceptions.MalformedResponseBody(reason=msg)
+
+
+class JSONCodec(Codec):
+    """Codec of the standard library ``json`` module."""
+
+    name = 'json'
+
+    def __init__(self):
+        # Building the encoder once saves the cost of json.dumps creating
+        # one per call when given a default.
+        self._encoder = json.JSONEncoder(default=str)
+
+    def dumps(self, data):
+        return self._encoder.encode(data).encode('utf-8')
+
+    def _loads(self, data):
+        # json.loads decodes bytes itself, without a copy as str first.
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    """Codec of the optional ``orjson`` library.
+
+    Bodies are encoded as compact UTF-8 rather than with the ASCII escapes
+    and spaces of the ``json`` module, which Neutron reads the same way.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise exceptions.NeutronClientException(
+                message=_('The orjson library is required to use the '
+                          'orjson codec'))
+        # Datetimes are given to default to be encoded with str() like the
+        # json codec does.
+        self._options = (orjson.OPT_NON_STR_KEYS |
+                         orjson.OPT_PASSTHROUGH_DATETIME)
+        self._fallback = JSONCodec()
+
+    def dumps(self, data):
+        try:
+            return orjson.dumps(data, default=str, option=self._options)
+        except TypeError:
+            # E.g. integers of more than 64 bits.
+            return self._fallback.dumps(data)
+
+    def _loads(self, data):
+        return orjson.loads(data)
+
+
+CODECS = {JSONCodec.name: JSONCodec, OrjsonCodec.name: OrjsonCodec}
+
+
+def default_codec_name():
+    """Return the name of the fastest codec available."""
+    return OrjsonCodec.name if orjson is not None else JSONCodec.name
+
+
+def get_codec(codec=None):
+    """Return a codec instance.
+
+    :param codec: None for the fastest codec available, the name of a codec
+                  of :data:`CODECS`, or an object with ``dumps`` and
+                  ``loads`` methods, returned as is.
+    """
+    if codec is None:
+        codec = default_codec_name()
+    if not isinstance(codec, str):
+        return codec
+    try:
+        return CODECS[codec]()
+    except KeyError:
+        raise exceptions.NeutronClientException(
+            message=_('Unknown JSON codec %(codec)s, expected one of '
+                      '%(codecs)s') % {'codec': codec,
+                                       'codecs': ', '.join(sorted(CODECS))})
@@ -0,0 +1,354 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Columnar tables of resources backed by NumPy arrays.
+
+Each field of the resources becomes a column. Booleans and numbers are
+stored in NumPy arrays, missing numbers as NaN. Strings are dictionary
+encoded in a :class:`Categorical`: an array of integer codes pointing into
+the array of the distinct values, -1 standing for a missing value. Other
+values, such as lists and dicts, are kept in arrays of Python objects.
+
+Filters, group-by counts and joins then work on the arrays of codes
+instead of looping over the resources in Python. This requires the
+optional ``numpy`` library.
+"""
+
+import csv
+import io
+
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+
+from neutronclient._i18n import _
+from neutronclient.common import exceptions
+
+numpy = importutils.try_import('numpy')
+
+_CODES = '.codes'
+_CATEGORIES = '.categories'
+_OBJECTS = '.json'
+
+
+def _require_numpy():
+    if numpy is None:
+        raise exceptions.NeutronClientException(
+            message=_('The numpy library is required to build columnar '
+                      'tables'))
+
+
+class Categorical(object):
+    """Dictionary encoded column of strings."""
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+        self._index = None
+
+    @classmethod
+    def encode(cls, values):
+        index = {}
+        codes = numpy.fromiter(
+            (-1 if v is None else index.setdefault(v, len(index))
+             for v in values), dtype=numpy.int32, count=len(values))
+        categories = numpy.empty(len(index), dtype=object)
+        categories[:] = list(index)
+        return cls(codes, categories)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def code_of(self, value):
+        """Return the code of value, -2 when it never appears."""
+        if self._index is None:
+            self._index = dict((v, i) for i, v in enumerate(self.categories))
+        return self._index.get(value, -2)
+
+    def __eq__(self, value):
+        return self.codes == self.code_of(value)
+
+    def __ne__(self, value):
+        return ~(self == value)
+
+    def isin(self, values):
+        return numpy.isin(self.codes, [self.code_of(v) for v in values])
+
+    def isnull(self):
+        return self.codes == -1
+
+    def take(self, indices):
+        codes = self.codes[indices]
+        if isinstance(indices, numpy.ndarray) and indices.dtype != bool:
+            codes = numpy.where(indices < 0, -1, codes)
+        return Categorical(codes, self.categories)
+
+    def decode(self):
+        """Return the strings as an array of objects, None when missing."""
+        values = numpy.append(self.categories, None)
+        # Code -1 picks the None appended at the end.
+        return values[self.codes]
+
+
+def _column(values):
+    kinds = set(type(v) for v in values if v is not None)
+    has_none = len(kinds) < 1 or any(v is None for v in values)
+    if kinds == {str}:
+        return Categorical.encode(values)
+    if kinds == {bool} and not has_none:
+        return numpy.array(values, dtype=bool)
+    if kinds and kinds <= {int} and not has_none:
+        return numpy.array(values, dtype=numpy.int64)
+    if kinds and kinds <= {int, float}:
+        return numpy.array([numpy.nan if v is None else v for v in values],
+                           dtype=numpy.float64)
+    column = numpy.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _take(column, indices):
+    """Take rows of a column, -1 indices giving missing values."""
+    if not len(column) and indices.dtype != bool and len(indices):
+        # Only missing values can be taken from an empty column.
+        if isinstance(column, Categorical):
+            column = Categorical(numpy.array([-1], dtype=numpy.int32),
+                                 column.categories)
+        else:
+            column = _column([None])
+    if isinstance(column, Categorical):
+        return column.take(indices)
+    taken = column[indices]
+    if indices.dtype == bool or not (indices < 0).any():
+        return taken
+    if taken.dtype == bool or taken.dtype.kind == 'i':
+        taken = taken.astype(numpy.float64 if taken.dtype.kind == 'i'
+                             else object)
+    taken[indices < 0] = numpy.nan if taken.dtype.kind == 'f' else None
+    return taken
+
+
+def _decode(column):
+    if isinstance(column, Categorical):
+        return column.decode()
+    return column
+
+
+class Table(object):
+    """Resources stored column by column.
+
+    :param columns: dict of the columns by field name, all of the same
+                    length.
+    """
+
+    def __init__(self, columns):
+        _require_numpy()
+        self.columns = dict(columns)
+        lengths = set(len(c) for c in self.columns.values())
+        if len(lengths) > 1:
+            raise ValueError(_('Columns of different lengths: %s') % lengths)
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_resources(cls, resources, fields=None):
+        """Build a table from an iterable of resource dicts.
+
+        :param fields: the fields to keep, all of them by default.
+        """
+        _require_numpy()
+        values = dict((f, []) for f in fields or ())
+        count = 0
+        for resource in resources:
+            if fields is None:
+                for field in resource:
+                    if field not in values:
+                        values[field] = [None] * count
+            for field, column in values.items():
+                column.append(resource.get(field))
+            count += 1
+        return cls(dict((f, _column(v)) for f, v in values.items()))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def __contains__(self, field):
+        return field in self.columns
+
+    @property
+    def fields(self):
+        return list(self.columns)
+
+    def take(self, indices):
+        """Return a table of the rows at indices or selected by a mask."""
+        indices = numpy.asarray(indices)
+        return Table(dict((f, _take(c, indices))
+                          for f, c in self.columns.items()))
+
+    def filter(self, mask=None, **equals):
+        """Return the rows matching a mask and/or values of fields.
+
+        The value of a keyword argument may be a list, tuple or set of
+        accepted values.
+
+            table.filter(table['admin_state_up'], status=['ACTIVE', 'DOWN'])
+        """
+        selected = numpy.ones(len(self), dtype=bool)
+        if mask is not None:
+            selected &= numpy.asarray(mask, dtype=bool)
+        for field, value in equals.items():
+            column = self.columns[field]
+            multiple = isinstance(value, (list, tuple, set, frozenset))
+            if isinstance(column, Categorical):
+                selected &= (column.isin(value) if multiple
+                             else column == value)
+            elif multiple:
+                selected &= numpy.isin(column, list(value))
+            else:
+                selected &= column == value
+        return self.take(selected)
+
+    def group_count(self, *fields):
+        """Count the rows of each combination of values of fields.
+
+        Returns a dict keyed by value, or by tuple of values for several
+        fields. Missing strings are counted under None.
+        """
+        keys = []
+        labels = []
+        for field in fields:
+            column = self.columns[field]
+            if not isinstance(column, Categorical):
+                column = Categorical.encode(list(column))
+            keys.append(column.codes.astype(numpy.int64) + 1)
+            labels.append(numpy.append(None, column.categories))
+        if not keys:
+            return {}
+        combined = keys[0]
+        for key, label in zip(keys[1:], labels[1:]):
+            combined = combined * len(label) + key
+        size = 1
+        for label in labels:
+            size *= len(label)
+        if size <= max(len(combined), 1 << 16):
+            # Counting in a dense array is linear, unlike sorting.
+            counts = numpy.bincount(combined, minlength=size)
+            groups = numpy.flatnonzero(counts)
+            counts = counts[groups]
+        else:
+            groups, counts = numpy.unique(combined, return_counts=True)
+        result = {}
+        for group, count in zip(groups.tolist(), counts.tolist()):
+            values = []
+            for label in reversed(labels):
+                group, code = divmod(group, len(label))
+                values.append(label[code])
+            values.reverse()
+            result[values[0] if len(values) == 1 else tuple(values)] = count
+        return result
+
+    def join(self, other, on, other_on='id', fields=None, prefix=None):
+        """Left join the rows of other whose other_on equals on.
+
+        Typically ``ports.join(networks, 'network_id')``. The joined
+        columns are named ``<prefix><field>``, prefix defaulting to
+        ``<on without _id>_``. Rows without a match get missing values.
+        """
+        if prefix is None:
+            prefix = (on[:-3] if on.endswith('_id') else on) + '_'
+        left = self.columns[on]
+        right = other.columns[other_on]
+        if not isinstance(left, Categorical):
+            left = Categorical.encode(list(left))
+        if isinstance(right, Categorical):
+            right = right.decode()
+        rows = {}
+        for row, value in enumerate(right.tolist()):
+            rows.setdefault(value, row)
+        # Row of other matching each distinct value of the join column,
+        # then of each row through the codes.
+        matches = numpy.array([rows.get(v, -1) for v in left.categories] +
+                              [-1], dtype=numpy.int64)
+        indices = matches[left.codes]
+        columns = dict(self.columns)
+        for field in fields or other.fields:
+            if field == other_on and fields is None:
+                continue
+            columns[prefix + field] = _take(other.columns[field], indices)
+        return Table(columns)
+
+    def to_resources(self):
+        """Return the rows as a list of dicts."""
+        fields = self.fields
+        columns = [_decode(self.columns[f]).tolist() for f in fields]
+        return [dict(zip(fields, row)) for row in zip(*columns)]
+
+    def to_csv(self, output=None, fields=None):
+        """Write the table as CSV to a file object, or return it as a str.
+
+        Lists and dicts are written as JSON.
+        """
+        fields = fields or self.fields
+        stream = output if output is not None else io.StringIO()
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        columns = []
+        for field in fields:
+            column = _decode(self.columns[field])
+            if column.dtype == object and not isinstance(
+                    self.columns[field], Categorical):
+                column = [v if v is None or isinstance(v, str)
+                          else jsonutils.dumps(v) for v in column]
+            else:
+                column = column.tolist()
+            columns.append(column)
+        writer.writerows(zip(*columns))
+        if output is None:
+            return stream.getvalue()
+
+    def to_npz(self, file):
+        """Save the table in the NumPy .npz format, see :meth:`load_npz`."""
+        arrays = {}
+        for field, column in self.columns.items():
+            if isinstance(column, Categorical):
+                arrays[field + _CODES] = column.codes
+                arrays[field + _CATEGORIES] = column.categories.astype(str)
+            elif column.dtype == object:
+                arrays[field + _OBJECTS] = numpy.array(
+                    [jsonutils.dumps(v) for v in column], dtype=str)
+            else:
+                arrays[field] = column
+        numpy.savez_compressed(file, **arrays)
+
+    @classmethod
+    def load_npz(cls, file):
+        _require_numpy()
+        columns = {}
+        with numpy.load(file) as data:
+            for name in data.files:
+                if name.endswith(_CATEGORIES):
+                    continue
+                if name.endswith(_CODES):
+                    field = name[:-len(_CODES)]
+                    categories = numpy.empty(
+                        len(data[field + _CATEGORIES]), dtype=object)
+                    categories[:] = data[field + _CATEGORIES].tolist()
+                    columns[field] = Categorical(data[name], categories)
+                elif name.endswith(_OBJECTS):
+                    field = name[:-len(_OBJECTS)]
+                    column = numpy.empty(len(data[name]), dtype=object)
+                    column[:] = [jsonutils.loads(v) for v in data[name]]
+                    columns[field] = column
+                else:
+                    columns[name] = data[name]
+        return cls(columns)
@@ -0,0 +1,125 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""gzip handling of request and response bodies."""
+
+import gzip
+import threading
+import zlib
+
+GZIP = 'gzip'
+CHUNK_SIZE = 64 * 1024
+DEFAULT_COMPRESSION_LEVEL = 6
+
+
+def compress(body, level=DEFAULT_COMPRESSION_LEVEL):
+    """gzip a request body given as str or bytes."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return gzip.compress(body, compresslevel=level)
+
+
+def prepare_body(body, headers, threshold, level=DEFAULT_COMPRESSION_LEVEL):
+    """Return the body to send, gzipped if it is at least threshold bytes.
+
+    Compression is disabled when threshold is None.
+    """
+    if not body or threshold is None or len(body) < threshold:
+        return body
+    headers['Content-Encoding'] = GZIP
+    return compress(body, level)
+
+
+def read_content(resp, chunk_size=CHUNK_SIZE):
+    """Read the body of a response sent with ``stream=True``.
+
+    gzip encoded bodies are decompressed chunk by chunk as they are read
+    from the socket. The decoded body is stored on the response (so that
+    ``resp.content`` and ``resp.text`` work as usual) and the number of
+    bytes received on the wire is returned.
+    """
+    encoding = resp.headers.get('Content-Encoding', '').lower()
+    if encoding != GZIP or resp.raw is None:
+        # Unknown encodings are left to requests/urllib3.
+        content = resp.content
+        return int(resp.headers.get('Content-Length') or len(content))
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    received = 0
+    chunks = []
+    for chunk in resp.raw.stream(chunk_size, decode_content=False):
+        received += len(chunk)
+        chunks.append(decoder.decompress(chunk))
+    chunks.append(decoder.flush())
+    resp._content = b''.join(chunks)
+    return received
+
+
+def received_bytes(resp):
+    """Best effort size on the wire of an already decoded response."""
+    length = resp.headers.get('Content-Length')
+    if length is not None:
+        return int(length)
+    return len(resp.content)
+
+
+class TransferStats(object):
+    """Thread safe byte counters of a HTTP client.
+
+    ``request_bytes`` and ``response_bytes`` count the uncompressed bodies
+    while ``request_bytes_sent`` and ``response_bytes_received`` count the
+    bytes which actually crossed the wire. ``last`` holds the counters of
+    the most recent request.
+    """
+
+    FIELDS = ('requests', 'request_bytes', 'request_bytes_sent',
+              'response_bytes', 'response_bytes_received')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            for field in self.FIELDS:
+                setattr(self, field, 0)
+            self.last = None
+
+    def record(self, request_bytes, request_bytes_sent, response_bytes,
+               response_bytes_received):
+        last = {'request_bytes': request_bytes,
+                'request_bytes_sent': request_bytes_sent,
+                'response_bytes': response_bytes,
+                'response_bytes_received': response_bytes_received}
+        with self._lock:
+            self.requests += 1
+            for field, value in last.items():
+                setattr(self, field, getattr(self, field) + value)
+            self.last = last
+        return last
+
+    @property
+    def request_bytes_saved(self):
+        return self.request_bytes - self.request_bytes_sent
+
+    @property
+    def response_bytes_saved(self):
+        return self.response_bytes - self.response_bytes_received
+
+    def to_dict(self):
+        with self._lock:
+            stats = dict((field, getattr(self, field))
+                         for field in self.FIELDS)
+        stats['request_bytes_saved'] = (stats['request_bytes'] -
+                                        stats['request_bytes_sent'])
+        stats['response_bytes_saved'] = (stats['response_bytes'] -
+                                         stats['response_bytes_received'])
+        return stats
@@ -72,6 +72,8 @@ class NeutronClientException(NeutronException):
     status_code = 0
     req_ids_msg = _("Neutron server returns request_ids: %s")
     request_ids = []
+    # Seconds to wait before retrying, from the Retry-After header.
+    retry_after = None
 
     def __init__(self, message=None, **kwargs):
         self.request_ids = kwargs.get('request_ids')
@@ -112,6 +114,10 @@ class Conflict(NeutronClientException):
     status_code = 409
 
 
+class TooManyRequests(NeutronClientException):
+    status_code = 429
+
+
 class InternalServerError(NeutronClientException):
     status_code = 500
 
@@ -126,6 +132,7 @@ HTTP_EXCEPTION_MAP = {
     403: Forbidden,
     404: NotFound,
     409: Conflict,
+    429: TooManyRequests,
     500: InternalServerError,
     503: ServiceUnavailable,
 }
@@ -219,10 +226,49 @@ class RequestURITooLong(NeutronClientException):
         super(RequestURITooLong, self).__init__(**kwargs)
 
 
+class UnresolvedResources(NeutronClientException):
+    """Some of the names or ids given to find_resources were not resolved.
+
+    ``found`` maps the resolved names or ids to their resource, ``missing``
+    and ``ambiguous`` list the others.
+    """
+
+    def __init__(self, message=None, **kwargs):
+        self.found = kwargs.pop('found', {})
+        self.missing = kwargs.pop('missing', [])
+        self.ambiguous = kwargs.pop('ambiguous', [])
+        if not message:
+            resource = kwargs.get('resource')
+            msgs = []
+            if self.missing:
+                msgs.append(_("Unable to find %(resource)s(s) with name or "
+                              "id(s) '%(id)s'.") %
+                            {'resource': resource,
+                             'id': ", ".join(self.missing)})
+            if self.ambiguous:
+                msgs.append(_("Multiple %(resource)s(s) matches found for "
+                              "name(s) '%(id)s'. Please use an ID to be more "
+                              "specific.") %
+                            {'resource': resource,
+                             'id': ", ".join(self.ambiguous)})
+            message = '\n'.join(msgs)
+        super(UnresolvedResources, self).__init__(message, **kwargs)
+
+
 class ConnectionFailed(NeutronClientException):
     message = _("Connection to neutron failed: %(reason)s")
 
 
+class EndpointCircuitOpen(ConnectionFailed):
+    message = _("Circuit breaker of %(endpoint)s is open after repeated "
+                "failures, the request was not sent")
+
+    def __init__(self, message=None, **kwargs):
+        self.endpoint = kwargs.get('endpoint')
+        self.retry_after = kwargs.pop('retry_after', None)
+        super(EndpointCircuitOpen, self).__init__(message, **kwargs)
+
+
 class SslCertificateValidationError(NeutronClientException):
     message = _("SSL certificate validation has failed: %(reason)s")
 
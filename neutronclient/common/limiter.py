@@ -0,0 +1,240 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Client side rate and concurrency limiting.
+
+A :class:`Limiter` combines a token bucket, bounding the number of requests
+sent per second, with an AIMD (additive increase, multiplicative decrease)
+concurrency window. The window grows by about one request per round trip
+while Neutron server answers quickly, and is cut down when it answers with
+``429`` or a 5xx status, when connections fail or when the latency rises
+well above the lowest latency observed.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+
+from keystoneauth1 import exceptions as ksa_exc
+
+from neutronclient.common import exceptions
+
+_logger = logging.getLogger(__name__)
+
+OVERLOAD_STATUSES = frozenset([429, 500, 502, 503, 504])
+OVERLOAD_EXCEPTIONS = (exceptions.ConnectionFailed, ksa_exc.ConnectionError)
+# Weight of the last request in the moving average of the latency.
+LATENCY_SMOOTHING = 0.1
+# Rate at which the baseline latency follows the actual latency upward, so
+# that a permanently slower server does not pin the window to its minimum.
+BASELINE_DRIFT = 0.01
+
+
+class TokenBucket(object):
+    """Thread safe token bucket allowing rate requests per second.
+
+    :param rate: tokens added per second.
+    :param burst: size of the bucket, defaults to one second of tokens.
+    """
+
+    def __init__(self, rate, burst=None, clock=None, sleep=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or time.sleep
+        self.tokens = self.capacity
+        self._updated = self.clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Take a token, waiting for one if needed. Return the time waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+
+class AIMDLimit(object):
+    """Adaptive limit of the number of requests in flight.
+
+    :param initial: initial size of the window.
+    :param min_limit: smallest size of the window.
+    :param max_limit: largest size of the window.
+    :param backoff_ratio: factor applied to the window on overload.
+    :param latency_tolerance: latency above this multiple of the baseline
+                              latency is treated as overload. None only
+                              reacts to errors.
+    """
+
+    def __init__(self, initial=10, min_limit=1, max_limit=100,
+                 backoff_ratio=0.5, latency_tolerance=2.0, clock=None):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.clock = clock or time.monotonic
+        self.inflight = 0
+        self.latency = None
+        self.baseline = None
+        self.decreases = 0
+        self._last_decrease = None
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot in the window. Return the time waited."""
+        started = None
+        with self._cond:
+            while self.inflight >= max(1, int(self.limit)):
+                if started is None:
+                    started = time.monotonic()
+                self._cond.wait()
+            self.inflight += 1
+        return time.monotonic() - started if started is not None else 0.0
+
+    def _track_latency(self, elapsed):
+        if self.latency is None:
+            self.latency = self.baseline = elapsed
+            return False
+        self.latency += LATENCY_SMOOTHING * (elapsed - self.latency)
+        if self.latency < self.baseline:
+            self.baseline = self.latency
+        else:
+            self.baseline += BASELINE_DRIFT * (self.latency - self.baseline)
+        return (self.latency_tolerance is not None and
+                self.latency > self.baseline * self.latency_tolerance)
+
+    def release(self, overloaded=False, elapsed=None):
+        """Free a slot and adapt the window to the outcome of the request.
+
+        overloaded is None when the request was not actually sent.
+        """
+        with self._cond:
+            self.inflight -= 1
+            if overloaded is not None:
+                if elapsed is not None and self._track_latency(elapsed):
+                    overloaded = True
+                if overloaded:
+                    self._decrease()
+                elif self.inflight + 1 >= int(self.limit):
+                    # Only grow a window which is actually used.
+                    self.limit = min(self.max_limit,
+                                     self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self):
+        # Requests sent in the same round trip see the same overload, only
+        # shrink the window once for all of them.
+        now = self.clock()
+        if (self._last_decrease is not None and self.latency is not None and
+                now - self._last_decrease < self.latency):
+            return
+        self._last_decrease = now
+        limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        if limit < self.limit:
+            _logger.debug('Reducing the concurrency limit to %d', limit)
+            self.decreases += 1
+        self.limit = limit
+
+
+class _Permit(object):
+
+    def __init__(self):
+        self.status_code = None
+
+
+class Limiter(object):
+    """Rate and concurrency limiter shared by clients and threads.
+
+    :param rate: requests per second, None for no rate limit.
+    :param burst: requests which may be sent at once above the rate.
+    :param concurrency: initial number of requests in flight, None for no
+                        concurrency limit.
+    :param min_concurrency: lowest concurrency the window shrinks to.
+    :param max_concurrency: highest concurrency the window grows to.
+    :param latency_tolerance: see :class:`AIMDLimit`.
+    """
+
+    def __init__(self, rate=None, burst=None, concurrency=10,
+                 min_concurrency=1, max_concurrency=100,
+                 latency_tolerance=2.0):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.window = None
+        if concurrency:
+            self.window = AIMDLimit(concurrency, min_concurrency,
+                                    max_concurrency,
+                                    latency_tolerance=latency_tolerance)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.overloads = 0
+        self.rate_wait = 0.0
+        self.concurrency_wait = 0.0
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """Hold a permit while sending one request.
+
+        The caller sets ``status_code`` on the yielded permit once the
+        response is received.
+        """
+        rate_wait = self.bucket.acquire() if self.bucket else 0.0
+        concurrency_wait = self.window.acquire() if self.window else 0.0
+        permit = _Permit()
+        started = time.monotonic()
+        overloaded = None
+        try:
+            yield permit
+            overloaded = permit.status_code in OVERLOAD_STATUSES
+        except exceptions.EndpointCircuitOpen:
+            raise
+        except OVERLOAD_EXCEPTIONS:
+            overloaded = True
+            raise
+        except Exception:
+            overloaded = False
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            if self.window:
+                self.window.release(overloaded,
+                                    elapsed if overloaded is not None
+                                    else None)
+            with self._lock:
+                self.requests += 1
+                self.overloads += bool(overloaded)
+                self.rate_wait += rate_wait
+                self.concurrency_wait += concurrency_wait
+
+    def to_dict(self):
+        with self._lock:
+            stats = {'requests': self.requests,
+                     'overloads': self.overloads,
+                     'rate_wait': self.rate_wait,
+                     'concurrency_wait': self.concurrency_wait}
+        if self.window:
+            stats.update(concurrency_limit=int(self.window.limit),
+                         inflight=self.window.inflight,
+                         decreases=self.window.decreases)
+        return stats
@@ -0,0 +1,167 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Spreading requests over several Neutron server endpoints.
+
+Every request goes to the healthy endpoint with the fewest requests in
+flight. Health is tracked passively: an endpoint failing
+``failure_threshold`` requests in a row (connection errors or 5xx
+responses) is left aside for ``cooldown`` seconds, after which it gets
+requests again. The latency of GET requests is recorded so that a hedged
+duplicate of a GET can be sent to another endpoint once the first attempt
+is slower than a given percentile.
+"""
+
+import collections
+import logging
+import math
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 2
+DEFAULT_COOLDOWN = 30.0
+# Number of recent GET latencies the hedging percentile is computed from,
+# and the number of them needed before requests are hedged.
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class _Endpoint(object):
+
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.failures = 0
+        self.down_until = None
+        self.requests = 0
+
+    def to_dict(self):
+        return {'outstanding': self.outstanding, 'failures': self.failures,
+                'down_until': self.down_until, 'requests': self.requests}
+
+
+class EndpointSet(object):
+    """Thread safe least-outstanding-requests endpoint selection.
+
+    :param urls: endpoint URLs of the Neutron servers.
+    :param failure_threshold: consecutive failures after which an endpoint
+                              is considered down.
+    :param cooldown: seconds during which a down endpoint gets no requests
+                     while other endpoints are up.
+    :param hedge_percentile: send a hedged duplicate of a GET to another
+                             endpoint when the first attempt takes longer
+                             than this percentile (e.g. 95) of the recent
+                             GET latencies. None disables hedging.
+    """
+
+    def __init__(self, urls, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 cooldown=DEFAULT_COOLDOWN, hedge_percentile=None,
+                 clock=None):
+        if not urls:
+            raise ValueError('At least one endpoint URL is required')
+        self.endpoints = [_Endpoint(url.rstrip('/')) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge_percentile = hedge_percentile
+        self.clock = clock or time.monotonic
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def _is_up(self, endpoint, now):
+        return endpoint.down_until is None or endpoint.down_until <= now
+
+    def acquire(self, exclude=None):
+        """Pick an endpoint for a request and count it as outstanding.
+
+        Endpoints in exclude are not picked, None is returned when no
+        other endpoint is left.
+        """
+        with self._lock:
+            now = self.clock()
+            n = len(self.endpoints)
+            # Start at a rotating offset so that ties are spread.
+            candidates = [self.endpoints[(self._next + i) % n]
+                          for i in range(n)]
+            self._next = (self._next + 1) % n
+            if exclude:
+                candidates = [e for e in candidates if e.url not in exclude]
+            if not candidates:
+                return None
+            up = [e for e in candidates if self._is_up(e, now)]
+            if up:
+                endpoint = min(up, key=lambda e: e.outstanding)
+            else:
+                # Everything is down, try the one which failed first.
+                endpoint = min(candidates, key=lambda e: e.down_until)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint.url
+
+    def release(self, url, success, latency=None):
+        """Record the outcome of a request sent to an acquired endpoint.
+
+        latency is only given for requests which may be hedged.
+        """
+        with self._lock:
+            endpoint = self._get(url)
+            endpoint.outstanding -= 1
+            if success:
+                endpoint.failures = 0
+                endpoint.down_until = None
+                if latency is not None:
+                    self.latencies.append(latency)
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.failure_threshold:
+                if self._is_up(endpoint, self.clock()):
+                    _logger.warning('Neutron endpoint %(url)s is down after '
+                                    '%(failures)d failures',
+                                    {'url': url,
+                                     'failures': endpoint.failures})
+                endpoint.down_until = self.clock() + self.cooldown
+
+    def _get(self, url):
+        for endpoint in self.endpoints:
+            if endpoint.url == url:
+                return endpoint
+        raise KeyError(url)
+
+    def hedge_delay(self):
+        """Seconds after which a GET is hedged, None to not hedge it."""
+        if self.hedge_percentile is None or len(self.endpoints) < 2:
+            return None
+        with self._lock:
+            if len(self.latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            latencies = sorted(self.latencies)
+        rank = int(math.ceil(self.hedge_percentile / 100.0 * len(latencies)))
+        return latencies[min(len(latencies), max(1, rank)) - 1]
+
+    def record_hedge(self, won):
+        with self._lock:
+            self.hedged += 1
+            self.hedge_wins += bool(won)
+
+    def to_dict(self):
+        with self._lock:
+            return {'endpoints': dict((e.url, e.to_dict())
+                                      for e in self.endpoints),
+                    'hedged': self.hedged, 'hedge_wins': self.hedge_wins}
@@ -0,0 +1,332 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Timings of the requests sent to Neutron and their histograms.
+
+Each request is timed by a :class:`RequestTiming` made of phases:
+
+* ``queue_wait``: time waiting for the client side limiter;
+* ``connect``: time opening a new connection, absent when one was
+  reused;
+* ``ttfb``: time from sending the request to receiving the response
+  headers, including ``connect``;
+* ``body_read``: time reading the response body;
+* ``deserialize``: time decoding the JSON response.
+
+Phases the transport cannot observe are left out, e.g. ``connect`` with a
+keystoneauth session. :class:`Metrics` calls its callbacks with every
+completed timing and keeps histograms keyed by method and path template
+(``/ports/%s`` rather than the URL of each port), which are exported in
+the OpenMetrics text format.
+"""
+
+import bisect
+import contextlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+PHASES = ('queue_wait', 'connect', 'ttfb', 'body_read', 'deserialize')
+# Upper bounds in seconds of the histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+PREFIX = 'neutronclient'
+
+_ID_SEGMENT = re.compile(
+    r'^([0-9a-fA-F]{8}-([0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}|'
+    r'[0-9a-fA-F]{32}|\d+)$')
+_local = threading.local()
+
+
+def path_template(path):
+    """Replace the ids in the path of a request by %s, dropping the query.
+
+    '/v2.0/ports/<uuid>?fields=id' gives '/v2.0/ports/%s'.
+    """
+    path = path.split('?', 1)[0]
+    if '://' in path:
+        path = '/' + path.split('://', 1)[1].split('/', 1)[-1]
+    return '/'.join('%s' if _ID_SEGMENT.match(segment) else segment
+                    for segment in path.split('/'))
+
+
+def current():
+    """Return the timing of the request in progress in this thread."""
+    return getattr(_local, 'timing', None)
+
+
+@contextlib.contextmanager
+def attach(timing):
+    """Make timing the current timing of this thread while in the block.
+
+    Lets a worker thread time its part of a request started by another
+    thread.
+    """
+    previous = current()
+    _local.timing = timing
+    try:
+        yield timing
+    finally:
+        _local.timing = previous
+
+
+def add_phase(phase, seconds):
+    """Add time to a phase of the request in progress, if any."""
+    timing = current()
+    if timing is not None:
+        timing.add(phase, seconds)
+
+
+class RequestTiming(object):
+    """Timings of a single request. Phases may be added from any thread."""
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.template = path_template(path)
+        self.status_code = None
+        self.error = None
+        self.phases = {}
+        self.duration = None
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = (self.phases.get(phase, 0.0) +
+                                  max(0.0, seconds))
+
+    @contextlib.contextmanager
+    def measure(self, phase):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(phase, time.monotonic() - started)
+
+    def to_dict(self):
+        return {'method': self.method, 'path': self.path,
+                'template': self.template, 'status_code': self.status_code,
+                'error': self.error, 'duration': self.duration,
+                'phases': dict(self.phases)}
+
+
+class Histogram(object):
+    """Cumulative histogram of durations. Not thread safe."""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+def _labels(**labels):
+    return ','.join('%s="%s"' % (name, str(value).replace(
+        '\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in sorted(labels.items()))
+
+
+def _format_float(value):
+    return repr(float(value))
+
+
+class Metrics(object):
+    """Thread safe collector of request timings.
+
+    :param callbacks: functions called with each completed
+                      :class:`RequestTiming`.
+    :param buckets: upper bounds in seconds of the histogram buckets.
+    """
+
+    def __init__(self, callbacks=(), buckets=DEFAULT_BUCKETS):
+        self.callbacks = list(callbacks)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._phases = {}
+        self._requests = {}
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    @contextlib.contextmanager
+    def request(self, method, path):
+        """Time a request, made the current timing of the thread.
+
+        Nested calls, e.g. from the HTTP client below a ClientBase, reuse
+        the timing in progress.
+        """
+        timing = current()
+        if timing is not None:
+            yield timing
+            return
+        timing = _local.timing = RequestTiming(method, path)
+        try:
+            yield timing
+        except Exception as e:
+            timing.error = type(e).__name__
+            if timing.status_code is None:
+                timing.status_code = getattr(e, 'status_code', None) or None
+            raise
+        finally:
+            _local.timing = None
+            timing.duration = time.monotonic() - timing.started_at
+            self.record(timing)
+
+    def record(self, timing):
+        key = (timing.method, timing.template)
+        status = timing.status_code or timing.error or 'unknown'
+        with self._lock:
+            histogram = self._durations.get(key)
+            if histogram is None:
+                histogram = self._durations[key] = Histogram(self.buckets)
+            histogram.observe(timing.duration)
+            for phase, seconds in timing.phases.items():
+                phase_key = key + (phase,)
+                histogram = self._phases.get(phase_key)
+                if histogram is None:
+                    histogram = self._phases[phase_key] = Histogram(
+                        self.buckets)
+                histogram.observe(seconds)
+            count_key = key + (str(status),)
+            self._requests[count_key] = self._requests.get(count_key, 0) + 1
+        for callback in self.callbacks:
+            try:
+                callback(timing)
+            except Exception:
+                _logger.exception('Request timing callback %s failed',
+                                  callback)
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._phases.clear()
+            self._requests.clear()
+
+    def to_dict(self):
+        """Return the count and total duration per method and template."""
+        with self._lock:
+            return dict(('%s %s' % key, {'count': h.count, 'sum': h.sum})
+                        for key, h in self._durations.items())
+
+    def _histogram_lines(self, name, histograms, label_names):
+        lines = ['# TYPE %s histogram' % name, '# UNIT %s seconds' % name]
+        for key, histogram in sorted(histograms.items()):
+            labels = dict(zip(label_names, key))
+            for bound, count in histogram.cumulative():
+                lines.append('%s_bucket{%s} %d' % (
+                    name, _labels(le=_format_float(bound), **labels),
+                    count))
+            lines.append('%s_bucket{%s} %d' % (
+                name, _labels(le='+Inf', **labels), histogram.count))
+            lines.append('%s_count{%s} %d' % (name, _labels(**labels),
+                                              histogram.count))
+            lines.append('%s_sum{%s} %s' % (name, _labels(**labels),
+                                            _format_float(histogram.sum)))
+        return lines
+
+    def openmetrics(self):
+        """Return the metrics in the OpenMetrics text format."""
+        with self._lock:
+            lines = self._histogram_lines(
+                PREFIX + '_request_duration_seconds', self._durations,
+                ('method', 'path'))
+            lines += self._histogram_lines(
+                PREFIX + '_request_phase_seconds', self._phases,
+                ('method', 'path', 'phase'))
+            name = PREFIX + '_requests'
+            lines += ['# TYPE %s counter' % name]
+            for key, count in sorted(self._requests.items()):
+                lines.append('%s_total{%s} %d' % (name, _labels(
+                    **dict(zip(('method', 'path', 'status'), key))), count))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, target):
+        """Export the OpenMetrics text to a file path or a callable.
+
+        Files are replaced atomically so that a scraper never reads a
+        partial export.
+        """
+        text = self.openmetrics()
+        if callable(target):
+            target(text)
+            return
+        directory = os.path.dirname(os.path.abspath(target))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, target)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+
+
+class PeriodicExporter(object):
+    """Exports metrics every interval seconds from a daemon thread."""
+
+    def __init__(self, metrics, target, interval=15.0):
+        self.metrics = metrics
+        self.target = target
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='neutronclient-metrics', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._export()
+
+    def _export(self):
+        try:
+            self.metrics.export(self.target)
+        except Exception:
+            _logger.exception('Failed to export metrics to %s', self.target)
+
+    def stop(self):
+        """Stop the thread after a last export."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+            self._export()
@@ -0,0 +1,105 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Adaptive page size of paginated lists."""
+
+import logging
+import threading
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_INITIAL_SIZE = 100
+DEFAULT_MIN_SIZE = 10
+DEFAULT_MAX_SIZE = 10000
+# Seconds a page should take to be fetched and decoded.
+DEFAULT_TARGET_TIME = 1.0
+# Size of the JSON of a page not to exceed.
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Bounds of the change of the page size from one page to the next.
+MAX_GROWTH = 2.0
+# Weight of the last page in the moving averages.
+SMOOTHING = 0.5
+
+
+class AdaptivePageSize(object):
+    """Tune the ``limit`` of paginated lists from the pages fetched.
+
+    The time and the size of a resource are estimated from every full
+    page and the next page is sized to take ``target_time`` seconds
+    without exceeding ``max_bytes``, changing by at most a factor of 2 from
+    one page to the next. A page which failed (e.g. timed out) halves the
+    size. It may be shared by several lists of the same collection.
+
+    :param initial: size of the first page.
+    :param min_size: smallest page size.
+    :param max_size: largest page size.
+    :param target_time: seconds a page should take.
+    :param max_bytes: largest size of a page, None for no bound.
+    """
+
+    def __init__(self, initial=DEFAULT_INITIAL_SIZE,
+                 min_size=DEFAULT_MIN_SIZE, max_size=DEFAULT_MAX_SIZE,
+                 target_time=DEFAULT_TARGET_TIME,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_time = target_time
+        self.max_bytes = max_bytes
+        self.limit = self._bound(initial)
+        self.item_time = None
+        self.item_bytes = None
+        self.pages = 0
+        self._lock = threading.Lock()
+
+    def _bound(self, size):
+        return int(max(self.min_size, min(self.max_size, size)))
+
+    @staticmethod
+    def _average(current, value):
+        if current is None:
+            return value
+        return current + SMOOTHING * (value - current)
+
+    def record(self, limit, count, elapsed, item_bytes=None):
+        """Adapt the page size after a page of count resources.
+
+        limit is the page size the page was requested with. Partial pages
+        (the last one) do not tell how long a full page would take.
+        """
+        with self._lock:
+            self.pages += 1
+            if not count or count < limit:
+                return self.limit
+            self.item_time = self._average(self.item_time, elapsed / count)
+            wanted = [self.target_time / max(self.item_time, 1e-9)]
+            if item_bytes and self.max_bytes:
+                self.item_bytes = self._average(self.item_bytes, item_bytes)
+                wanted.append(self.max_bytes / self.item_bytes)
+            size = min(wanted)
+            size = max(limit / MAX_GROWTH, min(limit * MAX_GROWTH, size))
+            self.limit = self._bound(size)
+            return self.limit
+
+    def shrink(self):
+        """Halve the page size after a failure, False if at the minimum."""
+        with self._lock:
+            if self.limit <= self.min_size:
+                return False
+            self.limit = self._bound(self.limit / MAX_GROWTH)
+            _logger.debug('Reducing the page size to %d', self.limit)
+            return True
+
+    def to_dict(self):
+        with self._lock:
+            return {'limit': self.limit, 'pages': self.pages,
+                    'item_time': self.item_time,
+                    'item_bytes': self.item_bytes}
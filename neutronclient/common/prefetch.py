@@ -0,0 +1,120 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Read ahead of iterators doing I/O, such as the pages of a collection."""
+
+import collections
+import threading
+
+from neutronclient.common import metrics
+from neutronclient.common import tracing
+
+
+class _Done(object):
+
+    def __init__(self, error=None):
+        self.error = error
+
+
+class Prefetcher(object):
+    """Iterate over an iterator advanced by a background thread.
+
+    The thread keeps up to ``depth`` items ready ahead of the consumer, so
+    that fetching the next page overlaps with the processing of the
+    current one. With ``max_bytes``, it also stops reading ahead once the
+    items waiting for the consumer reach that size, as measured by
+    ``sizeof``. Exceptions are raised to the consumer in order.
+
+    The thread works in the context of the consumer when it starts
+    iterating: its spans are nested in the span in progress and its
+    requests are counted in the request timing in progress, if any.
+    """
+
+    def __init__(self, iterable, depth=1, max_bytes=None, sizeof=None):
+        if depth < 1:
+            raise ValueError('depth must be at least 1')
+        self.depth = depth
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or len
+        self._iterator = iter(iterable)
+        self._buffer = collections.deque()
+        self._bytes = 0
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _is_full(self):
+        if len(self._buffer) >= self.depth:
+            return True
+        # Always allow one item ahead so that the consumer progresses.
+        return (self.max_bytes is not None and self._buffer and
+                self._bytes >= self.max_bytes)
+
+    def _produce(self, timing, span_context):
+        with metrics.attach(timing), tracing.attach(span_context):
+            self._read_ahead()
+
+    def _read_ahead(self):
+        try:
+            while True:
+                with self._cond:
+                    while not self._stopped and self._is_full():
+                        self._cond.wait()
+                    if self._stopped:
+                        return
+                try:
+                    item = next(self._iterator)
+                except StopIteration:
+                    item, size = _Done(), 0
+                else:
+                    size = self.sizeof(item) if self.max_bytes else 0
+                with self._cond:
+                    self._buffer.append((item, size))
+                    self._bytes += size
+                    self._cond.notify_all()
+                if isinstance(item, _Done):
+                    return
+        except Exception as e:
+            with self._cond:
+                self._buffer.append((_Done(e), 0))
+                self._cond.notify_all()
+        finally:
+            close = getattr(self._iterator, 'close', None)
+            if close:
+                close()
+
+    def __iter__(self):
+        self._thread = threading.Thread(
+            target=self._produce, daemon=True, name='neutronclient-prefetch',
+            args=(metrics.current(), tracing.context()))
+        self._thread.start()
+        try:
+            while True:
+                with self._cond:
+                    while not self._buffer:
+                        self._cond.wait()
+                    item, size = self._buffer.popleft()
+                    self._bytes -= size
+                    self._cond.notify_all()
+                if isinstance(item, _Done):
+                    if item.error is not None:
+                        raise item.error
+                    return
+                yield item
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop reading ahead, e.g. when the consumer gives up early."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
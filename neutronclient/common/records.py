@@ -0,0 +1,115 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Compact read-only records for the resources of huge lists.
+
+A decoded resource is a dict holding its own copy of every key and value.
+A :class:`Record` instead keeps a tuple of values and a reference to a
+:class:`Schema` shared by all the resources with the same keys, and the
+:class:`Compactor` building them reuses a single object for the strings
+which repeat across resources, such as project, network and device owner
+values. Nested dicts become records and nested lists become tuples.
+"""
+
+import collections.abc
+
+
+class Schema(object):
+    """Keys of records, in order, with the position of each one."""
+
+    __slots__ = ('keys', 'index')
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.index = dict((key, i) for i, key in enumerate(keys))
+
+
+class Record(collections.abc.Mapping):
+    """Read-only mapping backed by a shared schema and a tuple of values."""
+
+    __slots__ = ('_schema', '_values')
+
+    def __init__(self, schema, values):
+        self._schema = schema
+        self._values = values
+
+    def __getitem__(self, key):
+        try:
+            return self._values[self._schema.index[key]]
+        except KeyError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._schema.index
+
+    def __iter__(self):
+        return iter(self._schema.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return 'Record(%r)' % self.to_dict()
+
+    def __reduce__(self):
+        return (_from_dict, (self.to_dict(),))
+
+    def to_dict(self):
+        """Return a mutable copy made of plain dicts and lists."""
+        return dict((key, _to_primitive(value))
+                    for key, value in zip(self._schema.keys, self._values))
+
+
+def _to_primitive(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_to_primitive(v) for v in value]
+    return value
+
+
+def _from_dict(values):
+    return Compactor().compact(values)
+
+
+class Compactor(object):
+    """Turns decoded resources into records sharing schemas and strings.
+
+    Use one compactor for all the resources of a list so that they share
+    as much as possible. It is not thread safe.
+    """
+
+    def __init__(self):
+        self._schemas = {}
+        self._strings = {}
+
+    def compact(self, value):
+        if isinstance(value, dict):
+            keys = tuple(value)
+            schema = self._schemas.get(keys)
+            if schema is None:
+                keys = tuple(self._intern(key) for key in keys)
+                schema = self._schemas[keys] = Schema(keys)
+            return Record(schema, tuple(self.compact(v)
+                                        for v in value.values()))
+        if isinstance(value, list):
+            return tuple(self.compact(v) for v in value)
+        if isinstance(value, str):
+            return self._intern(value)
+        return value
+
+    def _intern(self, value):
+        return self._strings.setdefault(value, value)
+
+    def to_dict(self):
+        return {'schemas': len(self._schemas),
+                'strings': len(self._strings)}
@@ -0,0 +1,157 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cache of the ids resolved from resource names.
+
+Entries map a (caller, resource, name, project, parent) key to the id
+found by ``find_resource``, in LRU order, for ``ttl`` seconds. The caller
+is the endpoint with the authenticated project and user, or the token.
+Names which were not found can also be remembered for ``negative_ttl``
+seconds.
+
+A cache is usually shared by all the clients of a process through
+:func:`shared_cache`. The clients drop the entries of the resources they
+update or delete, and whenever they create or update a resource the
+negative entries and the names resolved in its collection, which may no
+longer be unique; changes made by others are only seen when entries
+expire.
+"""
+
+import collections
+import threading
+import time
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 4096
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """Return the cache shared by the clients of this process."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResolutionCache()
+        return _shared
+
+
+class Missing(object):
+    """Cached outcome of a name which was not found."""
+
+    __slots__ = ('message',)
+
+    def __init__(self, message):
+        self.message = message
+
+
+class _Entry(object):
+
+    __slots__ = ('value', 'expires_at')
+
+    def __init__(self, value, expires_at):
+        self.value = value
+        self.expires_at = expires_at
+
+
+class ResolutionCache(object):
+    """Thread safe LRU cache of resolved resource ids.
+
+    :param ttl: seconds during which a resolved id is reused.
+    :param max_entries: number of entries kept.
+    :param negative_ttl: seconds during which a name which was not found
+                         is reported missing without asking the server.
+                         None or 0 disables negative caching.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 negative_ttl=None, clock=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.clock = clock or time.monotonic
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(
+            ('hits', 'negative_hits', 'misses', 'evictions',
+             'invalidations'), 0)
+
+    def get(self, key):
+        """Return the cached id, a :class:`Missing` or None on a miss."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            if isinstance(entry.value, Missing):
+                self.stats['negative_hits'] += 1
+            else:
+                self.stats['hits'] += 1
+            return entry.value
+
+    def set(self, key, resource_id):
+        self._set(key, resource_id, self.ttl)
+
+    def set_missing(self, key, message):
+        if self.negative_ttl:
+            self._set(key, Missing(message), self.negative_ttl)
+
+    def _set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = _Entry(value, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _remove_if(self, predicate):
+        with self._lock:
+            keys = [key for key, entry in self._entries.items()
+                    if predicate(key, entry.value)]
+            for key in keys:
+                del self._entries[key]
+            self.stats['invalidations'] += len(keys)
+
+    def invalidate_path(self, path):
+        """Drop the entries of the resources whose ids appear in path."""
+        segments = set(path.split('?', 1)[0].split('/'))
+        self._remove_if(lambda key, value: (
+            not isinstance(value, Missing) and value in segments))
+
+    def invalidate_names(self, path, plural):
+        """Drop the ids resolved from a name in the collections of path.
+
+        A resource created or renamed there may bear the same name.
+        ``plural`` maps the resources of a key to their collections.
+        """
+        segments = set(path.split('?', 1)[0].split('/'))
+        self._remove_if(lambda key, value: (
+            not isinstance(value, Missing) and key[3] != value and
+            not segments.isdisjoint(plural(r) for r in key[1:3])))
+
+    def invalidate_missing(self):
+        """Drop the negative entries, e.g. after creating a resource."""
+        self._remove_if(lambda key, value: isinstance(value, Missing))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries))
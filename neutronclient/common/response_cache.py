@@ -0,0 +1,272 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cache of the responses of GET requests.
+
+Entries are kept in memory in LRU order, bounded in number and optionally
+in size, and are fresh for ``ttl`` seconds. With ``revalidate`` an entry
+which is no longer fresh is kept ``stale_ttl`` more seconds; the client
+then only fetches the ``id`` and ``revision_number`` of the cached
+resources and reuses the entry if they did not change.
+
+An optional on-disk tier, stored like the tokens of
+:class:`~neutronclient.common.auth_cache.AuthCache` in files only readable
+by their owner, lets consecutive processes share entries. Every disk entry
+has its own file and the tier is bounded like the memory one; a write drops
+the disk entries of its collection stored before it. Entries, in memory and
+on disk, are scoped to the endpoint and token used, so that they are only
+visible to the holders of the same token.
+"""
+
+import collections
+import contextlib
+import copy
+import os
+import threading
+import time
+
+from oslo_serialization import jsonutils
+
+from neutronclient.common import auth_cache
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_STALE_TTL = 3600
+
+
+def default_directory():
+    return os.path.join(os.path.dirname(auth_cache.default_directory()),
+                        'responses')
+
+
+def collection_of(path):
+    """Return the top level collection of path, e.g. '/ports'."""
+    return '/' + path.lstrip('/').split('/', 1)[0].split('?', 1)[0]
+
+
+def _ancestors(path):
+    parts = path.rstrip('/').split('/')
+    return set('/'.join(parts[:i]) for i in range(2, len(parts) + 1))
+
+
+class _Entry(object):
+
+    __slots__ = ('path', 'value', 'stored_at', 'size')
+
+    def __init__(self, path, value, stored_at, size):
+        self.path = path
+        self.value = value
+        self.stored_at = stored_at
+        self.size = size
+
+
+class ResponseCache(object):
+    """Thread safe LRU cache of GET responses.
+
+    :param ttl: seconds during which an entry is used without contacting
+                the server.
+    :param max_entries: number of entries kept in memory, and on disk.
+    :param max_bytes: bound of the total JSON size of the entries kept in
+                      memory, and on disk. None for no bound.
+    :param revalidate: revalidate expired entries with their
+                       ``revision_number`` instead of fetching them again.
+    :param stale_ttl: seconds an expired entry is kept for revalidation.
+    :param directory: enables the on-disk tier, stored in this directory.
+                      :func:`default_directory` is a sensible choice.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=None, revalidate=False,
+                 stale_ttl=DEFAULT_STALE_TTL, directory=None, clock=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.revalidate = revalidate
+        self.stale_ttl = stale_ttl if revalidate else 0
+        self.clock = clock or time.time
+        self.disk = None
+        if directory:
+            self.disk = auth_cache.AuthCache(directory, expiry_margin=0)
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(
+            ('hits', 'misses', 'stale', 'revalidated', 'evictions',
+             'invalidations', 'disk_hits'), 0)
+
+    @property
+    def directory(self):
+        return self.disk.directory if self.disk else None
+
+    def _count(self, stat, n=1):
+        # Called with the lock held.
+        self.stats[stat] += n
+
+    def _is_fresh(self, entry, now):
+        return now - entry.stored_at < self.ttl
+
+    def _is_usable(self, entry, now):
+        return now - entry.stored_at < self.ttl + self.stale_ttl
+
+    def get(self, key, scope=None):
+        """Return (value, fresh) for key, or None on a miss.
+
+        value is a deep copy of the cached response. scope identifies the
+        caller, entries are only returned to the scope which stored them.
+        The on-disk tier is skipped when it is None.
+        """
+        now = self.clock()
+        memory_key = (scope, key)
+        with self._lock:
+            entry = self._entries.get(memory_key)
+            if entry is not None and not self._is_usable(entry, now):
+                self._remove(memory_key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(memory_key)
+        if entry is None and scope is not None and self.disk:
+            entry = self._disk_get(key, scope, now)
+            if entry is not None:
+                with self._lock:
+                    self._count('disk_hits')
+                    self._add(memory_key, entry)
+        with self._lock:
+            if entry is None:
+                self._count('misses')
+                return None
+            fresh = self._is_fresh(entry, now)
+            self._count('hits' if fresh else 'stale')
+        return copy.deepcopy(entry.value), fresh
+
+    def set(self, key, path, value, scope=None):
+        """Store a deep copy of value, the response of a GET of path."""
+        size = len(jsonutils.dump_as_bytes(value)) if self.max_bytes else 0
+        entry = _Entry(path, copy.deepcopy(value), self.clock(), size)
+        with self._lock:
+            self._add((scope, key), entry)
+        if scope is not None and self.disk:
+            self._disk_set(key, entry, scope)
+
+    def refresh(self, key, scope=None):
+        """Mark the entry of key as fresh after a successful revalidation."""
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                return
+            self._count('revalidated')
+            entry.stored_at = self.clock()
+        if scope is not None and self.disk:
+            self._disk_set(key, entry, scope)
+
+    def _add(self, key, entry):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._entries and (
+                len(self._entries) > self.max_entries or
+                self.max_bytes is not None and self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._count('evictions')
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def invalidate(self, path, scope=None):
+        """Drop the entries a write to path may have changed.
+
+        These are the entries of path, of the resources below it and of
+        its ancestors, e.g. a write to /ports/ID drops the show of the port
+        and the lists of ports, whatever their scope. Disk entries of the
+        whole collection are dropped.
+        """
+        path = path.split('?', 1)[0].rstrip('/')
+        ancestors = _ancestors(path)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if entry.path in ancestors or
+                     entry.path.startswith(path + '/')]
+            for key in stale:
+                self._remove(key)
+            self._count('invalidations', len(stale))
+        if scope is not None and self.disk:
+            # The entries of the collection are not listed anywhere, they
+            # are ignored when older than this mark.
+            self.disk.set(self._mark_key(scope, collection_of(path)),
+                          {'invalidated_at': self.clock()},
+                          ttl=self.ttl + self.stale_ttl, purge=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _disk_key(self, scope, key):
+        return auth_cache.make_key('response', scope, jsonutils.dumps(key))
+
+    def _mark_key(self, scope, collection):
+        return auth_cache.make_key('invalidated', scope, collection)
+
+    def _disk_get(self, key, scope, now):
+        stored = self.disk.get(self._disk_key(scope, key))
+        if not stored:
+            return None
+        entry = _Entry(stored['path'], stored['value'], stored['stored_at'],
+                       0)
+        if not self._is_usable(entry, now):
+            return None
+        mark = self.disk.get(self._mark_key(scope,
+                                            collection_of(entry.path)))
+        if mark and entry.stored_at <= mark['invalidated_at']:
+            return None
+        if self.max_bytes:
+            entry.size = len(jsonutils.dump_as_bytes(entry.value))
+        return entry
+
+    def _disk_set(self, key, entry, scope):
+        # Files are replaced atomically, no lock is needed to write one.
+        self.disk.set(self._disk_key(scope, key),
+                      {'path': entry.path, 'value': entry.value,
+                       'stored_at': entry.stored_at},
+                      ttl=self.ttl + self.stale_ttl, purge=False)
+        self._disk_trim()
+
+    def _disk_trim(self):
+        """Evict the expired and the oldest disk entries beyond the bounds.
+
+        Only the metadata of the files is read.
+        """
+        files = []
+        with os.scandir(self.disk.directory) as entries:
+            for f in entries:
+                if not f.name.endswith(auth_cache.SUFFIX):
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    st = f.stat()
+                    files.append((st.st_mtime, st.st_size, f.path))
+        files.sort(reverse=True)
+        expired = time.time() - (self.ttl + self.stale_ttl)
+        total = 0
+        for count, (mtime, size, path) in enumerate(files, 1):
+            total += size
+            if (mtime <= expired or count > self.max_entries or
+                    self.max_bytes is not None and total > self.max_bytes):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+
+    def to_dict(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update(entries=len(self._entries), bytes=self._bytes)
+        return stats
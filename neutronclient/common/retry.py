@@ -0,0 +1,177 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Retry policies for idempotent requests."""
+
+import datetime
+import email.utils
+import random
+import threading
+import time
+
+from keystoneauth1 import exceptions as ksa_exc
+
+from neutronclient.common import exceptions
+
+DEFAULT_RETRY_STATUSES = (429, 502, 503, 504)
+DEFAULT_RETRY_EXCEPTIONS = (exceptions.ConnectionFailed,
+                            ksa_exc.ConnectionError)
+
+
+def parse_retry_after(value, now=None):
+    """Convert a Retry-After header value into seconds (or None)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (date - now).total_seconds())
+
+
+class RetryStats(object):
+    """Thread safe counters of a retry policy."""
+
+    FIELDS = ('calls', 'attempts', 'retries', 'exhausted', 'backoff_time')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            for field in self.FIELDS:
+                setattr(self, field, 0)
+
+    def add(self, **counters):
+        with self._lock:
+            for field, value in counters.items():
+                setattr(self, field, getattr(self, field) + value)
+
+    def to_dict(self):
+        with self._lock:
+            return dict((field, getattr(self, field))
+                        for field in self.FIELDS)
+
+
+class RetryPolicy(object):
+    """Decides whether and when a failed idempotent request is retried.
+
+    The delay before retry ``n`` (starting at 0) is drawn uniformly between
+    0 and ``min(backoff_max, backoff_base * backoff_factor ** n)`` ("full
+    jitter"), or is exactly that value when ``jitter`` is False. A
+    ``Retry-After`` header sent by the server takes precedence, still
+    bounded by ``backoff_max``.
+
+    :param max_retries: number of retries after the first attempt.
+    :param backoff_base: delay of the first retry in seconds.
+    :param backoff_factor: multiplier applied to the delay at each retry.
+    :param backoff_max: upper bound of a single delay in seconds.
+    :param jitter: randomize the delays to avoid synchronized retries.
+    :param deadline: total time in seconds a call may spend, including
+                     back offs. A retry which would end after it is not
+                     attempted. None means no deadline.
+    :param retry_statuses: HTTP status codes of responses to retry.
+    :param retry_exceptions: exception classes to retry.
+    :param respect_retry_after: honor the Retry-After response header.
+    :param sleep: function used to wait, ``time.sleep`` by default. The
+                  asyncio client always waits with ``asyncio.sleep``.
+    """
+
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_factor=2.0,
+                 backoff_max=30.0, jitter=True, deadline=None,
+                 retry_statuses=DEFAULT_RETRY_STATUSES,
+                 retry_exceptions=DEFAULT_RETRY_EXCEPTIONS,
+                 respect_retry_after=True, sleep=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_exceptions = tuple(retry_exceptions)
+        self.respect_retry_after = respect_retry_after
+        self.sleep = sleep or time.sleep
+        self.stats = RetryStats()
+
+    @classmethod
+    def fixed(cls, max_retries, interval):
+        """Policy retrying connection failures after a constant interval."""
+        return cls(max_retries=max_retries, backoff_base=interval,
+                   backoff_factor=1, backoff_max=interval, jitter=False,
+                   retry_statuses=(), respect_retry_after=False)
+
+    def is_retryable(self, exc):
+        if isinstance(exc, self.retry_exceptions):
+            return True
+        return (isinstance(exc, exceptions.NeutronClientException) and
+                exc.status_code in self.retry_statuses)
+
+    def compute_backoff(self, retry):
+        delay = min(self.backoff_max,
+                    self.backoff_base * self.backoff_factor ** retry)
+        if self.jitter:
+            # NOTE: this is not used for any security purpose.
+            delay = random.uniform(0, delay)  # nosec
+        return delay
+
+    def start(self):
+        """Return the state tracking the attempts of a single call."""
+        self.stats.add(calls=1, attempts=1)
+        return RetryState(self)
+
+
+class RetryState(object):
+    """Attempts of one call made under a :class:`RetryPolicy`."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.retries = 0
+        self.started_at = time.monotonic()
+
+    @property
+    def attempts(self):
+        return self.retries + 1
+
+    def next_delay(self, exc):
+        """Return the delay before retrying after exc, or None to give up."""
+        policy = self.policy
+        if not policy.is_retryable(exc):
+            return None
+        if self.retries >= policy.max_retries:
+            policy.stats.add(exhausted=1)
+            return None
+        delay = None
+        if (policy.respect_retry_after or
+                isinstance(exc, exceptions.EndpointCircuitOpen)):
+            # Retrying before an open circuit breaker lets requests through
+            # again would only fail immediately.
+            delay = getattr(exc, 'retry_after', None)
+            if delay is not None:
+                delay = min(delay, policy.backoff_max)
+        if delay is None:
+            delay = policy.compute_backoff(self.retries)
+        if policy.deadline is not None:
+            elapsed = time.monotonic() - self.started_at
+            if elapsed + delay > policy.deadline:
+                policy.stats.add(exhausted=1)
+                return None
+        self.retries += 1
+        policy.stats.add(attempts=1, retries=1, backoff_time=delay)
+        return delay
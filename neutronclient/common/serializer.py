@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import codecs
+import json
+
 from oslo_serialization import jsonutils
 
 from neutronclient._i18n import _
@@ -74,6 +77,111 @@ class JSONDeserializer(TextDeserializer):
         return {'body': self._from_json(datastring)}
 
 
+class JSONCollectionDecoder(object):
+    """Incrementally decode a ``{"<collection>": [...], ...}`` document.
+
+    Iterating over the decoder yields the resources of the collection array
+    one at a time while the body is read from ``chunks`` (an iterable of
+    bytes or str). Once the iteration is over, the other top level members
+    of the document (e.g. ``<collection>_links``) are available in
+    ``extra``. Only the resource being decoded and the unread part of the
+    current chunk are kept in memory.
+    """
+
+    _WHITESPACE = ' \t\n\r'
+
+    def __init__(self, chunks, collection):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._scanner = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self.collection = collection
+        self.extra = {}
+
+    def _read(self):
+        if self._eof:
+            return False
+        # Drop the consumed part of the buffer before growing it.
+        self._buf = self._buf[self._pos:]
+        self._pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                self._buf += chunk
+                return True
+        self._buf += self._decoder.decode(b'', final=True)
+        self._eof = True
+        return True
+
+    def _malformed(self):
+        msg = _("Cannot understand JSON")
+        raise exception.MalformedResponseBody(reason=msg)
+
+    def _next_char(self):
+        """Skip whitespaces and return the next character (or '')."""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in self._WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._read():
+                return ''
+
+    def _expect(self, chars):
+        char = self._next_char()
+        if char not in chars or not char:
+            self._malformed()
+        self._pos += 1
+        return char
+
+    def _value(self):
+        self._next_char()
+        while True:
+            try:
+                value, end = self._scanner.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if not self._read():
+                    self._malformed()
+                continue
+            # A value ending with the buffer (e.g. a number) may continue
+            # in the next chunk.
+            if end == len(self._buf) and not self._eof:
+                self._read()
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self):
+        self._expect('{')
+        if self._next_char() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                self._malformed()
+            self._expect(':')
+            if key == self.collection and self._next_char() == '[':
+                self._pos += 1
+                if self._next_char() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                self.extra[key] = self._value()
+            if self._expect(',}') == '}':
+                return
+
+
 # NOTE(maru): this class is duplicated from neutron.wsgi
 class Serializer(object):
     """Serializes and deserializes dictionaries to certain MIME types."""
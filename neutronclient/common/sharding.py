@@ -0,0 +1,94 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Helpers splitting a collection scan into shards and merging them back."""
+
+import functools
+import heapq
+
+
+def as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def sort_spec(params):
+    """Return the [(key, descending)] sort requested by list params."""
+    keys = as_list(params.get('sort_key'))
+    dirs = as_list(params.get('sort_dir'))
+    return [(key, i < len(dirs) and dirs[i] == 'desc')
+            for i, key in enumerate(keys)]
+
+
+@functools.total_ordering
+class SortKey(object):
+    """Orders resources like the server does for a sort specification.
+
+    None sorts before any value, as with NULL values in MySQL.
+    """
+
+    __slots__ = ('values', 'spec')
+
+    def __init__(self, resource, spec):
+        self.values = [resource.get(key) for key, _desc in spec]
+        self.spec = spec
+
+    def __eq__(self, other):
+        return self.values == other.values
+
+    def __lt__(self, other):
+        for (_key, desc), a, b in zip(self.spec, self.values, other.values):
+            if a == b:
+                continue
+            if a is None or b is None:
+                less = a is None
+            else:
+                less = a < b
+            return less != desc
+        return False
+
+
+def boundaries(ids, shards):
+    """Split sorted ids in shards ranges of about the same size.
+
+    Returns the (start, stop) indexes into ids of every range.
+    """
+    shards = max(1, min(shards, len(ids)))
+    starts = sorted(set(len(ids) * i // shards for i in range(shards)))
+    return list(zip(starts, starts[1:] + [len(ids)]))
+
+
+def merge(results, spec=None):
+    """Merge lists of resources, each sorted according to spec."""
+    if not spec:
+        for resources in results:
+            for resource in resources:
+                yield resource
+        return
+    for resource in heapq.merge(*results,
+                                key=lambda r: SortKey(r, spec)):
+        yield resource
+
+
+def unique_by_id(resources):
+    """Drop the resources whose id was already seen."""
+    seen = set()
+    for resource in resources:
+        resource_id = resource.get('id')
+        if resource_id is not None:
+            if resource_id in seen:
+                continue
+            seen.add(resource_id)
+        yield resource
@@ -0,0 +1,108 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Coalescing of identical concurrent requests.
+
+While a request is in flight, threads issuing the same request wait for it
+instead of sending their own and get a deep copy of its result (or the
+same exception), so that callers can never see each other's changes.
+"""
+
+import copy
+import threading
+
+
+def make_key(method, path, params=None, headers=None):
+    """Build the key identifying identical requests.
+
+    The order of the parameters is irrelevant, the order of the values of a
+    repeated parameter is kept as it is meaningful (e.g. ``sort_key``).
+    """
+    def _normalize(mapping):
+        items = []
+        for name, value in (mapping or {}).items():
+            if isinstance(value, (list, tuple)):
+                value = tuple(str(v) for v in value)
+            else:
+                value = str(value)
+            items.append((str(name), value))
+        return tuple(sorted(items))
+
+    return (method, path, _normalize(params), _normalize(headers))
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Thread safe group of in flight requests keyed by :func:`make_key`.
+
+    ``calls`` counts the requests made through the group, ``executed`` the
+    ones actually sent and ``shared`` the ones saved by waiting for an
+    identical request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """Return func(*args, **kwargs), shared with concurrent callers."""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result=result)
+        return result
+
+    def _finish(self, key, call, result=None, error=None):
+        with self._lock:
+            del self._calls[key]
+            waiters = call.waiters
+        if waiters:
+            # Snapshot the result before the leader's caller may change it.
+            call.result = copy.deepcopy(result)
+            call.error = error
+        call.done.set()
+
+    def to_dict(self):
+        with self._lock:
+            return {'calls': self.calls, 'executed': self.executed,
+                    'shared': self.shared}
@@ -0,0 +1,222 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Nested trace spans of the work done by the client.
+
+:func:`span` times a block of code as a span nested in the span in
+progress in the thread, such as the pages fetched by a list or the
+deserialization of each response. Spans are sent to osprofiler when it is
+initialized, and to the exporter set with :func:`set_exporter`.
+:func:`context` and :func:`attach` carry the span in progress over to
+worker threads. :class:`FileExporter` appends each completed trace to a
+local file as a line of OpenTelemetry (OTLP) JSON, which the
+OpenTelemetry collector reads with its ``otlpjsonfile`` receiver. Without
+osprofiler nor exporter, a span costs a function call.
+"""
+
+import contextlib
+import logging
+import os
+import threading
+import time
+
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+
+osprofiler_profiler = importutils.try_import('osprofiler.profiler')
+
+_logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'python-neutronclient'
+# Values of the OTLP enums.
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_ERROR = 2
+
+_exporter = None
+_local = threading.local()
+_null = contextlib.nullcontext()
+
+
+def set_exporter(exporter):
+    """Send the spans of the completed traces to exporter, None to stop.
+
+    The exporter is an object with an ``export(spans)`` method called with
+    the :class:`Span` list of each trace once its root span ends.
+    """
+    global _exporter
+    _exporter = exporter
+
+
+def get_exporter():
+    return _exporter
+
+
+def _profiler_active():
+    return (osprofiler_profiler is not None and
+            osprofiler_profiler.get() is not None)
+
+
+def span(name, **attributes):
+    """Return a context manager timing a span named name."""
+    if _exporter is None and not _profiler_active():
+        return _null
+    return _span(name, attributes)
+
+
+def current():
+    """Return the span in progress in this thread, if any."""
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+def context():
+    """Return the context of the span in progress, None without one.
+
+    Given to :func:`attach` in another thread, it nests the spans of that
+    thread under the span in progress here, in the same trace.
+    """
+    stack = getattr(_local, 'stack', None)
+    if not stack:
+        return None
+    return stack[-1], _local.finished
+
+
+@contextlib.contextmanager
+def attach(span_context):
+    """Nest the spans of this thread under the span of span_context."""
+    if span_context is None:
+        yield
+        return
+    saved = (getattr(_local, 'stack', None),
+             getattr(_local, 'finished', None))
+    parent, finished = span_context
+    # The spans ended here join the list of the trace, exported with it
+    # by the thread of its root span.
+    _local.stack = [parent]
+    _local.finished = finished
+    try:
+        yield
+    finally:
+        _local.stack, _local.finished = saved
+
+
+class Span(object):
+    """A timed operation, part of the trace of its root span."""
+
+    __slots__ = ('name', 'attributes', 'trace_id', 'span_id', 'parent_id',
+                 'start_ns', 'end_ns', 'error')
+
+    def __init__(self, name, attributes, parent=None):
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    @property
+    def duration(self):
+        """Duration in seconds, None while in progress."""
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def to_otlp(self):
+        """Return the span in the OTLP JSON encoding."""
+        data = {'traceId': self.trace_id,
+                'spanId': self.span_id,
+                'name': self.name,
+                'kind': SPAN_KIND_INTERNAL,
+                'startTimeUnixNano': str(self.start_ns),
+                'endTimeUnixNano': str(self.end_ns),
+                'attributes': [{'key': key, 'value': _otlp_value(value)}
+                               for key, value in self.attributes.items()],
+                'status': {}}
+        if self.parent_id:
+            data['parentSpanId'] = self.parent_id
+        if self.error:
+            data['status'] = {'code': STATUS_CODE_ERROR,
+                              'message': self.error}
+        return data
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        # int64 values are strings in the JSON encoding of protobuf.
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+@contextlib.contextmanager
+def _span(name, attributes):
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+        _local.finished = []
+    current_span = Span(name, attributes, stack[-1] if stack else None)
+    stack.append(current_span)
+    try:
+        with contextlib.ExitStack() as profiled:
+            if _profiler_active():
+                profiled.enter_context(osprofiler_profiler.Trace(
+                    name, info=dict(attributes)))
+            yield current_span
+    except BaseException as e:
+        current_span.error = '%s: %s' % (type(e).__name__, e)
+        raise
+    finally:
+        current_span.end_ns = time.time_ns()
+        stack.pop()
+        _local.finished.append(current_span)
+        if not stack:
+            finished, _local.finished = _local.finished, []
+            exporter = _exporter
+            if exporter is not None:
+                try:
+                    exporter.export(finished)
+                except Exception:
+                    _logger.exception('Failed to export the spans of %s',
+                                      name)
+
+
+class FileExporter(object):
+    """Appends each trace to a file as a line of OTLP JSON.
+
+    Thread safe. Lines are written with a single ``write`` call to a file
+    opened in append mode, so that several processes can share the file.
+    """
+
+    def __init__(self, path, service_name=SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        line = jsonutils.dumps({'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name',
+                 'value': {'stringValue': self.service_name}}]},
+            'scopeSpans': [{
+                'scope': {'name': 'neutronclient'},
+                'spans': [s.to_otlp() for s in spans]}]}]})
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
@@ -189,7 +189,10 @@ def http_log_req(_logger, args, kwargs):
         string_parts.append(header)
 
     if 'body' in kwargs and kwargs['body']:
-        string_parts.append(" -d '%s'" % (kwargs['body']))
+        body = kwargs['body']
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', 'replace')
+        string_parts.append(" -d '%s'" % body)
     req = encodeutils.safe_encode("".join(string_parts))
     _logger.debug("REQ: %s", req)
 
@@ -197,6 +200,8 @@ def http_log_req(_logger, args, kwargs):
 def http_log_resp(_logger, resp, body):
     if not _logger.isEnabledFor(logging.DEBUG):
         return
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
     _logger.debug("RESP: %(code)s %(headers)s %(body)s",
                   {'code': resp.status_code,
                    'headers': resp.headers,
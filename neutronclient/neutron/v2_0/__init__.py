@@ -16,8 +16,10 @@
 
 import abc
 import argparse
+from concurrent import futures
 import functools
 import logging
+import time
 
 from cliff import command
 from cliff import lister
@@ -26,6 +28,7 @@ from oslo_serialization import jsonutils
 
 from neutronclient._i18n import _
 from neutronclient.common import exceptions
+from neutronclient.common import tracing
 from neutronclient.common import utils
 
 HYPHEN_OPTS = ['tags_any', 'not_tags', 'not_tags_any']
@@ -58,6 +61,13 @@ def find_resourceid_by_name_or_id(client, resource, name_or_id,
                                        parent_id, fields='id')['id']
 
 
+def find_resources_by_names_or_ids(client, resource, names_or_ids,
+                                   project_id=None, cmd_resource=None,
+                                   parent_id=None, fields=None):
+    return client.find_resources(resource, names_or_ids, project_id,
+                                 cmd_resource, parent_id, fields)
+
+
 def add_show_list_common_argument(parser):
     parser.add_argument(
         '-D', '--show-details',
@@ -82,12 +92,19 @@ def add_show_list_common_argument(parser):
         default=[])
 
 
+def page_size(value):
+    if value == 'auto':
+        return value
+    return int(value)
+
+
 def add_pagination_argument(parser):
     parser.add_argument(
         '-P', '--page-size',
-        dest='page_size', metavar='SIZE', type=int,
+        dest='page_size', metavar='SIZE', type=page_size,
         help=_("Specify retrieve unit of each request, then split one request "
-               "to several requests."),
+               "to several requests. 'auto' adapts the size of each page "
+               "to the time and size of the previous ones."),
         default=None)
 
 
@@ -480,6 +497,15 @@ class UpdateCommand(NeutronCommand):
         return
 
 
+def _delete_error(func, *args):
+    """Call func, returning the error of a resource which cannot be found."""
+    try:
+        func(*args)
+    except (exceptions.NotFound, exceptions.NeutronClientNoUniqueMatch) as e:
+        return e
+    return None
+
+
 class DeleteCommand(NeutronCommand):
     """Delete a given resource."""
 
@@ -500,6 +526,12 @@ class DeleteCommand(NeutronCommand):
             'id', metavar=self.resource.upper(),
             nargs='+' if self.bulk_delete else 1,
             help=help_str % self.help_resource)
+        if self.bulk_delete:
+            parser.add_argument(
+                '--concurrency',
+                metavar='N', type=int, default=1,
+                help=_('Number of %s resolved and deleted at the same '
+                       'time (default: 1).') % self.help_resource)
         self.add_known_arguments(parser)
         return parser
 
@@ -510,7 +542,8 @@ class DeleteCommand(NeutronCommand):
                               "delete_%s" % self.cmd_resource)
 
         if self.bulk_delete:
-            self._bulk_delete(obj_deleter, neutron_client, parsed_args.id)
+            self._bulk_delete(obj_deleter, neutron_client, parsed_args.id,
+                              getattr(parsed_args, 'concurrency', 1))
         else:
             self.delete_item(obj_deleter, neutron_client, parsed_args.id)
             print((_('Deleted %(resource)s: %(id)s')
@@ -519,23 +552,41 @@ class DeleteCommand(NeutronCommand):
                   file=self.app.stdout)
         return
 
-    def _bulk_delete(self, obj_deleter, neutron_client, parsed_args_ids):
+    def _bulk_delete(self, obj_deleter, neutron_client, parsed_args_ids,
+                     concurrency=1):
         successful_delete = []
         non_existent = []
         multiple_ids = []
-        for item_id in parsed_args_ids:
-            try:
-                self.delete_item(obj_deleter, neutron_client, item_id)
+        started = time.monotonic()
+        if concurrency > 1:
+            errors = self._concurrent_delete(obj_deleter, neutron_client,
+                                             parsed_args_ids, concurrency)
+        else:
+            errors = (_delete_error(self.delete_item, obj_deleter,
+                                    neutron_client, item_id)
+                      for item_id in parsed_args_ids)
+        for item_id, error in zip(parsed_args_ids, errors):
+            if error is None:
                 successful_delete.append(item_id)
-            except exceptions.NotFound:
+            elif isinstance(error, exceptions.NotFound):
                 non_existent.append(item_id)
-            except exceptions.NeutronClientNoUniqueMatch:
+            else:
                 multiple_ids.append(item_id)
         if successful_delete:
             print((_('Deleted %(resource)s(s): %(id)s'))
                   % {'id': ", ".join(successful_delete),
                      'resource': self.cmd_resource},
                   file=self.app.stdout)
+        if concurrency > 1:
+            elapsed = time.monotonic() - started
+            print((_('Deleted %(count)d of %(total)d %(resource)s(s) in '
+                     '%(elapsed).2f seconds (%(rate).1f/s).')
+                   % {'count': len(successful_delete),
+                      'total': len(parsed_args_ids),
+                      'resource': self.cmd_resource,
+                      'elapsed': elapsed,
+                      'rate': len(successful_delete) / max(elapsed, 1e-6)}),
+                  file=self.app.stdout)
         if non_existent or multiple_ids:
             err_msgs = []
             if non_existent:
@@ -551,21 +602,58 @@ class DeleteCommand(NeutronCommand):
                                   'id': ", ".join(multiple_ids)}))
             raise exceptions.NeutronCLIError(message='\n'.join(err_msgs))
 
-    def delete_item(self, obj_deleter, neutron_client, item_id):
-        if self.allow_names:
-            params = {'cmd_resource': self.cmd_resource,
-                      'parent_id': self.parent_id}
-            _id = find_resourceid_by_name_or_id(neutron_client,
-                                                self.resource,
-                                                item_id,
-                                                **params)
-        else:
-            _id = item_id
+    def _concurrent_delete(self, obj_deleter, neutron_client, item_ids,
+                           concurrency):
+        """Resolve the names in batches, then delete in parallel.
 
+        Returns the NotFound or NeutronClientNoUniqueMatch error of each
+        item, None when it was deleted.
+        """
+        ids, errors = self.resolve_ids(neutron_client, item_ids)
+        with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            errors.update(zip(ids, executor.map(
+                functools.partial(_delete_error, self.delete_id,
+                                  obj_deleter),
+                ids.values())))
+        return [errors[item_id] for item_id in item_ids]
+
+    def resolve_ids(self, neutron_client, item_ids):
+        """Return the {item: id} resolved and the {item: error} of others."""
+        if not self.allow_names:
+            return dict((item_id, item_id) for item_id in item_ids), {}
+        errors = {}
+        try:
+            found = find_resources_by_names_or_ids(
+                neutron_client, self.resource, item_ids,
+                cmd_resource=self.cmd_resource, parent_id=self.parent_id,
+                fields='id')
+        except exceptions.UnresolvedResources as e:
+            found = e.found
+            for item_id in e.missing:
+                errors[item_id] = exceptions.NotFound()
+            for item_id in e.ambiguous:
+                errors[item_id] = exceptions.NeutronClientNoUniqueMatch(
+                    resource=self.resource, name=item_id)
+        return dict((k, v['id']) for k, v in found.items()), errors
+
+    def resolve_id(self, neutron_client, item_id):
+        if not self.allow_names:
+            return item_id
+        params = {'cmd_resource': self.cmd_resource,
+                  'parent_id': self.parent_id}
+        return find_resourceid_by_name_or_id(neutron_client,
+                                             self.resource,
+                                             item_id,
+                                             **params)
+
+    def delete_id(self, obj_deleter, _id):
         if self.parent_id:
             obj_deleter(_id, self.parent_id)
         else:
             obj_deleter(_id)
+
+    def delete_item(self, obj_deleter, neutron_client, item_id):
+        self.delete_id(obj_deleter, self.resolve_id(neutron_client, item_id))
         return
 
 
@@ -684,7 +772,9 @@ class ListCommand(NeutronCommand, lister.Lister):
         search_opts.update(_extra_values)
         if self.pagination_support:
             page_size = parsed_args.page_size
-            if page_size:
+            if page_size == 'auto':
+                search_opts.update({'adaptive_page_size': True})
+            elif page_size:
                 search_opts.update({'limit': page_size})
         if self.sorting_support:
             keys = parsed_args.sort_key
@@ -765,10 +855,17 @@ class ListCommand(NeutronCommand, lister.Lister):
         return 'admin' in auth_ref.role_names
 
     def take_action(self, parsed_args):
-        self.set_extra_attrs(parsed_args)
-        data = self.retrieve_list(parsed_args)
-        self.extend_list(data, parsed_args)
-        return self.setup_columns(data, parsed_args)
+        with tracing.span('neutronclient.command.list',
+                          command=self.__class__.__name__,
+                          resource=self.resource):
+            self.set_extra_attrs(parsed_args)
+            with tracing.span('neutronclient.command.retrieve_list'):
+                data = self.retrieve_list(parsed_args)
+            with tracing.span('neutronclient.command.extend_list',
+                              count=len(data)):
+                self.extend_list(data, parsed_args)
+            with tracing.span('neutronclient.command.setup_columns'):
+                return self.setup_columns(data, parsed_args)
 
 
 class ShowCommand(NeutronCommand, show.ShowOne):
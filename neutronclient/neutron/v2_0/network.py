@@ -97,7 +97,9 @@ class ListNetwork(neutronV20.ListCommand):
         search_opts = {'fields': ['id', 'cidr']}
         if self.pagination_support:
             page_size = parsed_args.page_size
-            if page_size:
+            if page_size == 'auto':
+                search_opts.update({'adaptive_page_size': True})
+            elif page_size:
                 search_opts.update({'limit': page_size})
         subnet_ids = []
         for n in data:
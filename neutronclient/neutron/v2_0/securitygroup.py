@@ -223,7 +223,9 @@ class ListSecurityGroupRule(neutronV20.ListCommand):
         neutron_client = self.get_client()
         search_opts = {'fields': ['id', 'name']}
         if self.pagination_support:
-            if page_size:
+            if page_size == 'auto':
+                search_opts.update({'adaptive_page_size': True})
+            elif page_size:
                 search_opts.update({'limit': page_size})
         sec_group_ids = set()
         for rule in data:
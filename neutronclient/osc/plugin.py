@@ -14,6 +14,7 @@
 """OpenStackClient plugin for advanced Networking service."""
 
 import logging
+import os
 
 # TODO(rtheis/amotoki): Add functional test infrastructure for OSC
 # plugin commands.
@@ -21,6 +22,9 @@ import logging
 
 from osc_lib import utils
 
+from neutronclient.common import response_cache
+from neutronclient.common import tracing
+
 LOG = logging.getLogger(__name__)
 
 DEFAULT_API_VERSION = '2.0'
@@ -42,6 +46,7 @@ def make_client(instance):
         instance._api_version[API_NAME],
         API_VERSIONS)
     LOG.debug('Instantiating neutron client: %s', neutron_client)
+    _configure_tracing()
 
     # TODO(amotoki): Check the following arguments need to be passed
     # to neutronclient class. Check keystoneauth code.
@@ -51,10 +56,43 @@ def make_client(instance):
                             region_name=instance.region_name,
                             endpoint_type=instance.interface,
                             insecure=not instance.verify,
-                            ca_cert=instance.cacert)
+                            ca_cert=instance.cacert,
+                            response_cache=_make_response_cache())
     return client
 
 
+def _make_response_cache():
+    """Share GET responses between commands when asked to.
+
+    NEUTRONCLIENT_RESPONSE_CACHE_TTL sets the number of seconds a response
+    is reused by the following commands run with the same token.
+    """
+    ttl = os.environ.get('NEUTRONCLIENT_RESPONSE_CACHE_TTL')
+    if not ttl:
+        return None
+    try:
+        ttl = float(ttl)
+    except ValueError:
+        LOG.warning('Ignoring NEUTRONCLIENT_RESPONSE_CACHE_TTL=%s, which is '
+                    'not a number of seconds: the response cache is '
+                    'disabled', ttl)
+        return None
+    return response_cache.ResponseCache(
+        ttl=ttl, revalidate=True,
+        directory=response_cache.default_directory())
+
+
+def _configure_tracing():
+    """Write trace spans to a file when asked to.
+
+    NEUTRONCLIENT_TRACE_FILE names a file the spans of the client are
+    appended to as OpenTelemetry JSON lines.
+    """
+    path = os.environ.get('NEUTRONCLIENT_TRACE_FILE')
+    if path and tracing.get_exporter() is None:
+        tracing.set_exporter(tracing.FileExporter(path))
+
+
 def build_option_parser(parser):
     """Hook to add global options"""
 
@@ -0,0 +1,325 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Client benchmarks against an in-process fake Neutron server.
+
+Measures the throughput of ``list_ports`` and of the pages of
+``_pagination``, the latency of ``find_resource``, bulk deletes through
+the ``port-delete`` command, the cost of the serializer and the memory
+peak of a list. The fake server is
+:mod:`neutronclient.tests.benchmarks.fake_neutron`.
+
+Results are printed and, with ``--output``, saved as JSON together with
+the commit and Python version, so that a run can be compared with a
+baseline saved from another commit::
+
+    python -m neutronclient.tests.benchmarks.bench_client \\
+        --ports 100000 --output base.json
+    git checkout my-branch
+    python -m neutronclient.tests.benchmarks.bench_client \\
+        --ports 100000 --compare base.json
+"""
+
+import argparse
+import collections
+import gc
+import io
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+from oslo_serialization import jsonutils
+
+from neutronclient.common import serializer
+from neutronclient.neutron.v2_0 import port as port_commands
+from neutronclient.tests.benchmarks import fake_neutron
+from neutronclient.v2_0 import client
+
+BENCHMARKS = collections.OrderedDict()
+# Suffix of the metrics where a higher value is better, the others being
+# durations, sizes and counts.
+HIGHER_IS_BETTER = 'per_second'
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+class Context(object):
+    """Parameters of a run and the fake server the benchmarks use."""
+
+    def __init__(self, url, server, ports, page_size, repeat, lookups,
+                 deletes, concurrency):
+        self.url = url
+        self.server = server
+        self.ports = ports
+        self.page_size = page_size
+        self.repeat = repeat
+        self.lookups = lookups
+        self.deletes = deletes
+        self.concurrency = concurrency
+
+    def client(self):
+        return client.Client(token='token', endpoint_url=self.url)
+
+    def timed(self, func):
+        """Run func repeat times, returning the times and its last result."""
+        times = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - started)
+        return times, result
+
+
+def _summary(times, count=None, unit='per_second'):
+    summary = {'best': min(times), 'median': statistics.median(times)}
+    if count:
+        summary[unit] = count / min(times)
+    return summary
+
+
+@benchmark
+def list_ports(ctx):
+    neutron = ctx.client()
+    requests = ctx.server.requests
+    times, ports = ctx.timed(lambda: neutron.list_ports(
+        limit=ctx.page_size)['ports'])
+    summary = _summary(times, len(ports))
+    summary['requests'] = (ctx.server.requests - requests) // ctx.repeat
+    return summary
+
+
+@benchmark
+def list_ports_compact(ctx):
+    neutron = ctx.client()
+    times, ports = ctx.timed(lambda: neutron.list_ports(
+        limit=ctx.page_size, compact=True)['ports'])
+    return _summary(times, len(ports))
+
+
+@benchmark
+def list_ports_filtered(ctx):
+    neutron = ctx.client()
+
+    def filtered():
+        return neutron.list_ports(
+            limit=ctx.page_size, status='DOWN',
+            fields=['id', 'name', 'network_id'], sort_key=['name'],
+            sort_dir=['desc'])['ports']
+
+    # Let the server build its indexes of the status and names first.
+    neutron.list_ports(limit=1, status='DOWN', sort_key=['name'],
+                       sort_dir=['desc'])
+    times, ports = ctx.timed(filtered)
+    return _summary(times, len(ports))
+
+
+@benchmark
+def pagination(ctx):
+    neutron = ctx.client()
+
+    def pages():
+        count = 0
+        for page in neutron.list_ports(retrieve_all=False,
+                                       limit=ctx.page_size):
+            count += 1
+        return count
+
+    times, count = ctx.timed(pages)
+    return _summary(times, count)
+
+
+@benchmark
+def find_resource(ctx):
+    neutron = ctx.client()
+    count = min(ctx.lookups, ctx.ports)
+    step = max(ctx.ports // count, 1)
+    names = ['port-%d' % (i * step) for i in range(count)]
+    ids = [fake_neutron.make_id(i * step) for i in range(count)]
+    # Let the server build its index of the names first.
+    neutron.find_resource('port', names[0], fields='id')
+    by_name, _ = ctx.timed(lambda: [
+        neutron.find_resource('port', n, fields='id') for n in names])
+    by_id, _ = ctx.timed(lambda: [
+        neutron.find_resource('port', i, fields='id') for i in ids])
+    return {'by_name_latency': min(by_name) / count,
+            'by_id_latency': min(by_id) / count,
+            'by_name_per_second': count / min(by_name),
+            'by_id_per_second': count / min(by_id)}
+
+
+@benchmark
+def bulk_delete(ctx):
+    result = {}
+    dataset = ctx.server.datasets['ports']
+    count = min(ctx.deletes, ctx.ports)
+    ids = [fake_neutron.make_id(i) for i in range(count)]
+    for concurrency in sorted(set([1, ctx.concurrency])):
+        times = []
+        for _ in range(ctx.repeat):
+            app = types.SimpleNamespace(
+                stdout=io.StringIO(),
+                client_manager=types.SimpleNamespace(neutron=ctx.client()))
+            cmd = port_commands.DeletePort(app, None)
+            parsed_args = cmd.get_parser('port-delete').parse_args(
+                ids + ['--concurrency', str(concurrency)])
+            started = time.perf_counter()
+            cmd.take_action(parsed_args)
+            times.append(time.perf_counter() - started)
+            # Restore the deleted ports for the next runs.
+            dataset.restore()
+        result['concurrency_%d_per_second' % concurrency] = (
+            count / min(times))
+    return result
+
+
+@benchmark
+def serializer_cost(ctx):
+    body = {'ports': [fake_neutron.port(i) for i in range(ctx.page_size)]}
+    data = serializer.Serializer().serialize(body)
+    size = len(data.encode('utf-8')) / 1e6
+    encode, _ = ctx.timed(lambda: serializer.Serializer().serialize(body))
+    decode, _ = ctx.timed(lambda: serializer.Serializer().deserialize(data))
+    return {'serialize_best': min(encode),
+            'deserialize_best': min(decode),
+            'serialize_mb_per_second': size / min(encode),
+            'deserialize_mb_per_second': size / min(decode)}
+
+
+def _peak(func):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+
+@benchmark
+def memory_peak(ctx):
+    neutron = ctx.client()
+    dicts, _ = _peak(lambda: neutron.list_ports(limit=ctx.page_size))
+    compact, _ = _peak(lambda: neutron.list_ports(limit=ctx.page_size,
+                                                  compact=True))
+    return {'dicts_peak_bytes': dicts, 'compact_peak_bytes': compact}
+
+
+def commit_id():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names=None, ports=10000, page_size=1000, repeat=3, latency=0.0,
+        lookups=100, deletes=200, concurrency=8):
+    """Run the benchmarks, returning the results as a dict."""
+    names = names or list(BENCHMARKS)
+    server = fake_neutron.FakeNeutron.build(ports=ports, latency=latency,
+                                            max_limit=page_size)
+    url = server.start()
+    params = {'ports': ports, 'page_size': page_size, 'repeat': repeat,
+              'latency': latency, 'lookups': lookups, 'deletes': deletes,
+              'concurrency': concurrency}
+    try:
+        ctx = Context(url, server, ports, page_size, repeat, lookups,
+                      deletes, concurrency)
+        results = collections.OrderedDict(
+            (name, BENCHMARKS[name](ctx)) for name in names)
+    finally:
+        server.stop()
+    return {'commit': commit_id(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.time(),
+            'params': params,
+            'results': results}
+
+
+def compare(baseline, current):
+    """Return the (benchmark, metric, baseline, current, change) rows.
+
+    change is the relative improvement: positive when current is better.
+    """
+    rows = []
+    for name, metrics in current['results'].items():
+        base_metrics = baseline['results'].get(name, {})
+        for metric, value in metrics.items():
+            base = base_metrics.get(metric)
+            if not base or not value:
+                continue
+            if metric.endswith(HIGHER_IS_BETTER):
+                change = value / base - 1
+            else:
+                change = base / value - 1
+            rows.append((name, metric, base, value, change))
+    return rows
+
+
+def _format(value):
+    return '%.6g' % value if isinstance(value, float) else str(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help='Benchmarks to run among: %s (default: all).'
+                        % ', '.join(BENCHMARKS))
+    parser.add_argument('--ports', type=int, default=10000,
+                        help='Ports in the dataset, up to 1000000.')
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds added by the server to each request.')
+    parser.add_argument('--lookups', type=int, default=100)
+    parser.add_argument('--deletes', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--output', help='Save the results to this file.')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Compare with results saved by --output.')
+    args = parser.parse_args(argv)
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error('unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+
+    report = run(args.benchmarks, ports=args.ports,
+                 page_size=args.page_size, repeat=args.repeat,
+                 latency=args.latency, lookups=args.lookups,
+                 deletes=args.deletes, concurrency=args.concurrency)
+    for name, metrics in report['results'].items():
+        print(name)
+        for metric, value in metrics.items():
+            print('    %-28s %s' % (metric, _format(value)))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(jsonutils.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = jsonutils.loads(f.read())
+        print('\ncompared with %s (commit %s)' % (args.compare,
+                                                  baseline.get('commit')))
+        for name, metric, base, value, change in compare(baseline, report):
+            print('    %-20s %-28s %+7.1f%%' % (name, metric, change * 100))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
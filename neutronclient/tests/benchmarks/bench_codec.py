@@ -0,0 +1,125 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Microbenchmark of the JSON codecs on a list of ports.
+
+Compares encoding and decoding a ``{"ports": [...]}`` body with the
+codecs of :mod:`neutronclient.common.codec` to the former path, which
+decoded ``requests.Response.text`` and parsed it with a new
+:class:`neutronclient.common.serializer.Serializer` per call::
+
+    python -m neutronclient.tests.benchmarks.bench_codec --ports 10000 \\
+        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import collections
+import platform
+import sys
+import time
+
+from oslo_serialization import jsonutils
+import requests
+
+from neutronclient.common import codec
+from neutronclient.common import serializer
+from neutronclient.tests.benchmarks import bench_client
+from neutronclient.tests.benchmarks import fake_neutron
+
+
+def _best(func, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def _response(content):
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.headers['Content-Type'] = 'application/json'
+    resp._content = content
+    return resp
+
+
+def _serializer_decode(content):
+    # The body was copied into a str before being parsed.
+    return serializer.Serializer().deserialize(_response(content).text)
+
+
+def _summary(encode, decode, size):
+    return {'encode_best': encode, 'decode_best': decode,
+            'encode_mb_per_second': size / encode,
+            'decode_mb_per_second': size / decode}
+
+
+def run(ports=10000, repeat=5):
+    """Run the benchmark, returning the results as a dict."""
+    body = {'ports': [fake_neutron.port(i) for i in range(ports)]}
+    content = jsonutils.dump_as_bytes(body)
+    size = len(content) / 1e6
+    results = collections.OrderedDict()
+    results['serializer'] = _summary(
+        _best(lambda: serializer.Serializer().serialize(body), repeat),
+        _best(lambda: _serializer_decode(content), repeat), size)
+    for name in sorted(codec.CODECS):
+        if name == codec.OrjsonCodec.name and codec.orjson is None:
+            continue
+        c = codec.get_codec(name)
+        results[name] = _summary(_best(lambda: c.dumps(body), repeat),
+                                 _best(lambda: c.loads(content), repeat),
+                                 size)
+    return {'commit': bench_client.commit_id(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.time(),
+            'params': {'ports': ports, 'repeat': repeat,
+                       'body_bytes': len(content)},
+            'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ports', type=int, default=10000,
+                        help='Ports in the body.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Save the results to this file.')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Compare with results saved by --output.')
+    args = parser.parse_args(argv)
+
+    report = run(ports=args.ports, repeat=args.repeat)
+    print('%d bytes' % report['params']['body_bytes'])
+    print('%-12s %12s %12s %10s %10s' % (
+        'codec', 'encode ms', 'decode ms', 'enc MB/s', 'dec MB/s'))
+    for name, result in report['results'].items():
+        print('%-12s %12.2f %12.2f %10.1f %10.1f' % (
+            name, result['encode_best'] * 1000, result['decode_best'] * 1000,
+            result['encode_mb_per_second'], result['decode_mb_per_second']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(jsonutils.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = jsonutils.loads(f.read())
+        print('\ncompared with %s (commit %s)' % (args.compare,
+                                                  baseline.get('commit')))
+        for name, metric, base, value, change in bench_client.compare(
+                baseline, report):
+            print('    %-12s %-24s %+7.1f%%' % (name, metric, change * 100))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
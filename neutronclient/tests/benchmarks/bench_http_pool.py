@@ -0,0 +1,152 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Per-request latency of HTTPClient with and without connection reuse.
+
+A local HTTPS server with a self-signed certificate stands in for
+neutron-server. Each mode issues the same number of GET requests; the
+"pooled" mode keeps connections (and their TLS sessions) alive while the
+"unpooled" mode forces a new TCP connection and TLS handshake per request.
+
+Usage::
+
+    python -m neutronclient.tests.benchmarks.bench_http_pool [-n 500]
+"""
+
+import argparse
+import datetime
+import http.server
+import ipaddress
+import os
+import ssl
+import statistics
+import tempfile
+import threading
+import time
+
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+
+from neutronclient import client
+
+x509 = importutils.try_import('cryptography.x509')
+
+BODY = jsonutils.dump_as_bytes({'networks': [{'id': 'net-1'}]})
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, avoid delayed ACK stalls on
+    # kept alive connections.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def _write_self_signed_cert(directory):
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives import serialization
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(x509.NameOID.COMMON_NAME,
+                                         'localhost')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=5))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName(
+                [x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]),
+                critical=False)
+            .sign(key, hashes.SHA256()))
+    cert_file = os.path.join(directory, 'cert.pem')
+    key_file = os.path.join(directory, 'key.pem')
+    with open(cert_file, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_file, 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM,
+                                  serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_file, key_file
+
+
+def start_server(directory):
+    """Start the stand-in server, returning (server, url, ca_cert)."""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    scheme, ca_cert = 'http', None
+    if x509:
+        ca_cert, key_file = _write_self_signed_cert(directory)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(ca_cert, key_file)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = 'https'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = '%s://127.0.0.1:%d' % (scheme, server.server_address[1])
+    return server, url, ca_cert
+
+
+def run(url, ca_cert, requests, keepalive):
+    http = client.HTTPClient(token='token', endpoint_url=url,
+                             ca_cert=ca_cert, keepalive=keepalive)
+    samples = []
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            http.do_request('/v2.0/networks', 'GET')
+            samples.append(time.perf_counter() - start)
+    finally:
+        http.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        server, url, ca_cert = start_server(directory)
+        try:
+            results = {
+                'unpooled': run(url, ca_cert, args.requests, False),
+                'pooled': run(url, ca_cert, args.requests, True),
+            }
+        finally:
+            server.shutdown()
+
+    print('server: %s, requests per mode: %d' % (url, args.requests))
+    for mode, samples in results.items():
+        samples.sort()
+        print('%-9s mean %7.3f ms  p50 %7.3f ms  p99 %7.3f ms' % (
+            mode, statistics.mean(samples) * 1000,
+            samples[len(samples) // 2] * 1000,
+            samples[int(len(samples) * 0.99) - 1] * 1000))
+
+
+if __name__ == '__main__':
+    main()
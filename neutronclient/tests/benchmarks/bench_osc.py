@@ -0,0 +1,602 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmarks of the OSC plugin commands against large datasets.
+
+Each scenario runs the ``get_parser`` and ``take_action`` of a command of
+the ``openstack.neutronclient.v2`` entry points, and formats the returned
+rows as cliff would. The commands talk to a fake ``client_manager`` whose
+``network`` proxy serves openstacksdk resources from memory, e.g. 10k
+firewall rules, 5k port pairs and BGP VPNs with thousands of
+associations, so that the time measured is the one of the commands
+themselves. Each scenario reports its wall time, the number of calls made
+to the API and the peak of the memory allocated.
+
+Usage::
+
+    python -m neutronclient.tests.benchmarks.bench_osc [--scale 0.1] \\
+        [--output results.json] [--compare baseline.json] [SCENARIO...]
+
+The results are compared the same way as those of
+:mod:`neutronclient.tests.benchmarks.bench_client`.
+"""
+
+import argparse
+import collections
+import gc
+import importlib
+import inspect
+import io
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+
+from openstack import resource as sdk_resource
+from oslo_serialization import jsonutils
+
+from neutronclient.tests.benchmarks import bench_client
+
+ID_FORMAT = '%08x-0000-4000-8000-%012x'
+# Full size of the datasets, multiplied by --scale.
+SIZES = {
+    'firewall_rule': 10000,
+    'firewall_policy': 200,
+    'firewall_group': 500,
+    'sfc_port_pair': 5000,
+    'sfc_port_pair_group': 500,
+    'sfc_port_chain': 200,
+    'sfc_flow_classifier': 2000,
+    'sfc_service_graph': 50,
+    'bgpvpn': 1000,
+    'bgpvpn_network_association': 5000,
+    'bgpvpn_router_association': 2000,
+    'bgpvpn_port_association': 2000,
+    'bgp_speaker': 100,
+    'bgp_peer': 1000,
+    'advertised_route': 10000,
+    'agent': 50,
+    'vpn_ike_policy': 500,
+    'vpn_ipsec_policy': 500,
+    'vpn_service': 1000,
+    'vpn_endpoint_group': 2000,
+    'vpn_ipsec_site_connection': 5000,
+    'network_log': 2000,
+}
+# Resources listed under a parent resource, they all belong to the first
+# one.
+PARENTS = {
+    'bgpvpn_network_association': 'bgpvpn',
+    'bgpvpn_router_association': 'bgpvpn',
+    'bgpvpn_port_association': 'bgpvpn',
+}
+
+
+def make_id(kind, index):
+    return ID_FORMAT % (sum(map(ord, kind)), index)
+
+
+def _ids(kind, start, count, sizes):
+    return [make_id(kind, (start + i) % max(sizes[kind], 1))
+            for i in range(count)]
+
+
+def _attributes(kind, i, sizes):
+    """Return the attributes of the resource i of kind."""
+    common = {'id': make_id(kind, i), 'name': '%s-%d' % (kind, i),
+              'description': 'benchmark %s %d' % (kind, i),
+              'project_id': 'project-%d' % (i % 20),
+              'tenant_id': 'project-%d' % (i % 20)}
+    if kind == 'firewall_rule':
+        common.update(
+            protocol=('tcp', 'udp', 'icmp', None)[i % 4],
+            action=('allow', 'deny', 'reject')[i % 3],
+            ip_version=4, enabled=True, shared=False,
+            source_ip_address='10.%d.%d.0/24' % (i // 256 % 256, i % 256),
+            destination_ip_address=None,
+            source_port=None, destination_port=str(1024 + i % 4096),
+            firewall_policy_id=make_id('firewall_policy',
+                                       i % sizes['firewall_policy']))
+    elif kind == 'firewall_policy':
+        per_policy = sizes['firewall_rule'] // max(sizes[kind], 1)
+        common.update(audited=False, shared=False,
+                      firewall_rules=_ids('firewall_rule', i * per_policy,
+                                          per_policy, sizes))
+    elif kind == 'firewall_group':
+        common.update(
+            ingress_firewall_policy_id=make_id('firewall_policy', i % 7),
+            egress_firewall_policy_id=make_id('firewall_policy', i % 5),
+            ports=['port-%d-%d' % (i, p) for p in range(4)],
+            status='ACTIVE', admin_state_up=True, shared=False)
+    elif kind == 'sfc_port_pair':
+        common.update(ingress='port-in-%d' % i, egress='port-out-%d' % i,
+                      service_function_parameters={'correlation': None,
+                                                   'weight': 1})
+    elif kind == 'sfc_port_pair_group':
+        per_group = sizes['sfc_port_pair'] // max(sizes[kind], 1)
+        common.update(port_pairs=_ids('sfc_port_pair', i * per_group,
+                                      per_group, sizes),
+                      port_pair_group_parameters={'lb_fields': []},
+                      tap_enabled=False)
+    elif kind == 'sfc_port_chain':
+        common.update(port_pair_groups=_ids('sfc_port_pair_group', i * 3, 3,
+                                            sizes),
+                      flow_classifiers=_ids('sfc_flow_classifier', i * 10,
+                                            10, sizes),
+                      chain_parameters={'correlation': 'mpls',
+                                        'symmetric': False},
+                      chain_id=i)
+    elif kind == 'sfc_flow_classifier':
+        common.update(protocol='tcp', ethertype='IPv4',
+                      source_port_range_min=1, source_port_range_max=65535,
+                      destination_port_range_min=80,
+                      destination_port_range_max=80,
+                      source_ip_prefix='10.0.%d.0/24' % (i % 256),
+                      logical_source_port='port-%d' % i,
+                      l7_parameters={})
+    elif kind == 'sfc_service_graph':
+        chains = _ids('sfc_port_chain', i * 4, 4, sizes)
+        common.update(port_chains=dict((a, [b])
+                                       for a, b in zip(chains, chains[1:])))
+    elif kind == 'bgpvpn':
+        common.update(
+            type='l3', route_targets=['64512:%d' % i],
+            import_targets=['64512:%d' % (i + 1)], export_targets=[],
+            route_distinguishers=['64512:%d' % (i + 2)],
+            networks=_ids('network', i * 5, 5, {'network': 100000}),
+            routers=_ids('router', i * 2, 2, {'router': 100000}),
+            ports=[], vni=1000 + i, local_pref=100)
+    elif kind == 'bgpvpn_network_association':
+        common.update(network_id=make_id('network', i))
+    elif kind == 'bgpvpn_router_association':
+        common.update(router_id=make_id('router', i),
+                      advertise_extra_routes=True)
+    elif kind == 'bgpvpn_port_association':
+        common.update(port_id=make_id('port', i), advertise_fixed_ips=True,
+                      routes=[{'type': 'prefix', 'local_pref': 100,
+                               'prefix': '10.%d.0.0/16' % (i % 256)}])
+    elif kind == 'bgp_speaker':
+        common.update(local_as=64512 + i, ip_version=4,
+                      advertise_floating_ip_host_routes=True,
+                      advertise_tenant_networks=True,
+                      peers=_ids('bgp_peer', i * 10, 10, sizes),
+                      networks=_ids('network', i, 1, {'network': 100000}))
+    elif kind == 'bgp_peer':
+        common.update(peer_ip='192.0.%d.%d' % (i // 256 % 256, i % 256),
+                      remote_as=65000 + i % 500, auth_type='none')
+    elif kind == 'agent':
+        common.update(agent_type='BGP dynamic routing agent',
+                      host='host-%d' % i, binary='neutron-bgp-dragent',
+                      availability_zone='nova', is_alive=True,
+                      is_admin_state_up=True)
+    elif kind.startswith('vpn_'):
+        common.update(_vpn_attributes(kind, i, sizes))
+    return common
+
+
+def _vpn_attributes(kind, i, sizes):
+    if kind in ('vpn_ike_policy', 'vpn_ipsec_policy'):
+        return {'auth_algorithm': 'sha256', 'encryption_algorithm': 'aes-256',
+                'pfs': 'group14', 'lifetime': {'units': 'seconds',
+                                               'value': 3600},
+                'phase1_negotiation_mode': 'main', 'ike_version': 'v2',
+                'transform_protocol': 'esp', 'encapsulation_mode': 'tunnel'}
+    if kind == 'vpn_service':
+        return {'router_id': make_id('router', i), 'subnet_id': None,
+                'status': 'ACTIVE', 'admin_state_up': True,
+                'external_v4_ip': '203.0.113.%d' % (i % 256)}
+    if kind == 'vpn_endpoint_group':
+        return {'type': 'cidr',
+                'endpoints': ['10.%d.%d.0/24' % (i % 256, e)
+                              for e in range(8)]}
+    return {'peer_address': '198.51.100.%d' % (i % 256),
+            'peer_id': '198.51.100.%d' % (i % 256),
+            'local_id': '', 'route_mode': 'static', 'mtu': 1500,
+            'initiator': 'bi-directional', 'auth_mode': 'psk',
+            'psk': 'secret', 'dpd': {'action': 'hold', 'interval': 30,
+                                     'timeout': 120},
+            'status': 'ACTIVE', 'admin_state_up': True,
+            'vpnservice_id': make_id('vpn_service', i % sizes['vpn_service']),
+            'ikepolicy_id': make_id('vpn_ike_policy', i % 10),
+            'ipsecpolicy_id': make_id('vpn_ipsec_policy', i % 10),
+            'local_ep_group_id': make_id('vpn_endpoint_group', 2 * i),
+            'peer_ep_group_id': make_id('vpn_endpoint_group', 2 * i + 1)}
+
+
+def _sdk_class(kind):
+    """Return the openstacksdk resource class of kind, None if it has none."""
+    try:
+        module = importlib.import_module('openstack.network.v2.' + kind)
+    except ImportError:
+        return None
+    for value in vars(module).values():
+        if (inspect.isclass(value) and value.__module__ == module.__name__
+                and issubclass(value, sdk_resource.Resource)):
+            return value
+    return None
+
+
+def _plural(kind):
+    return kind[:-1] + 'ies' if kind.endswith('y') else kind + 's'
+
+
+class FakeNetworkProxy(object):
+    """In-memory stand-in of the openstacksdk network proxy.
+
+    Serves the usual ``<plural>``, ``find_``, ``get_``, ``create_``,
+    ``update_`` and ``delete_`` methods of every kind of resource of
+    datasets, and counts the calls made to each method. Methods without a
+    generic behavior are given by handlers.
+    """
+
+    def __init__(self, datasets, handlers=None):
+        self.datasets = datasets
+        self.handlers = handlers or {}
+        self.calls = collections.Counter()
+        self._plurals = dict((_plural(k), k) for k in datasets)
+        self._indexes = {}
+
+    def _index(self, kind):
+        index = self._indexes.get(kind)
+        if index is None:
+            index = {}
+            for resource in self._all(kind):
+                index.setdefault(resource['name'], resource)
+                index[resource['id']] = resource
+            self._indexes[kind] = index
+        return index
+
+    def _all(self, kind):
+        resources = self.datasets[kind]
+        if isinstance(resources, dict):
+            return [r for children in resources.values() for r in children]
+        return resources
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = self._method(name)
+        if method is None:
+            raise AttributeError(name)
+
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return method(*args, **kwargs)
+
+        setattr(self, name, counted)
+        return counted
+
+    def _method(self, name):
+        if name in self.handlers:
+            return self.handlers[name]
+        if name in self._plurals:
+            kind = self._plurals[name]
+            return lambda *args, **filters: self._list(kind, args, filters)
+        action, _, kind = name.partition('_')
+        if kind not in self.datasets:
+            return None
+        if action == 'find':
+            return lambda name_or_id, *args, **kwargs: self._index(
+                kind).get(name_or_id)
+        if action == 'get':
+            return lambda *args: self._index(kind)[_id_of(args[-1])]
+        if action == 'create':
+            return lambda *args, **attrs: self._resource(
+                kind, dict(attrs, id=make_id(kind, 0)))
+        if action == 'update':
+            return lambda *args, **attrs: self._resource(
+                kind, dict(self._index(kind)[_id_of(args[-1])], **attrs))
+        if action == 'delete':
+            return lambda *args, **kwargs: None
+        return None
+
+    def _list(self, kind, parent_ids, filters):
+        resources = self.datasets[kind]
+        if isinstance(resources, dict):
+            resources = resources.get(_id_of(parent_ids[0]), [])
+        for resource in resources:
+            if all(getattr(resource, key, value) == value
+                   for key, value in filters.items()):
+                yield resource
+
+    @staticmethod
+    def _resource(kind, attrs):
+        cls = _sdk_class(kind)
+        return cls.existing(**attrs) if cls else attrs
+
+
+def _id_of(value):
+    return value['id'] if isinstance(value, (dict, sdk_resource.Resource)) \
+        else value
+
+
+class FakeNeutronClient(object):
+    """Stand-in of the neutronclient Client used by the logging commands."""
+
+    def __init__(self, network_logs, loggable_resources):
+        self.network_logs = network_logs
+        self.loggable_resources = loggable_resources
+        self.calls = collections.Counter()
+
+    def _count(self, name):
+        self.calls[name] += 1
+
+    def list_network_logs(self, **params):
+        self._count('list_network_logs')
+        return {'logs': [dict(log) for log in self.network_logs]}
+
+    def list_network_loggable_resources(self, **params):
+        self._count('list_network_loggable_resources')
+        return {'loggable_resources': self.loggable_resources}
+
+    def find_resource(self, resource, name_or_id, *args, **kwargs):
+        self._count('find_resource')
+        for log in self.network_logs:
+            if name_or_id in (log['id'], log['name']):
+                return log
+        return {'id': name_or_id}
+
+    def show_network_log(self, log_id, **params):
+        self._count('show_network_log')
+        return {'log': self.find_resource('log', log_id)}
+
+
+def build_datasets(scale=1.0):
+    """Return the datasets of every kind, scaled."""
+    sizes = dict((kind, max(int(size * scale), 1))
+                 for kind, size in SIZES.items())
+    datasets = {}
+    for kind in SIZES:
+        if kind in ('advertised_route', 'network_log'):
+            continue
+        cls = _sdk_class(kind)
+        resources = []
+        for i in range(sizes[kind]):
+            attrs = _attributes(kind, i, sizes)
+            resources.append(cls.existing(**attrs) if cls else attrs)
+        if kind in PARENTS:
+            resources = {make_id(PARENTS[kind], 0): resources}
+        datasets[kind] = resources
+    routes = [{'destination': '10.%d.%d.0/24' % (i // 256 % 256, i % 256),
+               'next_hop': '192.0.2.%d' % (i % 256)}
+              for i in range(sizes['advertised_route'])]
+    logs = [dict(_attributes('network_log', i, sizes),
+                 resource_type='security_group', enabled=True,
+                 event=('ALL', 'ACCEPT', 'DROP')[i % 3],
+                 resource_id=make_id('security_group', i % 100),
+                 target_id=None)
+            for i in range(sizes['network_log'])]
+    loggable = [{'type': t} for t in ('security_group', 'firewall_group')]
+    return datasets, routes, logs, loggable
+
+
+class Scenario(object):
+    """A command of an entry point run with the given arguments."""
+
+    def __init__(self, name, command, argv):
+        self.name = name
+        self.command = command
+        self.argv = argv
+
+    def load(self):
+        module, _, cls = self.command.partition(':')
+        return getattr(importlib.import_module(module), cls)
+
+
+def scenarios(scale=1.0):
+    """Return the scenarios, the names of resources scaled like datasets."""
+    many = max(int(100 * scale), 1)
+    fw = 'neutronclient.osc.v2.fwaas.'
+    sfc = 'neutronclient.osc.v2.sfc.'
+    bgpvpn = 'neutronclient.osc.v2.networking_bgpvpn.'
+    routing = 'neutronclient.osc.v2.dynamic_routing.'
+    vpn = 'neutronclient.osc.v2.vpnaas.'
+    logging = 'neutronclient.osc.v2.logging.network_log:'
+    # The associations all belong to the first BGP VPN.
+    bgpvpn_id = make_id('bgpvpn', 0)
+    return [
+        Scenario('firewall_group_rule_list',
+                 fw + 'firewallrule:ListFirewallRule', ['--long']),
+        Scenario('firewall_group_rule_show',
+                 fw + 'firewallrule:ShowFirewallRule',
+                 ['firewall_rule-%d' % (many - 1)]),
+        Scenario('firewall_group_rule_create',
+                 fw + 'firewallrule:CreateFirewallRule',
+                 ['--protocol', 'tcp', '--action', 'allow',
+                  '--destination-port', '443', '--name', 'https']),
+        Scenario('firewall_group_rule_delete',
+                 fw + 'firewallrule:DeleteFirewallRule',
+                 ['firewall_rule-%d' % i for i in range(many)]),
+        Scenario('firewall_group_policy_list',
+                 fw + 'firewallpolicy:ListFirewallPolicy', ['--long']),
+        Scenario('firewall_group_policy_show',
+                 fw + 'firewallpolicy:ShowFirewallPolicy',
+                 ['firewall_policy-0']),
+        Scenario('firewall_group_policy_add_rule',
+                 fw + 'firewallpolicy:FirewallPolicyInsertRule',
+                 ['firewall_policy-0', 'firewall_rule-1',
+                  '--insert-after', 'firewall_rule-0']),
+        Scenario('firewall_group_list',
+                 fw + 'firewallgroup:ListFirewallGroup', ['--long']),
+        Scenario('sfc_port_pair_list',
+                 sfc + 'sfc_port_pair:ListSfcPortPair', ['--long']),
+        Scenario('sfc_port_pair_group_list',
+                 sfc + 'sfc_port_pair_group:ListSfcPortPairGroup',
+                 ['--long']),
+        Scenario('sfc_port_pair_group_create',
+                 sfc + 'sfc_port_pair_group:CreateSfcPortPairGroup',
+                 sum([['--port-pair', 'sfc_port_pair-%d' % i]
+                      for i in range(many)], []) + ['group']),
+        Scenario('sfc_port_chain_list',
+                 sfc + 'sfc_port_chain:ListSfcPortChain', ['--long']),
+        Scenario('sfc_flow_classifier_list',
+                 sfc + 'sfc_flow_classifier:ListSfcFlowClassifier',
+                 ['--long']),
+        Scenario('sfc_service_graph_list',
+                 sfc + 'sfc_service_graph:ListSfcServiceGraph', ['--long']),
+        Scenario('bgpvpn_list', bgpvpn + 'bgpvpn:ListBgpvpn', ['--long']),
+        Scenario('bgpvpn_show', bgpvpn + 'bgpvpn:ShowBgpvpn',
+                 [bgpvpn_id]),
+        Scenario('bgpvpn_network_association_list',
+                 bgpvpn + 'network_association:ListBgpvpnNetAssoc',
+                 ['--long', bgpvpn_id]),
+        Scenario('bgpvpn_router_association_list',
+                 bgpvpn + 'router_association:ListBgpvpnRouterAssoc',
+                 ['--long', bgpvpn_id]),
+        Scenario('bgpvpn_port_association_list',
+                 bgpvpn + 'port_association:ListBgpvpnPortAssoc',
+                 ['--long', bgpvpn_id]),
+        Scenario('bgp_speaker_list', routing + 'bgp_speaker:ListBgpSpeaker',
+                 []),
+        Scenario('bgp_speaker_list_advertised_routes',
+                 routing + 'bgp_speaker:ListRoutesAdvertisedBySpeaker',
+                 ['bgp_speaker-0']),
+        Scenario('bgp_peer_list', routing + 'bgp_peer:ListBgpPeer', []),
+        Scenario('bgp_dragent_list', routing + 'bgp_dragent:ListDRAgent',
+                 []),
+        Scenario('vpn_ike_policy_list', vpn + 'ikepolicy:ListIKEPolicy',
+                 ['--long']),
+        Scenario('vpn_ipsec_policy_list',
+                 vpn + 'ipsecpolicy:ListIPsecPolicy', ['--long']),
+        Scenario('vpn_service_list', vpn + 'vpnservice:ListVPNService',
+                 ['--long']),
+        Scenario('vpn_endpoint_group_list',
+                 vpn + 'endpoint_group:ListEndpointGroup', ['--long']),
+        Scenario('vpn_ipsec_site_connection_list',
+                 vpn + 'ipsec_site_connection:ListIPsecSiteConnection',
+                 ['--long']),
+        Scenario('network_log_list', logging + 'ListNetworkLog', ['--long']),
+        Scenario('network_loggable_resources_list',
+                 logging + 'ListLoggableResource', []),
+    ]
+
+
+def _consume(result):
+    """Format the result of take_action as cliff would."""
+    if not isinstance(result, tuple):
+        return result
+    columns, data = result
+    rows = list(data)
+    if rows and not isinstance(rows[0], (tuple, list)):
+        # A ShowOne gives the values of a single resource.
+        return columns, rows
+    return columns, [tuple(row) for row in rows]
+
+
+class Harness(object):
+    """Runs scenarios against fake clients sharing the same datasets."""
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.datasets, routes, logs, loggable = build_datasets(scale)
+        self.network = FakeNetworkProxy(self.datasets, handlers={
+            'get_advertised_routes_of_speaker': lambda speaker_id: {
+                'advertised_routes': routes},
+            'insert_rule_into_policy': lambda policy_id, body: body,
+        })
+        self.neutronclient = FakeNeutronClient(logs, loggable)
+        self.app = types.SimpleNamespace(
+            stdout=io.StringIO(), stdin=io.StringIO(),
+            stderr=io.StringIO(),
+            client_manager=types.SimpleNamespace(
+                network=self.network, neutronclient=self.neutronclient,
+                identity=None, session=None))
+
+    def run_once(self, scenario):
+        command = scenario.load()(self.app, None)
+        parser = command.get_parser(scenario.name)
+        parsed_args = parser.parse_args(scenario.argv)
+        result = _consume(command.take_action(parsed_args))
+        self.app.stdout.seek(0)
+        self.app.stdout.truncate()
+        return result
+
+    def _calls(self):
+        return sum(self.network.calls.values()) + sum(
+            self.neutronclient.calls.values())
+
+    def measure(self, scenario, repeat=3):
+        calls = self._calls()
+        self.run_once(scenario)
+        api_calls = self._calls() - calls
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            self.run_once(scenario)
+            times.append(time.perf_counter() - started)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            self.run_once(scenario)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {'best': min(times), 'median': statistics.median(times),
+                'api_calls': api_calls, 'peak_bytes': peak}
+
+
+def run(names=None, scale=1.0, repeat=3):
+    """Run the scenarios, returning the results as a dict."""
+    selected = [s for s in scenarios(scale)
+                if not names or s.name in names]
+    harness = Harness(scale)
+    results = collections.OrderedDict(
+        (s.name, harness.measure(s, repeat)) for s in selected)
+    return {'commit': bench_client.commit_id(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.time(),
+            'params': {'scale': scale, 'repeat': repeat},
+            'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', metavar='SCENARIO',
+                        help='Scenarios to run among: %s (default: all).'
+                        % ', '.join(s.name for s in scenarios()))
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Factor applied to the size of the datasets.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Save the results to this file.')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='Compare with results saved by --output.')
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(s.name for s in scenarios())
+    if unknown:
+        parser.error('unknown scenarios: %s' % ', '.join(sorted(unknown)))
+
+    report = run(args.scenarios, scale=args.scale, repeat=args.repeat)
+    print('%-36s %10s %10s %9s %12s' % (
+        'scenario', 'best ms', 'median ms', 'api calls', 'peak KiB'))
+    for name, result in report['results'].items():
+        print('%-36s %10.2f %10.2f %9d %12.1f' % (
+            name, result['best'] * 1000, result['median'] * 1000,
+            result['api_calls'], result['peak_bytes'] / 1024.0))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(jsonutils.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = jsonutils.loads(f.read())
+        print('\ncompared with %s (commit %s)' % (args.compare,
+                                                  baseline.get('commit')))
+        for name, metric, base, value, change in bench_client.compare(
+                baseline, report):
+            print('    %-36s %-12s %+7.1f%%' % (name, metric, change * 100))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
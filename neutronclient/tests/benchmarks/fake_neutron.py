@@ -0,0 +1,353 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process fake of the Neutron API for the benchmarks.
+
+A WSGI application serving synthetic collections the way neutron-server
+does: ``limit``/``marker`` pagination with ``next`` links, multi-valued
+filters, ``fields``, ``sort_key``/``sort_dir``, show, bulk create and
+delete, with an optional latency added to every request.
+
+The resources of a :class:`Dataset` are built from their index when
+requested rather than stored, so that datasets of a million ports only
+keep the indexes of the filtered and sorted fields in memory. Ids are
+UUIDs ordered like the indexes, which makes the default sort by id and
+the lookups by id direct.
+"""
+
+import socketserver
+import threading
+import time
+import urllib.parse as urlparse
+from wsgiref import simple_server
+
+from oslo_serialization import jsonutils
+
+ID_FORMAT = '00000000-0000-4000-8000-%012d'
+DEFAULT_LIMIT = 1000
+
+
+def make_id(index):
+    return ID_FORMAT % index
+
+
+def id_index(resource_id):
+    try:
+        index = int(resource_id[-12:])
+    except (TypeError, ValueError):
+        return None
+    return index if make_id(index) == resource_id else None
+
+
+def network(i):
+    return {'id': make_id(i),
+            'name': 'network-%d' % i,
+            'project_id': 'project-%d' % (i % 50),
+            'tenant_id': 'project-%d' % (i % 50),
+            'admin_state_up': True,
+            'status': 'ACTIVE',
+            'shared': False,
+            'mtu': 1450,
+            'subnets': [],
+            'tags': [],
+            'revision_number': 1}
+
+
+def port(i):
+    return {'id': make_id(i),
+            'name': 'port-%d' % i,
+            'network_id': make_id(i % 100),
+            'project_id': 'project-%d' % (i % 50),
+            'tenant_id': 'project-%d' % (i % 50),
+            'device_owner': 'compute:nova' if i % 4 else 'network:dhcp',
+            'device_id': 'device-%d' % (i // 2),
+            'admin_state_up': True,
+            'status': 'ACTIVE' if i % 10 else 'DOWN',
+            'mac_address': 'fa:16:3e:%02x:%02x:%02x' % (
+                (i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff),
+            'binding:vnic_type': 'normal',
+            'security_groups': [make_id(i % 50)],
+            'fixed_ips': [{'subnet_id': make_id(i % 100),
+                           'ip_address': '10.%d.%d.%d' % (
+                               (i >> 16) & 0xff, (i >> 8) & 0xff,
+                               i & 0xff)}],
+            'tags': [],
+            'revision_number': 1}
+
+
+class Dataset(object):
+    """Synthetic collection of count resources built by factory(index)."""
+
+    def __init__(self, factory, count):
+        self.factory = factory
+        self.count = count
+        self.deleted = set()
+        self.created = []
+        self._lock = threading.Lock()
+        self._values = {}
+        self._orders = {}
+
+    def __len__(self):
+        return self.count + len(self.created) - len(self.deleted)
+
+    def get(self, index):
+        if index in self.deleted:
+            return None
+        if index < self.count:
+            return self.factory(index)
+        if index - self.count < len(self.created):
+            return self.created[index - self.count]
+        return None
+
+    def create(self, resource):
+        with self._lock:
+            index = self.count + len(self.created)
+            resource = dict(self.factory(index), **resource)
+            resource['id'] = make_id(index)
+            self.created.append(resource)
+            self._values.clear()
+            self._orders.clear()
+        return resource
+
+    def delete(self, index):
+        with self._lock:
+            if self.get(index) is None:
+                return False
+            self.deleted.add(index)
+            return True
+
+    def restore(self):
+        """Bring back the deleted resources."""
+        with self._lock:
+            self.deleted.clear()
+
+    def _indexes(self):
+        return range(self.count + len(self.created))
+
+    def _value_index(self, field):
+        """Return the indexes of the resources by value of field."""
+        with self._lock:
+            values = self._values.get(field)
+            if values is None:
+                values = {}
+                for i in self._indexes():
+                    resource = self.get(i) or self.factory(i)
+                    value = resource.get(field)
+                    if isinstance(value, (list, dict)):
+                        value = jsonutils.dumps(value)
+                    values.setdefault(str(value), []).append(i)
+                self._values[field] = values
+            return values
+
+    def _order(self, keys, dirs):
+        """Return the indexes sorted by keys and their positions."""
+        with self._lock:
+            order = self._orders.get((keys, dirs))
+        if order is not None:
+            return order
+        indexes = list(self._indexes())
+        for key, direction in reversed(list(zip(keys, dirs))):
+            if key == 'id':
+                sort_key = None
+            else:
+                values = [(self.get(i) or self.factory(i)).get(key)
+                          for i in self._indexes()]
+                sort_key = values.__getitem__
+            indexes.sort(key=sort_key, reverse=direction == 'desc')
+        order = (indexes, dict((i, p) for p, i in enumerate(indexes)))
+        with self._lock:
+            self._orders[(keys, dirs)] = order
+        return order
+
+    def query(self, filters, keys=(), dirs=(), marker=None,
+              limit=None):
+        """Return a page of resources and whether more follow it."""
+        candidates = None
+        for field, values in filters.items():
+            if field == 'id':
+                matching = set(id_index(v) for v in values)
+                matching.discard(None)
+            else:
+                index = self._value_index(field)
+                matching = set()
+                for value in values:
+                    matching.update(index.get(value, ()))
+            candidates = (matching if candidates is None
+                          else candidates & matching)
+        keys = tuple(keys) or ('id',)
+        dirs = tuple(dirs) + ('asc',) * (len(keys) - len(dirs))
+        if keys == ('id',) and dirs == ('asc',):
+            start = 0
+            if marker is not None:
+                marker_index = id_index(marker)
+                start = 0 if marker_index is None else marker_index + 1
+            indexes = (range(start, self.count + len(self.created))
+                       if candidates is None else
+                       sorted(i for i in candidates if i >= start))
+        else:
+            order, positions = self._order(keys, dirs)
+            start = 0
+            if marker is not None:
+                start = positions.get(id_index(marker), -1) + 1
+            indexes = (order[start:] if candidates is None else
+                       [i for i in order[start:] if i in candidates])
+        page = []
+        for i in indexes:
+            resource = self.get(i)
+            if resource is None:
+                continue
+            if limit and len(page) == limit:
+                return page, True
+            page.append(resource)
+        return page, False
+
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn,
+                           simple_server.WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(simple_server.WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class FakeNeutron(object):
+    """WSGI application serving datasets under /v2.0/<collection>.
+
+    :param datasets: dict of the :class:`Dataset` by collection name.
+    :param latency: seconds added to every request.
+    :param max_limit: page size when the request sets no ``limit``.
+    """
+
+    SINGULARS = {'ports': 'port', 'networks': 'network'}
+
+    def __init__(self, datasets, latency=0.0, max_limit=DEFAULT_LIMIT):
+        self.datasets = datasets
+        self.latency = latency
+        self.max_limit = max_limit
+        self.requests = 0
+        self._server = None
+
+    @classmethod
+    def build(cls, ports=10000, networks=100, **kwargs):
+        return cls({'ports': Dataset(port, ports),
+                    'networks': Dataset(network, networks)}, **kwargs)
+
+    def __call__(self, environ, start_response):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        parts = environ['PATH_INFO'].strip('/').split('/')
+        method = environ['REQUEST_METHOD']
+        if (len(parts) not in (2, 3) or parts[0] != 'v2.0' or
+                parts[1] not in self.datasets):
+            return self._reply(start_response, 404,
+                               self._error('HTTPNotFound', 'Not found'))
+        collection = parts[1]
+        dataset = self.datasets[collection]
+        query = urlparse.parse_qs(environ.get('QUERY_STRING', ''))
+        if len(parts) == 3:
+            index = id_index(parts[2])
+            resource = dataset.get(index) if index is not None else None
+            if resource is None:
+                return self._reply(start_response, 404, self._error(
+                    '%sNotFound' % self.SINGULARS[collection].title(),
+                    '%s %s could not be found' % (collection, parts[2])))
+            if method == 'DELETE':
+                dataset.delete(index)
+                return self._reply(start_response, 204, None)
+            return self._reply(start_response, 200, {
+                self.SINGULARS[collection]: self._project(
+                    resource, query.get('fields'))})
+        if method == 'POST':
+            return self._create(start_response, environ, collection, dataset)
+        return self._list(start_response, environ, collection, dataset,
+                          query)
+
+    def _list(self, start_response, environ, collection, dataset, query):
+        fields = query.pop('fields', None)
+        keys = query.pop('sort_key', ())
+        dirs = query.pop('sort_dir', ())
+        marker = query.pop('marker', [None])[0]
+        limit = int(query.pop('limit', [self.max_limit])[0] or
+                    self.max_limit)
+        limit = min(limit, self.max_limit)
+        query.pop('page_reverse', None)
+        query.pop('verbose', None)
+        page, more = dataset.query(query, keys, dirs, marker, limit)
+        body = {collection: [self._project(r, fields) for r in page]}
+        if more:
+            params = dict(query, limit=limit, marker=page[-1]['id'])
+            if fields:
+                params['fields'] = fields
+            if keys:
+                params['sort_key'] = keys
+                params['sort_dir'] = dirs
+            body['%s_links' % collection] = [{
+                'rel': 'next',
+                'href': '%s?%s' % (self._url(environ, collection),
+                                   urlparse.urlencode(params, doseq=True))}]
+        return self._reply(start_response, 200, body)
+
+    def _create(self, start_response, environ, collection, dataset):
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        body = jsonutils.loads(environ['wsgi.input'].read(length))
+        singular = self.SINGULARS[collection]
+        if collection in body:
+            return self._reply(start_response, 201, {collection: [
+                dataset.create(r) for r in body[collection]]})
+        return self._reply(start_response, 201, {
+            singular: dataset.create(body[singular])})
+
+    @staticmethod
+    def _project(resource, fields):
+        if not fields:
+            return resource
+        return dict((f, resource[f]) for f in fields if f in resource)
+
+    @staticmethod
+    def _url(environ, collection):
+        return 'http://%s/v2.0/%s' % (environ['HTTP_HOST'], collection)
+
+    @staticmethod
+    def _error(error_type, message):
+        return {'NeutronError': {'type': error_type, 'message': message,
+                                 'detail': ''}}
+
+    @staticmethod
+    def _reply(start_response, status, body):
+        reasons = {200: 'OK', 201: 'Created', 204: 'No Content',
+                   404: 'Not Found'}
+        data = b'' if body is None else jsonutils.dump_as_bytes(body)
+        start_response('%d %s' % (status, reasons[status]),
+                       [('Content-Type', 'application/json'),
+                        ('Content-Length', str(len(data)))])
+        return [data]
+
+    def start(self):
+        """Serve on a local port from a daemon thread, return the URL."""
+        self._server = simple_server.make_server(
+            '127.0.0.1', 0, self, server_class=_ThreadingWSGIServer,
+            handler_class=_QuietHandler)
+        # A short poll interval makes stop() quick.
+        thread = threading.Thread(target=self._server.serve_forever,
+                                  kwargs={'poll_interval': 0.05},
+                                  daemon=True)
+        thread.start()
+        return 'http://127.0.0.1:%d' % self._server.server_port
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,255 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import asyncio
+
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import records
+from neutronclient.v2_0 import async_client
+
+web = importutils.try_import('aiohttp.web')
+
+NET_ID = '11111111-2222-3333-4444-555555555555'
+
+
+@testtools.skipUnless(web, 'aiohttp is not installed')
+class TestAsyncClient(testtools.TestCase):
+
+    def setUp(self):
+        super(TestAsyncClient, self).setUp()
+        self.requests = []
+
+    def _json(self, request, body, status=200):
+        self.requests.append(request)
+        return web.Response(text=jsonutils.dumps(body), status=status,
+                            content_type='application/json',
+                            headers={'X-OpenStack-Request-ID': 'req-%d' %
+                                     len(self.requests)})
+
+    async def _list_networks(self, request):
+        if 'id' in request.query:
+            return self._json(request, {'networks': [
+                {'id': i} for i in request.query.getall('id')]})
+        if 'name' in request.query:
+            return self._json(request, {'networks': [
+                {'id': 'id-' + name, 'name': name}
+                for name in request.query.getall('name')
+                if name != 'missing']})
+        if request.query.get('marker'):
+            return self._json(request, {'networks': [{'id': 'b'}]})
+        return self._json(request, {
+            'networks': [{'id': 'a'}],
+            'networks_links': [{'rel': 'next',
+                                'href': '/v2.0/networks?marker=a'}]})
+
+    async def _show_network(self, request):
+        if request.match_info['id'] == 'missing':
+            return self._json(
+                request, {'NeutronError': {'type': 'NetworkNotFound',
+                                           'message': 'not found',
+                                           'detail': ''}}, status=404)
+        return self._json(request,
+                          {'network': {'id': request.match_info['id']}})
+
+    async def _create_network(self, request):
+        body = await request.json()
+        networks = body.get('networks', [body.get('network')])
+        if any(n.get('name') == 'bad' for n in networks):
+            return self._json(
+                request, {'NeutronError': {'type': 'BadRequest',
+                                           'message': 'bad network',
+                                           'detail': ''}}, status=400)
+        return self._json(request, body, status=201)
+
+    async def _delete_network(self, request):
+        self.requests.append(request)
+        return web.Response(status=204)
+
+    def _run(self, coro_func):
+        async def _main():
+            app = web.Application()
+            app.router.add_get('/v2.0/networks', self._list_networks)
+            app.router.add_post('/v2.0/networks', self._create_network)
+            app.router.add_get('/v2.0/networks/{id}', self._show_network)
+            app.router.add_delete('/v2.0/networks/{id}',
+                                  self._delete_network)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            neutron = async_client.AsyncClient(
+                token='token', endpoint_url='http://127.0.0.1:%d' % port)
+            try:
+                async with neutron:
+                    return await coro_func(neutron)
+            finally:
+                await runner.cleanup()
+        return asyncio.run(_main())
+
+    def test_show_and_create(self):
+        async def _test(neutron):
+            net = await neutron.show_network('net1')
+            created = await neutron.create_network({'network': {'n': 1}})
+            return net, created
+
+        net, created = self._run(_test)
+        self.assertEqual({'network': {'id': 'net1'}}, net)
+        self.assertEqual(['req-1'], net.request_ids)
+        self.assertEqual({'network': {'n': 1}}, created)
+        self.assertEqual('token', self.requests[0].headers['X-Auth-Token'])
+
+    def test_delete(self):
+        async def _test(neutron):
+            return await neutron.delete_network('net1')
+
+        self.assertEqual((), self._run(_test))
+
+    def test_error_mapping(self):
+        async def _test(neutron):
+            return await neutron.show_network('missing')
+
+        e = self.assertRaises(exceptions.NetworkNotFoundClient,
+                              self._run, _test)
+        self.assertEqual(404, e.status_code)
+        self.assertEqual(['req-1'], e.request_ids)
+
+    def test_list_retrieve_all(self):
+        async def _test(neutron):
+            return await neutron.list_networks()
+
+        nets = self._run(_test)
+        self.assertEqual({'networks': [{'id': 'a'}, {'id': 'b'}]}, nets)
+        self.assertEqual(['req-1', 'req-2'], nets.request_ids)
+
+    def test_list_compact(self):
+        async def _test(neutron):
+            return await neutron.list_networks(compact=True, stream=False)
+
+        nets = self._run(_test)
+        self.assertEqual([{'id': 'a'}, {'id': 'b'}],
+                         [dict(n) for n in nets['networks']])
+        self.assertIsInstance(nets['networks'][0], records.Record)
+        self.assertEqual(['req-1', 'req-2'], nets.request_ids)
+        # The options are not sent as filters.
+        self.assertEqual({}, dict(self.requests[0].query))
+
+    def test_list_unsupported_options(self):
+        async def _test(neutron):
+            return neutron.list_networks(stream=True, shards=2)
+
+        e = self.assertRaises(TypeError, self._run, _test)
+        self.assertIn('stream, shards', str(e))
+        self.assertEqual([], self.requests)
+
+    def test_unsupported_options(self):
+        e = self.assertRaises(TypeError, async_client.AsyncClient,
+                              token='token', endpoint_url='http://neutron',
+                              single_flight=True, metrics=object(),
+                              prefetch=0)
+        self.assertIn('single_flight, metrics', str(e))
+
+    def test_unsupported_transport_options(self):
+        e = self.assertRaises(TypeError, async_client.AsyncClient,
+                              token='token', endpoint_url='http://neutron',
+                              compression=True, keepalive=False,
+                              auth_cache=object(), pool_block=False)
+        self.assertIn('compression, auth_cache, keepalive', str(e))
+        self.assertNotIn('pool_block', str(e))
+        async_client.AsyncClient(token='token',
+                                 endpoint_url='http://neutron',
+                                 keepalive=True, pool_maxsize=5)
+
+    def test_list_async_iterator(self):
+        async def _test(neutron):
+            pages = neutron.list_networks(retrieve_all=False)
+            return [page async for page in pages], pages.request_ids
+
+        pages, request_ids = self._run(_test)
+        self.assertEqual([[{'id': 'a'}], [{'id': 'b'}]],
+                         [p['networks'] for p in pages])
+        self.assertEqual(['req-1', 'req-2'], request_ids)
+
+    def test_find_resource(self):
+        async def _test(neutron):
+            return await neutron.find_resource('network', NET_ID)
+
+        self.assertEqual({'id': NET_ID}, self._run(_test))
+
+    def test_create_bulk(self):
+        async def _test(neutron):
+            return await neutron.create_networks_bulk(
+                [{'name': 'a'}, {'name': 'bad'}, {'name': 'b'}],
+                chunk_size=2, concurrency=2)
+
+        result = self._run(_test)
+        self.assertEqual(['a', 'b'], [n['name'] for n in result.resources])
+        self.assertEqual([1], [item.index for item in result.errors])
+        self.assertIsInstance(result.items[1].error, exceptions.BadRequest)
+        # The rejected chunk, its 2 networks alone then the last chunk.
+        self.assertEqual(4, len(self.requests))
+        self.assertEqual(4, len(result.request_ids))
+
+    def test_find_resources(self):
+        async def _test(neutron):
+            return await neutron.find_resources(
+                'network', [NET_ID, 'net1', 'missing'])
+
+        e = self.assertRaises(exceptions.UnresolvedResources,
+                              self._run, _test)
+        self.assertEqual(['missing'], e.missing)
+        self.assertEqual({NET_ID: {'id': NET_ID},
+                          'net1': {'id': 'id-net1', 'name': 'net1'}},
+                         e.found)
+        self.assertEqual(['id', 'name'],
+                         [list(r.query)[0] for r in self.requests])
+
+    def test_gather_limited(self):
+        async def _test(neutron):
+            return await async_client.gather_limited(
+                2, *[neutron.show_network('net%d' % i) for i in range(5)])
+
+        nets = self._run(_test)
+        self.assertEqual(['net%d' % i for i in range(5)],
+                         [n['network']['id'] for n in nets])
+
+    def test_connection_failed(self):
+        async def _test():
+            neutron = async_client.AsyncClient(
+                token='token', endpoint_url='http://127.0.0.1:9')
+            async with neutron:
+                await neutron.list_networks()
+
+        self.assertRaises(exceptions.ConnectionFailed, asyncio.run, _test())
+
+
+class TestGatherLimited(testtools.TestCase):
+
+    def test_concurrency_is_bounded(self):
+        running = []
+        peak = []
+
+        async def _job(i):
+            running.append(i)
+            peak.append(len(running))
+            await asyncio.sleep(0)
+            running.remove(i)
+            return i
+
+        results = asyncio.run(async_client.gather_limited(
+            3, *[_job(i) for i in range(10)]))
+        self.assertEqual(list(range(10)), results)
+        self.assertLessEqual(max(peak), 3)
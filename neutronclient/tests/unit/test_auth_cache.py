@@ -0,0 +1,185 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import os
+import stat
+import time
+
+import fixtures
+from oslo_serialization import jsonutils
+from requests_mock.contrib import fixture as mock_fixture
+import testtools
+
+from neutronclient import client
+from neutronclient.common import auth_cache
+
+AUTH_URL = 'http://keystone.test:5000/v2.0'
+END_URL = 'http://neutron.test:9696'
+
+
+def _token_body(token, expires_in=3600):
+    expires = (datetime.datetime.now(datetime.timezone.utc) +
+               datetime.timedelta(seconds=expires_in))
+    return {'access': {
+        'token': {'id': token,
+                  'expires': expires.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                  'tenant': {'id': 'project-id', 'name': 'demo'}},
+        'user': {'id': 'user-id', 'name': 'user', 'roles': []},
+        'serviceCatalog': [{
+            'type': 'network', 'name': 'neutron',
+            'endpoints': [{'region': 'RegionOne',
+                           'publicURL': END_URL}]}]}}
+
+
+class TestAuthCache(testtools.TestCase):
+
+    def setUp(self):
+        super(TestAuthCache, self).setUp()
+        self.directory = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'auth')
+        self.cache = auth_cache.AuthCache(self.directory)
+
+    def test_directory_permissions(self):
+        self.assertEqual(0o700,
+                         stat.S_IMODE(os.stat(self.directory).st_mode))
+
+    def test_set_and_get(self):
+        key = auth_cache.make_key('a', None, 'b')
+        self.cache.set(key, {'token': 'tok'})
+        entry = self.cache.get(key)
+        self.assertEqual('tok', entry['token'])
+        path = os.path.join(self.directory, key + auth_cache.SUFFIX)
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(path).st_mode))
+        self.assertEqual([], [n for n in os.listdir(self.directory)
+                              if n.startswith('.tmp-')])
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_expired_entry_is_evicted(self):
+        self.cache.set('key', {'expires_at': time.time() + 30})
+        self.assertIsNone(self.cache.get('key'))
+        self.assertNotIn('key' + auth_cache.SUFFIX,
+                         os.listdir(self.directory))
+
+    def test_purge_on_set(self):
+        self.cache.set('old', {'expires_at': time.time() - 1})
+        self.cache.set('new', {'token': 'tok'})
+        names = os.listdir(self.directory)
+        self.assertNotIn('old' + auth_cache.SUFFIX, names)
+        self.assertIn('new' + auth_cache.SUFFIX, names)
+
+    def test_purge_keeps_lock_files(self):
+        self.cache.set('old', {'expires_at': time.time() - 1})
+        self.cache.purge()
+        names = os.listdir(self.directory)
+        self.assertNotIn('old' + auth_cache.SUFFIX, names)
+        self.assertIn('old' + auth_cache.LOCK_SUFFIX, names)
+
+    def test_unsafe_permissions_are_ignored(self):
+        self.cache.set('key', {'token': 'tok'})
+        os.chmod(os.path.join(self.directory, 'key' + auth_cache.SUFFIX),
+                 0o644)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_nonblocking_lock_held(self):
+        with self.cache.lock('key') as locked:
+            self.assertTrue(locked)
+            with self.cache.lock('key', blocking=False) as other:
+                self.assertFalse(other)
+
+
+class TestHTTPClientAuthCache(testtools.TestCase):
+
+    def setUp(self):
+        super(TestHTTPClientAuthCache, self).setUp()
+        self.requests = self.useFixture(mock_fixture.Fixture())
+        self.cache = auth_cache.AuthCache(
+            self.useFixture(fixtures.TempDir()).path)
+        self.requests.get(END_URL + '/v2.0/networks', text='{}')
+
+    def _client(self, **kwargs):
+        return client.HTTPClient(username='user', password='secret',
+                                 project_name='demo', auth_url=AUTH_URL,
+                                 region_name='RegionOne',
+                                 auth_cache=self.cache, **kwargs)
+
+    def test_token_is_shared_between_clients(self):
+        tokens = self.requests.post(
+            AUTH_URL + '/tokens',
+            text=jsonutils.dumps(_token_body('tok-1')))
+
+        first = self._client()
+        first.do_request('/v2.0/networks', 'GET')
+        second = self._client()
+        second.do_request('/v2.0/networks', 'GET')
+
+        self.assertEqual(1, tokens.call_count)
+        self.assertEqual('tok-1', second.auth_token)
+        self.assertEqual(END_URL, second.endpoint_url)
+        self.assertEqual('project-id', second.auth_tenant_id)
+        self.assertEqual('tok-1',
+                         self.requests.last_request.headers['X-Auth-Token'])
+
+    def test_endpoint_override_is_not_shared(self):
+        self.requests.post(AUTH_URL + '/tokens',
+                           text=jsonutils.dumps(_token_body('tok-1')))
+        override = 'http://override.test:9696'
+        self.requests.get(override + '/v2.0/networks', text='{}')
+
+        first = self._client(endpoint_url=override)
+        first.do_request('/v2.0/networks', 'GET')
+        second = self._client()
+        second.do_request('/v2.0/networks', 'GET')
+
+        self.assertEqual(override, first.endpoint_url)
+        self.assertEqual(END_URL, second.endpoint_url)
+        self.assertEqual(END_URL + '/v2.0/networks',
+                         self.requests.last_request.url)
+
+    def test_endpoint_override_without_catalog_entry(self):
+        body = _token_body('tok-1')
+        body['access']['serviceCatalog'] = []
+        tokens = self.requests.post(AUTH_URL + '/tokens',
+                                    text=jsonutils.dumps(body))
+
+        for _ in range(2):
+            http = self._client(endpoint_url=END_URL)
+            http.do_request('/v2.0/networks', 'GET')
+            self.assertEqual(END_URL, http.endpoint_url)
+        self.assertEqual(1, tokens.call_count)
+
+    def test_rejected_token_is_not_reused(self):
+        tokens = self.requests.post(
+            AUTH_URL + '/tokens',
+            [{'text': jsonutils.dumps(_token_body('tok-1'))},
+             {'text': jsonutils.dumps(_token_body('tok-2'))}])
+        self._client().authenticate()
+
+        http = self._client(token='tok-1', endpoint_url=END_URL)
+        http.authenticate()
+        self.assertEqual('tok-2', http.auth_token)
+        self.assertEqual(2, tokens.call_count)
+
+    def test_endpoint_is_cached(self):
+        endpoints = self.requests.get(
+            AUTH_URL + '/tokens/tok/endpoints',
+            text=jsonutils.dumps({'endpoints': [
+                {'type': 'network', 'region': 'RegionOne',
+                 'publicURL': END_URL}]}))
+
+        for _ in range(2):
+            http = self._client(token='tok')
+            http.do_request('/v2.0/networks', 'GET')
+            self.assertEqual(END_URL, http.endpoint_url)
+        self.assertEqual(1, endpoints.call_count)
@@ -0,0 +1,106 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import testtools
+
+from neutronclient.tests.benchmarks import bench_client
+from neutronclient.tests.benchmarks import bench_osc
+from neutronclient.tests.benchmarks import fake_neutron
+from neutronclient.v2_0 import client
+
+
+class TestFakeNeutron(testtools.TestCase):
+
+    def setUp(self):
+        super(TestFakeNeutron, self).setUp()
+        self.server = fake_neutron.FakeNeutron.build(ports=250, networks=5,
+                                                     max_limit=100)
+        url = self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = client.Client(token='token', endpoint_url=url)
+
+    def test_pagination(self):
+        ports = self.client.list_ports()['ports']
+        self.assertEqual([fake_neutron.make_id(i) for i in range(250)],
+                         [p['id'] for p in ports])
+        self.assertEqual(3, self.server.requests)
+
+    def test_filters_fields_and_sort(self):
+        ports = self.client.list_ports(
+            limit=3, status='DOWN', network_id=[fake_neutron.make_id(0),
+                                                fake_neutron.make_id(10)],
+            fields=['name', 'status'], sort_key=['name'],
+            sort_dir=['desc'])['ports']
+        self.assertEqual(['port-210', 'port-200', 'port-110', 'port-100',
+                          'port-10', 'port-0'],
+                         [p['name'] for p in ports])
+        self.assertEqual({'name', 'status'}, set(ports[0]))
+
+    def test_find_and_delete(self):
+        port_id = self.client.find_resource('port', 'port-7',
+                                            fields='id')['id']
+        self.assertEqual(fake_neutron.make_id(7), port_id)
+        self.client.delete_port(port_id)
+        self.assertEqual(249, len(self.client.list_ports()['ports']))
+        self.server.datasets['ports'].restore()
+        self.assertEqual('port-7', self.client.show_port(port_id)[
+            'port']['name'])
+
+
+class TestBenchClient(testtools.TestCase):
+
+    def test_run_and_compare(self):
+        report = bench_client.run(ports=40, page_size=15, repeat=1,
+                                  lookups=4, deletes=4, concurrency=2)
+        self.assertEqual(list(bench_client.BENCHMARKS),
+                         list(report['results']))
+        self.assertEqual(3, report['results']['list_ports']['requests'])
+        self.assertEqual(40, report['params']['ports'])
+        baseline = {'results': {'list_ports': {'best': 2.0,
+                                               'per_second': 10.0}}}
+        current = {'results': {'list_ports': {'best': 1.0,
+                                              'per_second': 15.0}}}
+        self.assertEqual(
+            [('list_ports', 'best', 2.0, 1.0, 1.0),
+             ('list_ports', 'per_second', 10.0, 15.0, 0.5)],
+            bench_client.compare(baseline, current))
+
+
+class TestBenchOsc(testtools.TestCase):
+
+    def test_proxy_lists_and_finds(self):
+        datasets = bench_osc.build_datasets(scale=0.01)[0]
+        proxy = bench_osc.FakeNetworkProxy(datasets)
+        rules = list(proxy.firewall_rules(protocol='udp'))
+        self.assertEqual(25, len(rules))
+        self.assertEqual(bench_osc.make_id('firewall_rule', 1),
+                         proxy.find_firewall_rule('firewall_rule-1')['id'])
+        self.assertIsNone(proxy.find_firewall_rule('missing'))
+        bgpvpn_id = bench_osc.make_id('bgpvpn', 0)
+        self.assertEqual(50, len(list(
+            proxy.bgpvpn_network_associations(bgpvpn_id))))
+        self.assertEqual({'firewall_rules': 1, 'find_firewall_rule': 2,
+                          'bgpvpn_network_associations': 1},
+                         dict(proxy.calls))
+
+    def test_run(self):
+        names = ['firewall_group_rule_list', 'firewall_group_rule_delete',
+                 'network_log_list']
+        report = bench_osc.run(names, scale=0.01, repeat=1)
+        self.assertEqual(names, list(report['results']))
+        results = report['results']
+        self.assertEqual(1, results['firewall_group_rule_list']['api_calls'])
+        # A find and a delete of the single rule at this scale.
+        self.assertEqual(
+            2, results['firewall_group_rule_delete']['api_calls'])
+        self.assertGreater(
+            results['firewall_group_rule_list']['peak_bytes'], 0)
@@ -0,0 +1,142 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import itertools
+import threading
+
+from keystoneauth1 import exceptions as ksa_exc
+from keystoneauth1 import session
+from keystoneauth1 import token_endpoint
+from oslo_serialization import jsonutils
+import requests
+import testtools
+
+from neutronclient.common import bulk
+from neutronclient.common import exceptions
+from neutronclient.tests.unit import test_client
+from neutronclient.v2_0 import client
+
+
+class TestChunks(testtools.TestCase):
+
+    def test_chunks_by_count(self):
+        chunks = list(bulk.chunks('abcde', 2, None, len))
+        self.assertEqual([[(0, 'a'), (1, 'b')], [(2, 'c'), (3, 'd')],
+                          [(4, 'e')]], chunks)
+
+    def test_chunks_by_size(self):
+        sizes = [10, 10, 100, 10]
+        chunks = list(bulk.chunks(sizes, 10, 80, lambda size: size))
+        # The oversized resource is sent anyway.
+        self.assertEqual([[0], [1], [2], [3]],
+                         [[i for i, _size in c] for c in chunks])
+        chunks = list(bulk.chunks(sizes, 10, 190, lambda size: size))
+        self.assertEqual([[0, 1, 2], [3]],
+                         [[i for i, _size in c] for c in chunks])
+
+
+class TestBulkCreate(test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestBulkCreate, self).setUp()
+        self.bodies = []
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.requests.post(test_client.PORTS_URL, text=self._create)
+
+    def _create(self, request, context):
+        """A fake Neutron server rejecting the ports named 'bad'."""
+        body = jsonutils.loads(request.body)
+        with self.lock:
+            self.bodies.append(body)
+            context.headers['X-OpenStack-Request-ID'] = 'req-%d' % len(
+                self.bodies)
+        ports = body.get('ports', [body.get('port')])
+        if any(p['name'] == 'bad' for p in ports):
+            context.status_code = 400
+            return jsonutils.dumps({'NeutronError': {
+                'type': 'BadRequest', 'message': 'bad port', 'detail': ''}})
+        context.status_code = 201
+        created = [dict(p, id='id-%d' % next(self.ids)) for p in ports]
+        if 'port' in body:
+            return jsonutils.dumps({'port': created[0]})
+        return jsonutils.dumps({'ports': created})
+
+    def test_chunks(self):
+        ports = [{'name': 'p%d' % i} for i in range(5)]
+        result = self.client.create_ports_bulk(ports, chunk_size=2)
+        self.assertTrue(result.ok)
+        self.assertEqual([2, 2, 1], [len(b['ports']) for b in self.bodies])
+        self.assertEqual(['p%d' % i for i in range(5)],
+                         [p['name'] for p in result.resources])
+        self.assertEqual(['req-1', 'req-2', 'req-3'], result.request_ids)
+        self.assertEqual(3, result.to_dict()['chunks'])
+
+    def test_chunk_fallback(self):
+        ports = [{'name': 'a'}, {'name': 'bad'}, {'name': 'b'},
+                 {'name': 'c'}]
+        result = self.client.create_ports_bulk(ports, chunk_size=3)
+        self.assertFalse(result.ok)
+        self.assertEqual([1], [item.index for item in result.errors])
+        self.assertIsInstance(result.items[1].error, exceptions.BadRequest)
+        self.assertEqual(['a', 'b', 'c'],
+                         [p['name'] for p in result.resources])
+        # The rejected chunk, its 3 ports alone then the last chunk.
+        self.assertEqual(5, len(self.bodies))
+        stats = result.to_dict()
+        self.assertEqual({'created': 3, 'failed': 1, 'chunks': 2,
+                          'fallback_chunks': 1},
+                         dict((k, stats[k]) for k in (
+                             'created', 'failed', 'chunks',
+                             'fallback_chunks')))
+        self.assertEqual(400, stats['errors'][0]['status_code'])
+
+    def test_no_fallback(self):
+        ports = [{'name': 'a'}, {'name': 'bad'}]
+        result = self.client.create_ports_bulk(ports, fallback=False)
+        self.assertEqual([0, 1], [item.index for item in result.errors])
+        self.assertEqual(1, len(self.bodies))
+
+    def test_connection_failure_is_not_resubmitted(self):
+        self.requests.post(test_client.PORTS_URL,
+                           exc=requests.exceptions.ConnectionError)
+        result = self.client.create_ports_bulk([{'name': 'a'},
+                                                {'name': 'b'}])
+        self.assertEqual(2, len(result.errors))
+        self.assertIsInstance(result.items[0].error,
+                              exceptions.ConnectionFailed)
+        self.assertEqual(1, self.requests.call_count)
+
+    def test_session_connection_failure(self):
+        self.requests.post(test_client.PORTS_URL, [
+            {'exc': requests.exceptions.ConnectionError},
+            {'text': self._create}])
+        neutron = client.Client(session=session.Session(
+            auth=token_endpoint.Token(test_client.END_URL, 'token')))
+        result = neutron.create_ports_bulk(
+            [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}], chunk_size=2)
+        self.assertEqual([0, 1], [item.index for item in result.errors])
+        self.assertIsInstance(result.items[0].error,
+                              ksa_exc.ConnectionError)
+        self.assertEqual(['c'], [p['name'] for p in result.resources])
+        # The failed chunk is not resubmitted, the next one is sent.
+        self.assertEqual(2, self.requests.call_count)
+
+    def test_concurrent_chunks(self):
+        ports = [{'name': 'p%d' % i} for i in range(10)]
+        ports[7]['name'] = 'bad'
+        result = self.client.create_ports_bulk(ports, chunk_size=3,
+                                               concurrency=4)
+        self.assertEqual([7], [item.index for item in result.errors])
+        self.assertEqual([p['name'] for i, p in enumerate(ports) if i != 7],
+                         [p['name'] for p in result.resources])
+        self.assertEqual(len(set(p['id'] for p in result.resources)), 9)
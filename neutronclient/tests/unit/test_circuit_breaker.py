@@ -0,0 +1,162 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from oslo_serialization import jsonutils
+import requests
+import testtools
+
+from neutronclient.common import circuit_breaker
+from neutronclient.common import exceptions
+from neutronclient.common import retry
+from neutronclient.tests.unit import test_client
+
+URL = 'http://neutron.test:9696/v2.0/ports'
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(testtools.TestCase):
+
+    def setUp(self):
+        super(TestCircuitBreaker, self).setUp()
+        self.clock = FakeClock()
+        self.breaker = circuit_breaker.CircuitBreaker(
+            failure_threshold=2, recovery_timeout=10, clock=self.clock)
+
+    def _fail(self, url=URL):
+        endpoint = self.breaker.before_request(url)
+        self.breaker.record(endpoint, False)
+
+    def test_opens_after_consecutive_failures(self):
+        self._fail()
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state(URL))
+        self._fail()
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state(URL))
+
+        self.clock.now += 4
+        e = self.assertRaises(exceptions.EndpointCircuitOpen,
+                              self.breaker.before_request, URL)
+        self.assertEqual(6, e.retry_after)
+        self.assertEqual('http://neutron.test:9696', e.endpoint)
+        self.assertIsInstance(e, exceptions.ConnectionFailed)
+
+    def test_success_resets_failures(self):
+        self._fail()
+        self.breaker.record(self.breaker.before_request(URL), True)
+        self._fail()
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state(URL))
+
+    def test_endpoints_are_independent(self):
+        self._fail()
+        self._fail()
+        self.breaker.before_request('http://other.test:9696/v2.0/ports')
+
+    def test_half_open_probe(self):
+        self._fail()
+        self._fail()
+        self.clock.now += 10
+        self.assertEqual(circuit_breaker.HALF_OPEN, self.breaker.state(URL))
+
+        endpoint = self.breaker.before_request(URL)
+        # Only one probe at a time.
+        self.assertRaises(exceptions.EndpointCircuitOpen,
+                          self.breaker.before_request, URL)
+        self.breaker.record(endpoint, True)
+        self.assertEqual(circuit_breaker.CLOSED, self.breaker.state(URL))
+
+    def test_failed_probe_reopens(self):
+        self._fail()
+        self._fail()
+        self.clock.now += 10
+        self._fail()
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state(URL))
+
+    def test_slow_calls_are_failures(self):
+        breaker = circuit_breaker.CircuitBreaker(
+            failure_threshold=1, slow_call_threshold=1.0)
+        breaker.record(breaker.before_request(URL), True, elapsed=0.5)
+        self.assertEqual(circuit_breaker.CLOSED, breaker.state(URL))
+        breaker.record(breaker.before_request(URL), True, elapsed=2.0)
+        self.assertEqual(circuit_breaker.OPEN, breaker.state(URL))
+        self.assertEqual(0.8, breaker.to_dict()[
+            'http://neutron.test:9696']['latency'])
+
+    def test_call(self):
+        func = mock.Mock(side_effect=requests.exceptions.ConnectTimeout)
+        for _ in range(2):
+            self.assertRaises(requests.exceptions.ConnectTimeout,
+                              self.breaker.call, URL, func)
+        self.assertRaises(exceptions.EndpointCircuitOpen,
+                          self.breaker.call, URL, func)
+        self.assertEqual(2, func.call_count)
+        self.assertEqual({'state': 'open', 'failures': 2, 'calls': 2,
+                          'rejected': 1},
+                         dict((k, v) for k, v in self.breaker.to_dict()[
+                             'http://neutron.test:9696'].items()
+                             if k != 'latency'))
+
+    def test_call_server_error(self):
+        func = mock.Mock(return_value=mock.Mock(status_code=503))
+        self.breaker.call(URL, func)
+        self.breaker.call(URL, func)
+        self.assertEqual(circuit_breaker.OPEN, self.breaker.state(URL))
+
+
+class TestClientCircuitBreaker(test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestClientCircuitBreaker, self).setUp()
+        self.clock = FakeClock()
+        self.breaker = circuit_breaker.CircuitBreaker(
+            failure_threshold=2, recovery_timeout=10, clock=self.clock)
+        self.client = self.create_client(circuit_breaker=self.breaker)
+
+    def test_fail_fast_and_recover(self):
+        ports = self.requests.get(test_client.PORTS_URL, [
+            {'exc': requests.exceptions.ConnectTimeout},
+            {'exc': requests.exceptions.ConnectTimeout},
+            {'text': jsonutils.dumps({'ports': []})}])
+
+        for _ in range(2):
+            self.assertRaises(exceptions.ConnectionFailed,
+                              self.client.list_ports)
+        self.assertRaises(exceptions.EndpointCircuitOpen,
+                          self.client.list_ports)
+        self.assertEqual(2, ports.call_count)
+
+        self.clock.now += 10
+        self.assertEqual({'ports': []}, self.client.list_ports())
+        self.assertEqual(circuit_breaker.CLOSED,
+                         self.breaker.state(test_client.PORTS_URL))
+
+    def test_retry_waits_for_the_circuit(self):
+        sleep = mock.Mock(side_effect=lambda d: setattr(
+            self.clock, 'now', self.clock.now + d))
+        self.client.retry_policy = retry.RetryPolicy(
+            max_retries=1, backoff_base=0.1, jitter=False, sleep=sleep)
+        self.requests.get(test_client.PORTS_URL,
+                          text=jsonutils.dumps({'ports': []}))
+        for _ in range(2):
+            self.breaker.record(
+                self.breaker.before_request(test_client.PORTS_URL), False)
+
+        self.assertEqual({'ports': []}, self.client.list_ports())
+        sleep.assert_called_once_with(10)
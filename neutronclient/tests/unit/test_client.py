@@ -0,0 +1,127 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import urllib.parse as urlparse
+
+from oslo_serialization import jsonutils
+from requests_mock.contrib import fixture as mock_fixture
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.v2_0 import client
+
+END_URL = 'http://neutron.test:9696'
+PORTS_URL = END_URL + '/v2.0/ports'
+
+
+class ClientTestBase(testtools.TestCase):
+
+    def setUp(self):
+        super(ClientTestBase, self).setUp()
+        self.requests = self.useFixture(mock_fixture.Fixture())
+        self.client = self.create_client()
+
+    def create_client(self, **kwargs):
+        return client.Client(token='token', endpoint_url=END_URL, **kwargs)
+
+    def register_pages(self, collection, url, pages, **kwargs):
+        """Register a paginated collection, one response per page."""
+        responses = []
+        for i, page in enumerate(pages):
+            body = {collection: page}
+            if i < len(pages) - 1:
+                body['%s_links' % collection] = [
+                    {'rel': 'next',
+                     'href': '%s?marker=%s' % (url, page[-1]['id'])}]
+            responses.append({'text': jsonutils.dumps(body),
+                              'headers': {'X-OpenStack-Request-ID':
+                                          'req-%d' % i}})
+        self.requests.get(url, responses, **kwargs)
+
+
+class TestStreamingList(ClientTestBase):
+
+    PAGES = [[{'id': '1'}, {'id': '2'}], [{'id': '3'}]]
+
+    def test_list_stream_retrieve_all(self):
+        self.register_pages('ports', PORTS_URL, self.PAGES)
+
+        ports = self.client.list_ports(stream=True)
+        self.assertEqual({'ports': [{'id': '1'}, {'id': '2'}, {'id': '3'}]},
+                         ports)
+        self.assertEqual(['req-0', 'req-1'], ports.request_ids)
+        self.assertEqual('marker=2', self.requests.last_request.query)
+
+    def test_list_stream_iterator(self):
+        self.register_pages('ports', PORTS_URL, self.PAGES)
+
+        ports = self.client.list_ports(retrieve_all=False, stream=True)
+        self.assertEqual({'id': '1'}, next(ports))
+        self.assertEqual(['req-0'], ports.request_ids)
+        self.assertEqual([{'id': '2'}, {'id': '3'}], list(ports))
+        self.assertEqual(['req-0', 'req-1'], ports.request_ids)
+
+    def test_list_stream_error(self):
+        self.requests.get(PORTS_URL, status_code=404, text=jsonutils.dumps(
+            {'NeutronError': {'type': 'PortNotFound', 'message': 'gone',
+                              'detail': ''}}))
+
+        self.assertRaises(exceptions.PortNotFoundClient,
+                          self.client.list_ports, stream=True)
+
+
+class TestFindResources(ClientTestBase):
+
+    ID_A = '11111111-1111-1111-1111-111111111111'
+    ID_B = '22222222-2222-2222-2222-222222222222'
+    ID_C = '33333333-3333-3333-3333-333333333333'
+    PORTS = [{'id': ID_A, 'name': 'a'}, {'id': ID_B, 'name': 'dup'},
+             {'id': ID_C, 'name': 'dup'}]
+
+    def setUp(self):
+        super(TestFindResources, self).setUp()
+        self.queries = []
+        self.requests.get(PORTS_URL, text=self._list)
+
+    def _list(self, request, context):
+        query = urlparse.parse_qs(request.query)
+        self.queries.append(query)
+        ports = [p for p in self.PORTS
+                 if p['id'] in query.get('id', [p['id']]) and
+                 p['name'] in query.get('name', [p['name']])]
+        return jsonutils.dumps({'ports': ports})
+
+    def test_find_resources(self):
+        found = self.client.find_resources('port', [self.ID_B, 'a', 'a'])
+        self.assertEqual({self.ID_B: self.PORTS[1], 'a': self.PORTS[0]},
+                         found)
+        self.assertEqual([{'id': [self.ID_B]}, {'name': ['a']}],
+                         self.queries)
+
+    def test_find_resources_unresolved(self):
+        e = self.assertRaises(exceptions.UnresolvedResources,
+                              self.client.find_resources, 'port',
+                              ['a', 'dup', 'missing'], fields='id')
+        self.assertEqual({'a': {'id': self.ID_A}}, e.found)
+        self.assertEqual(['missing'], e.missing)
+        self.assertEqual(['dup'], e.ambiguous)
+        self.assertEqual(1, len(self.queries))
+
+    def test_find_resources_chunks(self):
+        names = ['name-%04d' % i for i in range(2000)]
+        self.assertRaises(exceptions.UnresolvedResources,
+                          self.client.find_resources, 'port', names)
+        self.assertEqual(names,
+                         sum((q['name'] for q in self.queries), []))
+        self.assertGreater(len(self.queries), 1)
+        for request in self.requests.request_history:
+            self.assertLess(len(request.url), client.client.MAX_URI_LEN)
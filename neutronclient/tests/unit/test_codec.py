@@ -0,0 +1,114 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+from unittest import mock
+
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import codec
+from neutronclient.common import exceptions
+from neutronclient.tests.unit import test_client
+
+
+class TestCodecs(testtools.TestCase):
+
+    DOC = {'port': {'id': 'p1', 'name': u'pért', 'fixed_ips': [],
+                    'admin_state_up': True, 'mtu': 1450, 'qos': None}}
+
+    def _codecs(self):
+        codecs = [codec.JSONCodec()]
+        if codec.orjson is not None:
+            codecs.append(codec.OrjsonCodec())
+        return codecs
+
+    def test_round_trip(self):
+        for c in self._codecs():
+            data = c.dumps(self.DOC)
+            self.assertIsInstance(data, bytes)
+            self.assertEqual(self.DOC, jsonutils.loads(data))
+            self.assertEqual(self.DOC, c.loads(data))
+            self.assertEqual(self.DOC, c.loads(data.decode('utf-8')))
+
+    def test_objects_encoded_as_str(self):
+        when = datetime.datetime(2020, 1, 2, 3, 4, 5)
+        for c in self._codecs():
+            self.assertEqual({'when': str(when), '1': 2 ** 70},
+                             c.loads(c.dumps({'when': when, 1: 2 ** 70})))
+
+    def test_malformed(self):
+        for c in self._codecs():
+            self.assertRaises(exceptions.MalformedResponseBody,
+                              c.loads, b'{"port": ')
+
+    def test_get_codec(self):
+        self.assertIsInstance(codec.get_codec('json'), codec.JSONCodec)
+        self.assertEqual(codec.default_codec_name(),
+                         codec.get_codec().name)
+        custom = codec.JSONCodec()
+        self.assertIs(custom, codec.get_codec(custom))
+        self.assertRaises(exceptions.NeutronClientException,
+                          codec.get_codec, 'yaml')
+
+    def test_orjson_required(self):
+        with mock.patch.object(codec, 'orjson', None):
+            self.assertEqual('json', codec.default_codec_name())
+            self.assertRaises(exceptions.NeutronClientException,
+                              codec.get_codec, 'orjson')
+
+
+class TestClientCodec(test_client.ClientTestBase):
+
+    def test_json_codec(self):
+        self.requests.get(test_client.PORTS_URL + '/p1',
+                          content=b'{"port": {"name": "p\\u00e9rt"}}')
+        neutron = self.create_client(codec='json')
+        with mock.patch.object(neutron.codec, 'loads',
+                               wraps=neutron.codec.loads) as loads:
+            self.assertEqual({'port': {'name': u'pért'}},
+                             neutron.show_port('p1'))
+        # The codec reads the bytes of the body.
+        self.assertIsInstance(loads.call_args[0][0], bytes)
+
+    def test_http_client_returns_text(self):
+        self.requests.get(test_client.PORTS_URL + '/p1',
+                          content=b'{"port": {"name": "p\\u00e9rt"}}')
+        neutron = self.create_client()
+        _resp, body = neutron.httpclient.do_request('/v2.0/ports/p1', 'GET')
+        self.assertEqual(u'{"port": {"name": "p\\u00e9rt"}}', body)
+        _resp, body = neutron.httpclient.do_request('/v2.0/ports/p1', 'GET',
+                                                    raw_body=True)
+        self.assertEqual(b'{"port": {"name": "p\\u00e9rt"}}', body)
+
+    def test_create_with_serialized_body(self):
+        self.requests.post(test_client.PORTS_URL,
+                           json={'port': {'id': 'p1'}}, status_code=201)
+        body = b'{"port": {"name": "p1"}}'
+        port = self.create_client().create_port(body)
+        self.assertEqual({'port': {'id': 'p1'}}, port)
+        self.assertEqual(body, self.requests.last_request.body)
+
+    def test_update_body_encoded_by_codec(self):
+        self.requests.put(test_client.PORTS_URL + '/p1',
+                          json={'port': {'id': 'p1'}})
+        neutron = self.create_client(codec='json')
+        neutron.update_port('p1', {'port': {'name': u'pért'}})
+        self.assertEqual(b'{"port": {"name": "p\\u00e9rt"}}',
+                         self.requests.last_request.body)
+
+    def test_error_body_is_decoded(self):
+        self.requests.get(test_client.PORTS_URL + '/p1', status_code=500,
+                          content=u'not json é'.encode('utf-8'))
+        e = self.assertRaises(exceptions.NeutronClientException,
+                              self.create_client().show_port, 'p1')
+        self.assertIn(u'not json é', str(e))
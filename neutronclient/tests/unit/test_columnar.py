@@ -0,0 +1,120 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import csv
+import io
+import os
+
+import fixtures
+import testtools
+
+from neutronclient.common import columnar
+from neutronclient.tests.unit import test_client
+
+PORTS = [
+    {'id': 'p1', 'network_id': 'n1', 'status': 'ACTIVE',
+     'admin_state_up': True, 'revision_number': 1,
+     'fixed_ips': [{'ip_address': '10.0.0.1'}]},
+    {'id': 'p2', 'network_id': 'n1', 'status': 'DOWN',
+     'admin_state_up': False, 'revision_number': 2, 'fixed_ips': []},
+    {'id': 'p3', 'network_id': 'n2', 'status': 'ACTIVE',
+     'admin_state_up': True, 'revision_number': 3, 'fixed_ips': []},
+    {'id': 'p4', 'network_id': None, 'status': 'ACTIVE',
+     'admin_state_up': True, 'revision_number': 4, 'fixed_ips': []},
+]
+NETWORKS = [{'id': 'n1', 'name': 'public', 'mtu': 1500},
+            {'id': 'n2', 'name': 'private', 'mtu': 1450}]
+
+
+@testtools.skipUnless(columnar.numpy, 'numpy is not installed')
+class TestTable(testtools.TestCase):
+
+    def setUp(self):
+        super(TestTable, self).setUp()
+        self.ports = columnar.Table.from_resources(PORTS)
+
+    def test_columns(self):
+        self.assertEqual(4, len(self.ports))
+        self.assertIsInstance(self.ports['status'], columnar.Categorical)
+        self.assertEqual(['ACTIVE', 'DOWN'],
+                         self.ports['status'].categories.tolist())
+        self.assertEqual('bool', self.ports['admin_state_up'].dtype.name)
+        self.assertEqual('int64', self.ports['revision_number'].dtype.name)
+        self.assertEqual(-1, self.ports['network_id'].codes[3])
+        self.assertEqual(PORTS, self.ports.to_resources())
+
+    def test_missing_fields(self):
+        table = columnar.Table.from_resources([{'id': 'a'},
+                                               {'id': 'b', 'mtu': 1500}])
+        self.assertTrue(columnar.numpy.isnan(table['mtu'][0]))
+        table = columnar.Table.from_resources(PORTS, fields=['id', 'name'])
+        self.assertEqual(['id', 'name'], table.fields)
+
+    def test_filter(self):
+        active = self.ports.filter(status='ACTIVE')
+        self.assertEqual(['p1', 'p3', 'p4'], active['id'].decode().tolist())
+        selected = self.ports.filter(self.ports['revision_number'] > 1,
+                                     network_id=['n1', 'n2'])
+        self.assertEqual(['p2', 'p3'], selected['id'].decode().tolist())
+        self.assertEqual(0, len(self.ports.filter(status='unknown')))
+
+    def test_group_count(self):
+        self.assertEqual({'ACTIVE': 3, 'DOWN': 1},
+                         self.ports.group_count('status'))
+        self.assertEqual({('n1', 'ACTIVE'): 1, ('n1', 'DOWN'): 1,
+                          ('n2', 'ACTIVE'): 1, (None, 'ACTIVE'): 1},
+                         self.ports.group_count('network_id', 'status'))
+        self.assertEqual({True: 3, False: 1},
+                         self.ports.group_count('admin_state_up'))
+
+    def test_join(self):
+        networks = columnar.Table.from_resources(NETWORKS)
+        joined = self.ports.join(networks, 'network_id')
+        self.assertEqual(['public', 'public', 'private', None],
+                         joined['network_name'].decode().tolist())
+        self.assertEqual([1500, 1500, 1450],
+                         joined['network_mtu'][:3].tolist())
+        self.assertTrue(columnar.numpy.isnan(joined['network_mtu'][3]))
+        self.assertNotIn('network_id_', joined)
+
+    def test_join_empty(self):
+        networks = columnar.Table.from_resources([], fields=['id', 'name'])
+        joined = self.ports.join(networks, 'network_id')
+        self.assertEqual([None] * 4, joined['network_name'].tolist())
+
+    def test_to_csv(self):
+        rows = list(csv.reader(io.StringIO(self.ports.to_csv(
+            fields=['id', 'network_id', 'fixed_ips']))))
+        self.assertEqual(['id', 'network_id', 'fixed_ips'], rows[0])
+        self.assertEqual(['p1', 'n1', '[{"ip_address": "10.0.0.1"}]'],
+                         rows[1])
+        self.assertEqual(['p4', '', '[]'], rows[4])
+
+    def test_npz(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'ports.npz')
+        self.ports.to_npz(path)
+        loaded = columnar.Table.load_npz(path)
+        self.assertEqual(PORTS, loaded.to_resources())
+
+
+@testtools.skipUnless(columnar.numpy, 'numpy is not installed')
+class TestColumnarList(test_client.ClientTestBase):
+
+    def test_list_columnar(self):
+        self.register_pages('ports', test_client.PORTS_URL,
+                            [PORTS[:2], PORTS[2:]])
+        ports = self.client.list_ports(columnar=['id', 'status'])
+        self.assertEqual(['req-0', 'req-1'], ports.request_ids)
+        self.assertEqual({'ACTIVE': 3, 'DOWN': 1},
+                         ports['ports'].group_count('status'))
+        self.assertEqual(['id', 'status'], ports['ports'].fields)
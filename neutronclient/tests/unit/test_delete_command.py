@@ -0,0 +1,103 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import threading
+from unittest import mock
+
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.neutron import v2_0 as neutronV20
+
+
+class FakeDeleteCommand(neutronV20.DeleteCommand):
+    resource = 'port'
+
+
+class TestBulkDelete(testtools.TestCase):
+
+    PORTS = {'a': 'id-a', 'b': 'id-b', 'c': 'id-c', 'd': 'id-d'}
+
+    def setUp(self):
+        super(TestBulkDelete, self).setUp()
+        self.deleted = []
+        self.lock = threading.Lock()
+        self.client = mock.Mock()
+        self.client.find_resource.side_effect = self._find
+        self.client.find_resources.side_effect = self._find_many
+        self.client.delete_port.side_effect = self._delete
+        app = mock.Mock(stdout=io.StringIO())
+        app.client_manager.neutron = self.client
+        self.cmd = FakeDeleteCommand(app, None)
+
+    def _find(self, resource, name_or_id, project_id, cmd_resource,
+              parent_id, fields):
+        if name_or_id == 'dup':
+            raise exceptions.NeutronClientNoUniqueMatch(resource=resource,
+                                                        name=name_or_id)
+        if name_or_id not in self.PORTS:
+            raise exceptions.NotFound()
+        return {'id': self.PORTS[name_or_id]}
+
+    def _delete(self, port_id):
+        with self.lock:
+            self.deleted.append(port_id)
+
+    def _find_many(self, resource, names_or_ids, project_id, cmd_resource,
+                   parent_id, fields):
+        found = dict((n, {'id': self.PORTS[n]}) for n in names_or_ids
+                     if n in self.PORTS)
+        missing = [n for n in names_or_ids
+                   if n not in self.PORTS and n != 'dup']
+        ambiguous = [n for n in names_or_ids if n == 'dup']
+        if missing or ambiguous:
+            raise exceptions.UnresolvedResources(
+                resource=resource, found=found, missing=missing,
+                ambiguous=ambiguous)
+        return found
+
+    def _run(self, *args):
+        parser = self.cmd.get_parser('delete')
+        return self.cmd.take_action(parser.parse_args(list(args)))
+
+    def test_serial_delete(self):
+        self._run('a', 'b')
+        self.assertEqual(['id-a', 'id-b'], self.deleted)
+        self.assertEqual('Deleted port(s): a, b\n',
+                         self.cmd.app.stdout.getvalue())
+
+    def test_concurrent_delete(self):
+        self._run('--concurrency', '3', 'a', 'b', 'c', 'd')
+        self.assertEqual(sorted(self.PORTS.values()), sorted(self.deleted))
+        output = self.cmd.app.stdout.getvalue().splitlines()
+        self.assertEqual('Deleted port(s): a, b, c, d', output[0])
+        self.assertTrue(output[1].startswith('Deleted 4 of 4 port(s) in '))
+        self.assertEqual(1, self.client.find_resources.call_count)
+        self.assertFalse(self.client.find_resource.called)
+
+    def test_concurrent_delete_errors(self):
+        e = self.assertRaises(exceptions.NeutronCLIError, self._run,
+                              '--concurrency', '2', 'a', 'missing', 'dup',
+                              'b')
+        self.assertEqual(["Unable to find port(s) with id(s) 'missing'.",
+                          "Multiple port(s) matches found for name(s) 'dup'."
+                          " Please use an ID to be more specific."],
+                         str(e).splitlines())
+        self.assertEqual(['id-a', 'id-b'], sorted(self.deleted))
+        self.assertIn('Deleted port(s): a, b',
+                      self.cmd.app.stdout.getvalue())
+
+    def test_concurrent_delete_vanished(self):
+        self.client.delete_port.side_effect = [None, exceptions.NotFound()]
+        self.assertRaises(exceptions.NeutronCLIError, self._run,
+                          '--concurrency', '2', 'a', 'b')
@@ -14,6 +14,7 @@
 #    under the License.
 
 import abc
+import gzip
 
 from oslo_utils import uuidutils
 import osprofiler.profiler
@@ -22,6 +23,7 @@ from requests_mock.contrib import fixture as mock_fixture
 import testtools
 
 from neutronclient import client
+from neutronclient.common import compression
 from neutronclient.common import exceptions
 
 
@@ -129,6 +131,36 @@ class TestHTTPClient(TestHTTPClientMixin, testtools.TestCase):
         self.assertEqual(200, resp.status_code)
         self.assertEqual(text, resp_text)
 
+    def test_session_is_reused(self):
+        self.requests.register_uri(METHOD, URL)
+        session = self.http.session
+        self.http.request(URL, METHOD)
+        self.http.request(URL, METHOD)
+        self.assertIs(session, self.http.session)
+        self.assertEqual(2, self.requests.call_count)
+
+    def test_session_pool_configuration(self):
+        http = client.HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL,
+                                 pool_connections=3, pool_maxsize=7,
+                                 pool_block=True)
+        adapter = http.session.get_adapter('https://test.test')
+        self.assertEqual(3, adapter._pool_connections)
+        self.assertEqual(7, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+        self.assertIs(adapter, http.session.get_adapter('http://test.test'))
+
+    def test_close_drops_session(self):
+        session = self.http.session
+        self.http.close()
+        self.assertIsNot(session, self.http.session)
+
+    def test_request_without_keepalive(self):
+        http = client.HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL,
+                                 keepalive=False)
+        self.requests.register_uri(METHOD, URL,
+                                   request_headers={'Connection': 'close'})
+        http.request(URL, METHOD)
+
     def test_do_request_with_headers_success(self):
         text = 'test content'
         self.requests.register_uri(METHOD, END_URL + URL, text=text,
@@ -155,3 +187,72 @@ class TestHTTPClientWithReqId(TestHTTPClientMixin, testtools.TestCase):
         }
         self.requests.register_uri(METHOD, URL, request_headers=headers)
         self.http.request(URL, METHOD)
+
+
+class TestHTTPClientCompression(testtools.TestCase):
+
+    def setUp(self):
+        super(TestHTTPClientCompression, self).setUp()
+        self.requests = self.useFixture(mock_fixture.Fixture())
+        self.http = client.HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL,
+                                      compression=True,
+                                      request_compression_threshold=100)
+
+    def test_gzip_response_is_decoded(self):
+        text = '{"ports": []}' * 100
+        compressed = gzip.compress(text.encode('utf-8'))
+        self.requests.register_uri(
+            METHOD, URL, content=compressed,
+            request_headers={'Accept-Encoding': 'gzip'},
+            headers={'Content-Encoding': 'gzip'})
+
+        resp, resp_text = self.http.request(URL, METHOD)
+        self.assertEqual(text, resp_text)
+        stats = self.http.transfer_stats.to_dict()
+        self.assertEqual(1, stats['requests'])
+        self.assertEqual(len(text), stats['response_bytes'])
+        self.assertEqual(len(compressed), stats['response_bytes_received'])
+        self.assertEqual(len(text) - len(compressed),
+                         stats['response_bytes_saved'])
+
+    def test_identity_response(self):
+        self.requests.register_uri(METHOD, URL, text=BODY)
+
+        resp, resp_text = self.http.request(URL, METHOD)
+        self.assertEqual(BODY, resp_text)
+        self.assertEqual(0, self.http.transfer_stats.response_bytes_saved)
+
+    def test_large_request_body_is_compressed(self):
+        body = 'x' * 1000
+        self.requests.register_uri('POST', URL,
+                                   request_headers={'Content-Encoding':
+                                                    'gzip'})
+
+        self.http.request(URL, 'POST', body=body)
+        sent = self.requests.last_request.body
+        self.assertEqual(body.encode('utf-8'), gzip.decompress(sent))
+        self.assertEqual(len(body) - len(sent),
+                         self.http.transfer_stats.request_bytes_saved)
+
+    def test_small_request_body_is_not_compressed(self):
+        self.requests.register_uri('POST', URL)
+
+        self.http.request(URL, 'POST', body=BODY)
+        self.assertEqual(BODY, self.requests.last_request.body)
+        self.assertNotIn('Content-Encoding',
+                         self.requests.last_request.headers)
+
+    def test_compression_disabled_by_default(self):
+        http = client.HTTPClient(token=AUTH_TOKEN, endpoint_url=END_URL)
+        self.requests.register_uri(METHOD, URL, text=BODY)
+
+        http.request(URL, METHOD)
+        self.assertIsNone(http.transfer_stats)
+        self.assertNotEqual(
+            'gzip', self.requests.last_request.headers['Accept-Encoding'])
+
+    def test_prepare_body_without_threshold(self):
+        headers = {}
+        self.assertEqual(BODY * 100, compression.prepare_body(
+            BODY * 100, headers, None))
+        self.assertEqual({}, headers)
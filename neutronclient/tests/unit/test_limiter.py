@@ -0,0 +1,148 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+from unittest import mock
+
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import limiter
+from neutronclient.tests.unit import test_client
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.now += delay
+
+
+class TestTokenBucket(testtools.TestCase):
+
+    def test_rate(self):
+        clock = FakeClock()
+        bucket = limiter.TokenBucket(2, burst=2, clock=clock,
+                                     sleep=clock.sleep)
+        self.assertEqual([0, 0, 0.5, 0.5],
+                         [bucket.acquire() for _ in range(4)])
+        self.assertEqual(1.0, clock.now)
+
+    def test_refill_is_capped(self):
+        clock = FakeClock()
+        bucket = limiter.TokenBucket(10, burst=1, clock=clock,
+                                     sleep=clock.sleep)
+        clock.now += 60
+        bucket.acquire()
+        self.assertEqual(0.1, bucket.acquire())
+
+
+class TestAIMDLimit(testtools.TestCase):
+
+    def test_additive_increase(self):
+        window = limiter.AIMDLimit(initial=2, latency_tolerance=None)
+        for _ in range(2):
+            window.acquire()
+        for _ in range(2):
+            window.release(False, 0.01)
+        # Only the release of a full window grows it.
+        self.assertEqual(2.5, window.limit)
+
+    def test_multiplicative_decrease(self):
+        clock = FakeClock()
+        window = limiter.AIMDLimit(initial=8, clock=clock)
+        for _ in range(3):
+            window.acquire()
+            window.release(True, 0.1)
+        # Overloads of the same round trip only shrink the window once.
+        self.assertEqual(4, window.limit)
+        clock.now += 1
+        window.acquire()
+        window.release(True, 0.1)
+        self.assertEqual(2, window.limit)
+        self.assertEqual(2, window.decreases)
+
+    def test_rising_latency_is_overload(self):
+        window = limiter.AIMDLimit(initial=8, latency_tolerance=2.0)
+        window.acquire()
+        window.release(False, 0.01)
+        for _ in range(20):
+            window.acquire()
+            window.release(False, 1.0)
+        self.assertLess(window.limit, 8)
+
+    def test_window_blocks(self):
+        window = limiter.AIMDLimit(initial=1)
+        window.acquire()
+        acquired = threading.Event()
+
+        def _acquire():
+            window.acquire()
+            acquired.set()
+
+        t = threading.Thread(target=_acquire)
+        t.start()
+        self.assertFalse(acquired.wait(0.05))
+        window.release(False)
+        self.assertTrue(acquired.wait(5))
+        t.join()
+
+
+class TestClientLimiter(test_client.ClientTestBase):
+
+    def test_requests_are_limited(self):
+        lim = limiter.Limiter(concurrency=2, max_concurrency=2)
+        neutron = self.create_client(limiter=lim)
+        peak = []
+        inflight = []
+        lock = threading.Lock()
+        resp = mock.Mock(status_code=200, headers={})
+
+        # requests_mock serializes requests, fake a slow server instead.
+        def _do_request(action, method, **kwargs):
+            with lock:
+                inflight.append(1)
+                peak.append(len(inflight))
+            time.sleep(0.01)
+            with lock:
+                inflight.pop()
+            return resp, jsonutils.dumps({'ports': []})
+
+        neutron.httpclient.do_request = _do_request
+        threads = [threading.Thread(target=neutron.list_ports)
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(2, max(peak))
+        self.assertEqual(8, lim.to_dict()['requests'])
+
+    def test_overload_shrinks_window(self):
+        lim = limiter.Limiter(concurrency=8)
+        neutron = self.create_client(limiter=lim)
+        self.requests.get(test_client.PORTS_URL, status_code=503,
+                          text='busy')
+
+        self.assertRaises(exceptions.ServiceUnavailable, neutron.list_ports)
+        stats = lim.to_dict()
+        self.assertEqual(4, stats['concurrency_limit'])
+        self.assertEqual(1, stats['overloads'])
+        self.assertEqual(0, stats['inflight'])
@@ -0,0 +1,201 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from http import server
+import threading
+import time
+from unittest import mock
+
+from oslo_serialization import jsonutils
+import requests
+import requests_mock
+from requests_mock.contrib import fixture as mock_fixture
+import testtools
+
+from neutronclient.common import load_balancer
+from neutronclient.common import metrics
+from neutronclient.common import tracing
+from neutronclient.v2_0 import client
+
+URL_A = 'http://neutron-a.test:9696'
+URL_B = 'http://neutron-b.test:9696'
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestEndpointSet(testtools.TestCase):
+
+    def setUp(self):
+        super(TestEndpointSet, self).setUp()
+        self.clock = FakeClock()
+        self.endpoints = load_balancer.EndpointSet(
+            [URL_A, URL_B + '/'], failure_threshold=2, cooldown=10,
+            clock=self.clock)
+
+    def test_least_outstanding(self):
+        first = self.endpoints.acquire()
+        second = self.endpoints.acquire()
+        self.assertEqual({URL_A, URL_B}, {first, second})
+        self.endpoints.release(second, True)
+        self.assertEqual(second, self.endpoints.acquire())
+
+    def test_ties_are_spread(self):
+        picked = []
+        for _ in range(4):
+            url = self.endpoints.acquire()
+            picked.append(url)
+            self.endpoints.release(url, True)
+        self.assertEqual([URL_A, URL_B, URL_A, URL_B], picked)
+
+    def test_failed_endpoint_is_left_aside(self):
+        for _ in range(2):
+            self.endpoints.release(self.endpoints.acquire(exclude=[URL_B]),
+                                   False)
+        for _ in range(3):
+            url = self.endpoints.acquire()
+            self.assertEqual(URL_B, url)
+            self.endpoints.release(url, True)
+
+        self.clock.now += 10
+        self.assertEqual([URL_A, URL_B],
+                         sorted([self.endpoints.acquire(),
+                                 self.endpoints.acquire()]))
+
+    def test_all_down(self):
+        for url in (URL_A, URL_B):
+            for _ in range(2):
+                self.endpoints.acquire(exclude=[url])
+                self.endpoints.release(url, False)
+                self.clock.now += 1
+        self.assertEqual(URL_A, self.endpoints.acquire())
+
+    def test_exclude_everything(self):
+        self.assertIsNone(self.endpoints.acquire(exclude=[URL_A, URL_B]))
+
+    def test_hedge_delay(self):
+        self.assertIsNone(self.endpoints.hedge_delay())
+        endpoints = load_balancer.EndpointSet([URL_A, URL_B],
+                                              hedge_percentile=90)
+        self.assertIsNone(endpoints.hedge_delay())
+        endpoints.latencies.extend(i / 100.0 for i in range(1, 101))
+        self.assertEqual(0.9, endpoints.hedge_delay())
+
+
+class TestBalancedClient(testtools.TestCase):
+
+    def setUp(self):
+        super(TestBalancedClient, self).setUp()
+        self.requests = self.useFixture(mock_fixture.Fixture())
+
+    def _client(self, **kwargs):
+        return client.Client(token='token', endpoint_urls=[URL_A, URL_B],
+                             **kwargs)
+
+    def test_requests_are_spread(self):
+        a = self.requests.get(URL_A + '/v2.0/ports', text='{"ports": []}')
+        b = self.requests.get(URL_B + '/v2.0/ports', text='{"ports": []}')
+        neutron = self._client()
+        for _ in range(4):
+            neutron.list_ports()
+        self.assertEqual((2, 2), (a.call_count, b.call_count))
+
+    def test_failover_with_retries(self):
+        a = self.requests.get(URL_A + '/v2.0/ports',
+                              exc=requests.exceptions.ConnectionError)
+        self.requests.get(URL_B + '/v2.0/ports', text='{"ports": []}')
+        neutron = self._client(retries=1)
+        neutron.retry_interval = 0
+        for _ in range(3):
+            self.assertEqual({'ports': []}, neutron.list_ports())
+        self.assertEqual(2, a.call_count)
+        self.assertIsNotNone(neutron.httpclient.endpoints.to_dict()[
+            'endpoints'][URL_A]['down_until'])
+
+    def test_hedged_get(self):
+        # requests_mock serializes requests, use real servers instead.
+        slow = self._server({'port': {'id': 'slow'}}, delay=0.5)
+        fast = self._server({'port': {'id': 'fast'}})
+        neutron = client.Client(token='token', endpoint_urls=[slow, fast],
+                                hedge_percentile=95)
+        self.addCleanup(neutron.httpclient.close)
+        self.requests.register_uri(requests_mock.ANY, requests_mock.ANY,
+                                   real_http=True)
+        endpoints = neutron.httpclient.endpoints
+        endpoints.latencies.extend([0.01] * 20)
+
+        self.assertEqual({'port': {'id': 'fast'}}, neutron.show_port('p1'))
+        stats = endpoints.to_dict()
+        self.assertEqual(1, stats['hedged'])
+        self.assertEqual(1, stats['hedge_wins'])
+
+    def test_hedged_get_keeps_timing_and_span(self):
+        slow = self._server({'port': {'id': 'slow'}}, delay=0.5)
+        fast = self._server({'port': {'id': 'fast'}})
+        timings = []
+        neutron = client.Client(
+            token='token', endpoint_urls=[slow, fast], hedge_percentile=95,
+            metrics=metrics.Metrics(callbacks=[timings.append]))
+        self.addCleanup(neutron.httpclient.close)
+        self.requests.register_uri(requests_mock.ANY, requests_mock.ANY,
+                                   real_http=True)
+        neutron.httpclient.endpoints.latencies.extend([0.01] * 20)
+        exporter = mock.Mock()
+        tracing.set_exporter(exporter)
+        self.addCleanup(tracing.set_exporter, None)
+        parents = []
+        endpoint_request = neutron.httpclient._endpoint_request
+
+        def traced_request(*args, **kwargs):
+            with tracing.span('attempt') as span:
+                parents.append(span.parent_id)
+            return endpoint_request(*args, **kwargs)
+
+        with mock.patch.object(neutron.httpclient, '_endpoint_request',
+                               side_effect=traced_request):
+            with tracing.span('caller') as caller:
+                neutron.show_port('p1')
+
+        self.assertEqual([caller.span_id] * 2, parents)
+        self.assertEqual(1, len(timings))
+        self.assertIn('ttfb', timings[0].phases)
+        self.assertIn('connect', timings[0].phases)
+        # The slow attempt is not counted.
+        self.assertLess(timings[0].phases['ttfb'], 0.5)
+
+    def _server(self, body, delay=0):
+        data = jsonutils.dump_as_bytes(body)
+
+        class Handler(server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(delay)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        httpd = server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        return 'http://127.0.0.1:%d' % httpd.server_address[1]
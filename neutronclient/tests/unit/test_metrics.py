@@ -0,0 +1,200 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from http import server
+import os
+import stat
+import threading
+
+import fixtures
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import limiter
+from neutronclient.common import metrics
+from neutronclient.tests.unit import test_client
+from neutronclient.v2_0 import client
+
+PORT_ID = '4e8e5957-649f-477b-9e5b-f1f75b21c03c'
+
+
+class TestMetrics(testtools.TestCase):
+
+    def setUp(self):
+        super(TestMetrics, self).setUp()
+        self.metrics = metrics.Metrics(buckets=(0.1, 1.0))
+
+    def _timing(self, method, path, duration, status_code=200, **phases):
+        timing = metrics.RequestTiming(method, path)
+        timing.duration = duration
+        timing.status_code = status_code
+        for phase, seconds in phases.items():
+            timing.add(phase, seconds)
+        self.metrics.record(timing)
+
+    def test_path_template(self):
+        self.assertEqual('/v2.0/ports/%s',
+                         metrics.path_template('/v2.0/ports/' + PORT_ID))
+        self.assertEqual('/v2.0/ports/%s/bindings/%s',
+                         metrics.path_template(
+                             '/v2.0/ports/%s/bindings/12?fields=host' %
+                             PORT_ID.replace('-', '')))
+        self.assertEqual('/v2.0/networks', metrics.path_template(
+            'http://neutron.test:9696/v2.0/networks?name=public'))
+
+    def test_openmetrics(self):
+        self._timing('GET', '/ports/%s' % PORT_ID, 0.05, ttfb=0.04)
+        self._timing('GET', '/ports/x', 0.5)
+        self._timing('GET', '/ports/%s' % PORT_ID, 2.0, status_code=None)
+        text = self.metrics.openmetrics()
+        lines = text.splitlines()
+        name = 'neutronclient_request_duration_seconds'
+        labels = 'method="GET",path="/ports/%s"'
+        self.assertIn('# TYPE %s histogram' % name, lines)
+        self.assertIn('%s_bucket{le="0.1",%s} 1' % (name, labels), lines)
+        self.assertIn('%s_bucket{le="1.0",%s} 1' % (name, labels), lines)
+        self.assertIn('%s_bucket{le="+Inf",%s} 2' % (name, labels), lines)
+        self.assertIn('%s_count{%s} 2' % (name, labels), lines)
+        self.assertIn('%s_sum{%s} 2.05' % (name, labels), lines)
+        self.assertIn('neutronclient_request_phase_seconds_count{%s,'
+                      'phase="ttfb"} 1' % labels, lines)
+        self.assertIn('neutronclient_requests_total{%s,status="200"} 1'
+                      % labels, lines)
+        self.assertIn('neutronclient_requests_total{%s,status="unknown"} 1'
+                      % labels, lines)
+        self.assertIn('neutronclient_requests_total{method="GET",'
+                      'path="/ports/x",status="200"} 1', lines)
+        self.assertEqual('# EOF', lines[-1])
+        self.assertEqual({'GET /ports/%s': {'count': 2, 'sum': 2.05},
+                          'GET /ports/x': {'count': 1, 'sum': 0.5}},
+                         self.metrics.to_dict())
+
+    def test_request(self):
+        timings = []
+        self.metrics.add_callback(timings.append)
+        with self.metrics.request('GET', '/ports') as timing:
+            with self.metrics.request('GET', '/v2.0/ports') as nested:
+                self.assertIs(timing, nested)
+                metrics.add_phase('ttfb', 0.01)
+        self.assertIsNone(metrics.current())
+        self.assertRaises(
+            exceptions.NotFound, self._failed_request, '/ports/x')
+        self.assertEqual(2, len(timings))
+        self.assertEqual({'ttfb': 0.01}, timings[0].phases)
+        self.assertEqual('/ports', timings[0].template)
+        self.assertEqual('NotFound', timings[1].error)
+        self.assertEqual(404, timings[1].status_code)
+
+    def _failed_request(self, path):
+        with self.metrics.request('GET', path):
+            raise exceptions.NotFound()
+
+    def test_failing_callback(self):
+        def callback(timing):
+            raise ValueError()
+
+        self.metrics.add_callback(callback)
+        with self.metrics.request('GET', '/ports'):
+            pass
+        self.assertEqual(1, self.metrics.to_dict()['GET /ports']['count'])
+
+    def test_export(self):
+        self._timing('GET', '/ports', 0.05)
+        exported = []
+        self.metrics.export(exported.append)
+        self.assertEqual([self.metrics.openmetrics()], exported)
+
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'neutronclient.prom')
+        exporter = metrics.PeriodicExporter(self.metrics, path,
+                                            interval=3600).start()
+        exporter.stop()
+        with open(path) as f:
+            self.assertEqual(self.metrics.openmetrics(), f.read())
+        self.assertEqual(0o644, stat.S_IMODE(os.stat(path).st_mode))
+        self.assertEqual(['neutronclient.prom'],
+                         os.listdir(os.path.dirname(path)))
+
+
+class TestClientMetrics(test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestClientMetrics, self).setUp()
+        self.timings = []
+        self.metrics = metrics.Metrics(callbacks=[self.timings.append])
+
+    def test_phases(self):
+        client = self.create_client(
+            metrics=self.metrics, limiter=limiter.Limiter(concurrency=1))
+        self.requests.get(test_client.PORTS_URL + '/' + PORT_ID,
+                          json={'port': {'id': PORT_ID}})
+        client.show_port(PORT_ID)
+        timing, = self.timings
+        self.assertEqual('/ports/%s', timing.template)
+        self.assertEqual(200, timing.status_code)
+        self.assertEqual({'queue_wait', 'ttfb', 'body_read', 'deserialize'},
+                         set(timing.phases))
+        self.assertIn(
+            'neutronclient_requests_total{method="GET",path="/ports/%s",'
+            'status="200"} 1', self.metrics.openmetrics().splitlines())
+
+    def test_error(self):
+        client = self.create_client(metrics=self.metrics)
+        self.requests.get(test_client.PORTS_URL + '/' + PORT_ID,
+                          status_code=404,
+                          json={'NeutronError': {'type': 'PortNotFound',
+                                                 'message': 'not found',
+                                                 'detail': ''}})
+        self.assertRaises(exceptions.PortNotFoundClient,
+                          client.show_port, PORT_ID)
+        timing, = self.timings
+        self.assertEqual(404, timing.status_code)
+        self.assertEqual('PortNotFoundClient', timing.error)
+
+
+class TestConnectMetrics(testtools.TestCase):
+
+    def _server(self, body):
+        data = jsonutils.dump_as_bytes(body)
+
+        class Handler(server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        httpd = server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        return 'http://127.0.0.1:%d' % httpd.server_address[1]
+
+    def test_connect_once(self):
+        timings = []
+        neutron = client.Client(
+            token='token', endpoint_url=self._server({'networks': []}),
+            metrics=metrics.Metrics(callbacks=[timings.append]))
+        neutron.list_networks()
+        neutron.list_networks()
+        self.assertIn('connect', timings[0].phases)
+        self.assertNotIn('connect', timings[1].phases)
+        self.assertLessEqual(timings[0].phases['connect'],
+                             timings[0].phases['ttfb'])
@@ -0,0 +1,131 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import argparse
+import io
+from unittest import mock
+import urllib.parse as urlparse
+
+from oslo_serialization import jsonutils
+import requests
+import testtools
+
+from neutronclient.common import paging
+from neutronclient.neutron import v2_0 as neutronV20
+from neutronclient.neutron.v2_0 import network
+from neutronclient.tests.unit import test_client
+
+
+class TestAdaptivePageSize(testtools.TestCase):
+
+    def test_grows_toward_target_time(self):
+        pager = paging.AdaptivePageSize(initial=100, target_time=1.0)
+        # 1ms per resource, 1000 resources fit in the target time.
+        self.assertEqual(200, pager.record(100, 100, 0.1))
+        self.assertEqual(400, pager.record(200, 200, 0.2))
+        self.assertEqual(800, pager.record(400, 400, 0.4))
+        self.assertEqual(1000, pager.record(800, 800, 0.8))
+
+    def test_shrinks_slow_pages(self):
+        pager = paging.AdaptivePageSize(initial=1000, target_time=1.0)
+        self.assertEqual(500, pager.record(1000, 1000, 10.0))
+
+    def test_memory_budget(self):
+        pager = paging.AdaptivePageSize(initial=100, max_bytes=150 * 1000)
+        self.assertEqual(150, pager.record(100, 100, 0.01, 1000))
+
+    def test_bounds_and_partial_pages(self):
+        pager = paging.AdaptivePageSize(initial=100, min_size=50,
+                                        max_size=150)
+        self.assertEqual(150, pager.record(100, 100, 0.001))
+        self.assertEqual(150, pager.record(150, 3, 10.0))
+        self.assertEqual(75, pager.record(150, 150, 100.0))
+        self.assertTrue(pager.shrink())
+        self.assertEqual(50, pager.limit)
+        self.assertFalse(pager.shrink())
+
+
+class TestAdaptiveList(test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestAdaptiveList, self).setUp()
+        self.ports = [{'id': '%04d' % i} for i in range(100)]
+        self.limits = []
+
+    def _list(self, request, context):
+        query = urlparse.parse_qs(request.query)
+        self.assertNotIn('pager', query)
+        limit = int(query['limit'][0])
+        self.limits.append(limit)
+        ports = [p for p in self.ports
+                 if p['id'] > query.get('marker', [''])[0]]
+        body = {'ports': ports[:limit]}
+        if len(ports) > limit:
+            body['ports_links'] = [{
+                'rel': 'next', 'href': '%s?limit=%d&marker=%s' % (
+                    test_client.PORTS_URL, limit, ports[limit - 1]['id'])}]
+        return jsonutils.dumps(body)
+
+    def test_page_size_is_adapted(self):
+        self.requests.get(test_client.PORTS_URL, text=self._list)
+        pager = paging.AdaptivePageSize(initial=10, min_size=5)
+
+        ports = self.client.list_ports(adaptive_page_size=pager)
+        self.assertEqual(self.ports, ports['ports'])
+        # Local requests are fast, the pages double every time.
+        self.assertEqual([10, 20, 40, 80], self.limits)
+
+    def test_stream_page_size_is_adapted(self):
+        self.requests.get(test_client.PORTS_URL, text=self._list)
+        pager = paging.AdaptivePageSize(initial=10, min_size=5)
+
+        ports = self.client.list_ports(stream=True, adaptive_page_size=pager)
+        self.assertEqual(self.ports, ports['ports'])
+        self.assertEqual([10, 20, 40, 80], self.limits)
+        self.assertEqual(4, pager.pages)
+
+    def test_timeout_shrinks_page(self):
+        self.requests.get(test_client.PORTS_URL, [
+            {'exc': requests.exceptions.ReadTimeout},
+            {'text': self._list}])
+        neutron = self.create_client(adaptive_page_size=True)
+
+        pages = list(neutron.list_ports(retrieve_all=False))
+        self.assertEqual(self.ports, sum((p['ports'] for p in pages), []))
+        self.assertEqual(paging.DEFAULT_INITIAL_SIZE // 2, self.limits[0])
+
+    def test_cli_page_size_auto(self):
+        parser = argparse.ArgumentParser()
+        neutronV20.add_pagination_argument(parser)
+        self.assertEqual('auto',
+                         parser.parse_args(['-P', 'auto']).page_size)
+        self.assertEqual(10, parser.parse_args(['-P', '10']).page_size)
+
+    def test_net_list_page_size_auto(self):
+        networks = self.requests.get(
+            test_client.END_URL + '/v2.0/networks',
+            json={'networks': [{'id': 'n1', 'name': 'net',
+                                'subnets': ['s1']}]})
+        subnets = self.requests.get(
+            test_client.END_URL + '/v2.0/subnets',
+            json={'subnets': [{'id': 's1', 'cidr': '10.0.0.0/24'}]})
+        app = mock.Mock(stdout=io.StringIO())
+        app.client_manager.neutron = self.client
+        cmd = network.ListNetwork(app, None)
+        parsed_args = cmd.get_parser('net-list').parse_args(
+            ['--page-size', 'auto'])
+        columns, rows = cmd.take_action(parsed_args)
+        self.assertEqual(1, len(list(rows)))
+        for request in (networks.last_request, subnets.last_request):
+            query = urlparse.parse_qs(request.query)
+            self.assertEqual([str(paging.DEFAULT_INITIAL_SIZE)],
+                             query['limit'])
@@ -0,0 +1,137 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+from unittest import mock
+
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import metrics
+from neutronclient.common import prefetch
+from neutronclient.tests.unit import test_client
+from neutronclient.v2_0 import client
+
+
+class TestPrefetcher(testtools.TestCase):
+
+    def _wait_for(self, predicate):
+        for _ in range(500):
+            if predicate():
+                return
+            time.sleep(0.002)
+        self.fail('timed out')
+
+    def test_order_and_depth(self):
+        produced = []
+
+        def _items():
+            for i in range(6):
+                produced.append(i)
+                yield i
+
+        items = iter(prefetch.Prefetcher(_items(), depth=2))
+        self.assertEqual(0, next(items))
+        # Item 0 was consumed, 1 and 2 are buffered.
+        self._wait_for(lambda: len(produced) == 3)
+        time.sleep(0.02)
+        self.assertEqual(3, len(produced))
+        self.assertEqual([1, 2, 3, 4, 5], list(items))
+
+    def test_max_bytes(self):
+        produced = []
+
+        def _items():
+            for i in range(4):
+                produced.append(i)
+                yield 'x' * 10
+
+        items = iter(prefetch.Prefetcher(_items(), depth=3, max_bytes=10))
+        next(items)
+        self._wait_for(lambda: len(produced) == 2)
+        time.sleep(0.02)
+        self.assertEqual(2, len(produced))
+        self.assertEqual(3, len(list(items)))
+
+    def test_error_is_raised_in_order(self):
+        def _items():
+            yield 1
+            raise ValueError('boom')
+
+        items = iter(prefetch.Prefetcher(_items()))
+        self.assertEqual(1, next(items))
+        self.assertRaises(ValueError, next, items)
+
+    def test_stop_closes_the_iterator(self):
+        closed = threading.Event()
+
+        def _items():
+            try:
+                for i in range(100):
+                    yield i
+            finally:
+                closed.set()
+
+        items = iter(prefetch.Prefetcher(_items()))
+        next(items)
+        items.close()
+        self.assertTrue(closed.wait(5))
+
+    def test_invalid_depth(self):
+        self.assertRaises(ValueError, prefetch.Prefetcher, [], depth=0)
+
+
+class TestPrefetchedList(test_client.ClientTestBase):
+
+    PAGES = [[{'id': '1'}, {'id': '2'}], [{'id': '3'}], [{'id': '4'}]]
+
+    def test_list_prefetch(self):
+        self.register_pages('ports', test_client.PORTS_URL, self.PAGES)
+
+        pages = self.client.list_ports(retrieve_all=False, prefetch=2)
+        self.assertEqual(self.PAGES, [p['ports'] for p in pages])
+        self.assertEqual(['req-0', 'req-1', 'req-2'], pages.request_ids)
+
+    def test_request_timing(self):
+        self.register_pages('ports', test_client.PORTS_URL, self.PAGES)
+        collector = metrics.Metrics()
+        neutron = self.create_client(metrics=collector)
+
+        with collector.request('GET', '/ports') as timing:
+            pages = neutron.list_ports(retrieve_all=False, prefetch=1)
+            self.assertEqual(3, len(list(pages)))
+        # The pages fetched ahead are counted in the caller's request.
+        self.assertIn('deserialize', timing.phases)
+        self.assertEqual([1], [h['count']
+                               for h in collector.to_dict().values()])
+
+    def test_client_default(self):
+        self.register_pages('ports', test_client.PORTS_URL, self.PAGES)
+        neutron = self.create_client(prefetch=1, prefetch_max_bytes=1024)
+
+        pages = neutron.list_ports(retrieve_all=False)
+        self.assertEqual(1, pages.prefetch)
+        self.assertEqual(1024, pages.prefetch_max_bytes)
+        self.assertEqual(self.PAGES, [p['ports'] for p in pages])
+
+    def test_pages_weighed_by_received_body(self):
+        # Whitespace the server sent counts, re-serializing would drop it.
+        body = jsonutils.dumps({'ports': self.PAGES[0]}, indent=4)
+        self.requests.get(test_client.PORTS_URL, text=body)
+
+        with mock.patch.object(client, '_json_size',
+                               side_effect=jsonutils.dump_as_bytes) as size:
+            pages = self.client.list_ports(retrieve_all=False, prefetch=2,
+                                           prefetch_max_bytes=1024)
+            self.assertEqual([len(body)], [p.body_size for p in pages])
+        size.assert_not_called()
@@ -0,0 +1,124 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import gc
+import operator
+import pickle
+import tracemalloc
+
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import records
+from neutronclient.tests.unit import test_client
+
+
+def _port(i):
+    return {'id': '%08d-0000-0000-0000-000000000000' % i,
+            'name': '',
+            'network_id': 'network-%d' % (i % 10),
+            'tenant_id': 'project-%d' % (i % 50),
+            'project_id': 'project-%d' % (i % 50),
+            'device_owner': 'compute:nova',
+            'device_id': 'device-%d' % i,
+            'admin_state_up': True,
+            'status': 'ACTIVE',
+            'mac_address': 'fa:16:3e:%06x' % i,
+            'binding:vnic_type': 'normal',
+            'security_groups': ['default-%d' % (i % 50)],
+            'fixed_ips': [{'subnet_id': 'subnet-%d' % (i % 10),
+                           'ip_address': '10.0.%d.%d' % (i // 250,
+                                                         i % 250)}],
+            'tags': [],
+            'revision_number': 1}
+
+
+def _allocated(build):
+    """Return the memory allocated by the objects build returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        value = build()
+        gc.collect()
+        return value, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def _compact_all(resources):
+    compactor = records.Compactor()
+    return [compactor.compact(r) for r in resources]
+
+
+class TestRecords(testtools.TestCase):
+
+    def setUp(self):
+        super(TestRecords, self).setUp()
+        self.compactor = records.Compactor()
+
+    def test_mapping(self):
+        port = _port(1)
+        record = self.compactor.compact(port)
+        self.assertEqual(port['network_id'], record['network_id'])
+        self.assertEqual(port['fixed_ips'][0]['ip_address'],
+                         record['fixed_ips'][0]['ip_address'])
+        self.assertEqual(list(port), list(record))
+        self.assertEqual(port, record.to_dict())
+        self.assertIn('status', record)
+        self.assertIsNone(record.get('missing'))
+        self.assertRaises(KeyError, record.__getitem__, 'missing')
+        self.assertRaises(TypeError, operator.setitem, record, 'status',
+                          'DOWN')
+
+    def test_shared_schema_and_strings(self):
+        first = self.compactor.compact(_port(1))
+        second = self.compactor.compact(jsonutils.loads(
+            jsonutils.dumps(_port(11))))
+        self.assertIs(first._schema, second._schema)
+        self.assertIs(first['device_owner'], second['device_owner'])
+        self.assertIs(first['fixed_ips'][0]._schema,
+                      second['fixed_ips'][0]._schema)
+
+    def test_serialization(self):
+        record = self.compactor.compact(_port(1))
+        self.assertEqual(_port(1), jsonutils.loads(jsonutils.dumps(record)))
+        self.assertEqual(record, pickle.loads(pickle.dumps(record)))
+
+    def test_memory_savings(self):
+        payload = jsonutils.dumps([_port(i) for i in range(5000)])
+        dicts, dicts_size = _allocated(lambda: jsonutils.loads(payload))
+        compacted, compact_size = _allocated(
+            lambda: _compact_all(jsonutils.loads(payload)))
+        self.assertEqual(len(dicts), len(compacted))
+        # Around 40% of the memory of the dicts with CPython 3.11.
+        self.assertLess(compact_size, dicts_size * 0.6)
+
+
+class TestCompactList(test_client.ClientTestBase):
+
+    PAGES = [[_port(1), _port(2)], [_port(3)]]
+
+    def test_list_compact(self):
+        self.register_pages('ports', test_client.PORTS_URL, self.PAGES)
+        ports = self.client.list_ports(compact=True)
+        self.assertEqual(['req-0', 'req-1'], ports.request_ids)
+        self.assertEqual([_port(1), _port(2), _port(3)],
+                         [p.to_dict() for p in ports['ports']])
+        self.assertIsInstance(ports['ports'][0], records.Record)
+        self.assertIs(ports['ports'][0]._schema, ports['ports'][2]._schema)
+
+    def test_list_stream_compact(self):
+        self.register_pages('ports', test_client.PORTS_URL, self.PAGES)
+        ports = self.client.list_ports(stream=True, compact=True)
+        self.assertEqual(3, len(ports['ports']))
+        self.assertIsInstance(ports['ports'][2], records.Record)
@@ -0,0 +1,182 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import urllib.parse as urlparse
+
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import resolution_cache
+from neutronclient.neutron import v2_0 as neutronV20
+from neutronclient.tests.unit import test_client
+
+NET_ID = '11111111-1111-1111-1111-111111111111'
+NETWORKS_URL = test_client.END_URL + '/v2.0/networks'
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResolutionCache(testtools.TestCase):
+
+    def setUp(self):
+        super(TestResolutionCache, self).setUp()
+        self.clock = FakeClock()
+        self.cache = resolution_cache.ResolutionCache(
+            ttl=10, max_entries=2, negative_ttl=1, clock=self.clock)
+
+    def test_ttl(self):
+        self.cache.set('a', 'id-a')
+        self.assertEqual('id-a', self.cache.get('a'))
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_lru(self):
+        self.cache.set('a', 'id-a')
+        self.cache.set('b', 'id-b')
+        self.cache.get('a')
+        self.cache.set('c', 'id-c')
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual('id-a', self.cache.get('a'))
+        self.assertEqual(1, self.cache.to_dict()['evictions'])
+
+    def test_negative(self):
+        self.cache.set_missing('a', 'not found')
+        self.assertEqual('not found', self.cache.get('a').message)
+        self.clock.now = 1
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_negative_disabled(self):
+        cache = resolution_cache.ResolutionCache()
+        cache.set_missing('a', 'not found')
+        self.assertIsNone(cache.get('a'))
+
+    def test_invalidate(self):
+        self.cache.set('a', 'id-a')
+        self.cache.set_missing('b', 'not found')
+        self.cache.invalidate_path('/networks/id-a/tags')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('b'))
+        self.cache.invalidate_missing()
+        self.assertIsNone(self.cache.get('b'))
+
+    def test_invalidate_names(self):
+        keys = [('s', 'policy', 'qos_policy', name, None, None)
+                for name in ('id-a', 'b')]
+        plural = {'policy': 'policies', 'qos_policy': 'qos_policies'}.get
+        for key in keys:
+            self.cache.set(key, 'id-a')
+        self.cache.invalidate_names('/networks', plural)
+        self.assertEqual(['id-a', 'id-a'],
+                         [self.cache.get(key) for key in keys])
+        self.cache.invalidate_names('/qos/policies', plural)
+        # Ids resolve to themselves whatever the names.
+        self.assertEqual(['id-a', None],
+                         [self.cache.get(key) for key in keys])
+
+
+class TestClientResolutionCache(test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestClientResolutionCache, self).setUp()
+        self.networks = [{'id': NET_ID, 'name': 'net'}]
+        self.lists = self.requests.get(NETWORKS_URL, text=self._list)
+        self.cache = resolution_cache.ResolutionCache(negative_ttl=60)
+        self.client = self.create_client(resolution_cache=self.cache)
+
+    def _list(self, request, context):
+        query = urlparse.parse_qs(request.query)
+        networks = [n for n in self.networks
+                    if n['name'] in query.get('name', [n['name']]) and
+                    n['id'] in query.get('id', [n['id']])]
+        return jsonutils.dumps({'networks': networks})
+
+    def _resolve(self, name):
+        return neutronV20.find_resourceid_by_name_or_id(self.client,
+                                                        'network', name)
+
+    def test_resolution_is_cached(self):
+        self.assertEqual(NET_ID, self._resolve('net'))
+        self.assertEqual(NET_ID, self._resolve('net'))
+        self.assertEqual(1, self.lists.call_count)
+        # Other fields are not cached.
+        self.client.find_resource('network', 'net', fields='name')
+        self.assertEqual(2, self.lists.call_count)
+
+    def test_delete_invalidates(self):
+        self.requests.delete(NETWORKS_URL + '/' + NET_ID, status_code=204)
+        self._resolve('net')
+        self.client.delete_network(NET_ID)
+        self.networks = []
+        self.assertRaises(exceptions.NotFound, self._resolve, 'net')
+
+    def test_rename_invalidates(self):
+        self.requests.put(NETWORKS_URL + '/' + NET_ID,
+                          text=jsonutils.dumps({'network': {}}))
+        self._resolve('net')
+        self.client.update_network(NET_ID, {'network': {'name': 'other'}})
+        self.networks[0]['name'] = 'other'
+        self.assertRaises(exceptions.NotFound, self._resolve, 'net')
+
+    def test_negative_caching(self):
+        self.requests.post(NETWORKS_URL,
+                           text=jsonutils.dumps({'network': {}}))
+        self.assertRaises(exceptions.NotFound, self._resolve, 'new')
+        calls = self.lists.call_count
+        self.assertRaises(exceptions.NotFound, self._resolve, 'new')
+        self.assertEqual(calls, self.lists.call_count)
+        # Creating a resource drops the negative entries.
+        self.client.create_network({'network': {'name': 'new'}})
+        self.networks.append({'id': NET_ID.replace('1', '2'),
+                              'name': 'new'})
+        self.assertEqual(NET_ID.replace('1', '2'), self._resolve('new'))
+
+    def test_create_drops_names(self):
+        self.requests.post(NETWORKS_URL,
+                           text=jsonutils.dumps({'network': {}}))
+        self._resolve('net')
+        self.client.create_network({'network': {'name': 'net'}})
+        self.networks.append({'id': NET_ID.replace('1', '2'),
+                              'name': 'net'})
+        self.assertRaises(exceptions.NeutronClientNoUniqueMatch,
+                          self._resolve, 'net')
+
+    def test_rename_drops_missing(self):
+        self.requests.put(NETWORKS_URL + '/' + NET_ID,
+                          text=jsonutils.dumps({'network': {}}))
+        self.assertRaises(exceptions.NotFound, self._resolve, 'other')
+        self.client.update_network(NET_ID, {'network': {'name': 'other'}})
+        self.networks[0]['name'] = 'other'
+        self.assertEqual(NET_ID, self._resolve('other'))
+
+    def test_not_shared_between_tokens(self):
+        self._resolve('net')
+        other = test_client.client.Client(
+            token='other-token', endpoint_url=test_client.END_URL,
+            resolution_cache=self.cache)
+        self.networks = []
+        self.assertRaises(exceptions.NotFound,
+                          neutronV20.find_resourceid_by_name_or_id,
+                          other, 'network', 'net')
+        self.assertEqual(NET_ID, self._resolve('net'))
+
+    def test_shared_cache(self):
+        client = self.create_client(resolution_cache=True)
+        self.assertIs(resolution_cache.shared_cache(),
+                      client.resolution_cache)
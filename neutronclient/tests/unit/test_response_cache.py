@@ -0,0 +1,227 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import time
+
+import fixtures
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import auth_cache
+from neutronclient.common import response_cache
+from neutronclient.osc import plugin
+from neutronclient.tests.unit import test_client
+
+PORT_URL = test_client.PORTS_URL + '/p1'
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(testtools.TestCase):
+
+    def setUp(self):
+        super(TestResponseCache, self).setUp()
+        self.clock = FakeClock()
+
+    def test_ttl(self):
+        cache = response_cache.ResponseCache(ttl=10, clock=self.clock)
+        cache.set('k', '/ports/p1', {'port': {'id': 'p1'}})
+        value, fresh = cache.get('k')
+        self.assertTrue(fresh)
+        value['port']['id'] = 'changed'
+        self.assertEqual('p1', cache.get('k')[0]['port']['id'])
+        self.clock.now += 10
+        self.assertIsNone(cache.get('k'))
+        self.assertEqual(2, cache.to_dict()['hits'])
+        self.assertEqual(1, cache.to_dict()['misses'])
+
+    def test_stale_entries_are_kept_for_revalidation(self):
+        cache = response_cache.ResponseCache(ttl=10, revalidate=True,
+                                             stale_ttl=5, clock=self.clock)
+        cache.set('k', '/ports/p1', {'port': {}})
+        self.clock.now += 12
+        self.assertFalse(cache.get('k')[1])
+        cache.refresh('k')
+        self.assertTrue(cache.get('k')[1])
+        self.clock.now += 15
+        self.assertIsNone(cache.get('k'))
+
+    def test_lru_eviction(self):
+        cache = response_cache.ResponseCache(max_entries=2)
+        cache.set('a', '/a', {})
+        cache.set('b', '/b', {})
+        cache.get('a')
+        cache.set('c', '/c', {})
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(1, cache.to_dict()['evictions'])
+
+    def test_size_bound(self):
+        cache = response_cache.ResponseCache(max_bytes=100)
+        cache.set('a', '/a', {'x': 'y' * 60})
+        cache.set('b', '/b', {'x': 'y' * 60})
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(1, cache.to_dict()['entries'])
+
+    def test_invalidate(self):
+        cache = response_cache.ResponseCache()
+        for path in ('/ports', '/ports/p1', '/ports/p2', '/networks'):
+            cache.set(path, path, {})
+        cache.invalidate('/ports/p1')
+        self.assertEqual(['/networks', '/ports/p2'],
+                         sorted(k for k in ('/ports', '/ports/p1',
+                                            '/ports/p2', '/networks')
+                                if cache.get(k)))
+
+    def test_entries_are_scoped(self):
+        cache = response_cache.ResponseCache()
+        cache.set('a', '/ports', {'ports': []}, scope='token-1')
+        self.assertIsNone(cache.get('a', scope='token-2'))
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(({'ports': []}, True),
+                         cache.get('a', scope='token-1'))
+
+    def test_plugin_ttl(self):
+        self.useFixture(fixtures.EnvironmentVariable(
+            'NEUTRONCLIENT_RESPONSE_CACHE_TTL', 'soon'))
+        self.assertIsNone(plugin._make_response_cache())
+        self.useFixture(fixtures.EnvironmentVariable(
+            'XDG_CACHE_HOME', self.useFixture(fixtures.TempDir()).path))
+        self.useFixture(fixtures.EnvironmentVariable(
+            'NEUTRONCLIENT_RESPONSE_CACHE_TTL', '30'))
+        self.assertEqual(30, plugin._make_response_cache().ttl)
+
+    def test_disk_tier(self):
+        directory = self.useFixture(fixtures.TempDir()).path
+        cache = response_cache.ResponseCache(directory=directory)
+        key = ('GET', '/ports/p1', (), ())
+        cache.set(key, '/ports/p1', {'port': {'id': 'p1'}}, scope='s')
+
+        other = response_cache.ResponseCache(directory=directory)
+        self.assertIsNone(other.get(key, scope='other'))
+        self.assertEqual(({'port': {'id': 'p1'}}, True),
+                         other.get(key, scope='s'))
+        self.assertEqual(1, other.to_dict()['disk_hits'])
+
+        other.invalidate('/ports/p2', scope='s')
+        self.assertIsNone(
+            response_cache.ResponseCache(directory=directory).get(
+                key, scope='s'))
+
+    def _disk_set(self, cache, paths):
+        for age, path in enumerate(paths):
+            cache.set(path, path, {'x': 'y' * 60}, scope='s')
+            # Order the files by age whatever the timestamp resolution.
+            name = cache._disk_key('s', path) + auth_cache.SUFFIX
+            mtime = time.time() - 10 + age
+            os.utime(os.path.join(cache.directory, name), (mtime, mtime))
+
+    def _disk_paths(self, directory, paths):
+        cache = response_cache.ResponseCache(directory=directory)
+        return [p for p in paths if cache.get(p, scope='s')]
+
+    def test_disk_entries_have_their_own_file(self):
+        directory = self.useFixture(fixtures.TempDir()).path
+        cache = response_cache.ResponseCache(directory=directory)
+        paths = ['/ports', '/ports/p1', '/networks']
+        self._disk_set(cache, paths)
+        self.assertEqual(3, len(os.listdir(directory)))
+
+        cache.invalidate('/ports/p2', scope='s')
+        self.assertEqual(['/networks'], self._disk_paths(directory, paths))
+        cache.set('/ports', '/ports', {}, scope='s')
+        self.assertEqual(['/ports', '/networks'],
+                         self._disk_paths(directory, paths))
+
+    def test_disk_bounds(self):
+        directory = self.useFixture(fixtures.TempDir()).path
+        paths = ['/a', '/b', '/c']
+        cache = response_cache.ResponseCache(directory=directory,
+                                             max_entries=2)
+        self._disk_set(cache, paths)
+        self.assertEqual(['/b', '/c'], self._disk_paths(directory, paths))
+
+        size = os.path.getsize(os.path.join(
+            directory, cache._disk_key('s', '/c') + auth_cache.SUFFIX))
+        cache = response_cache.ResponseCache(directory=directory,
+                                             max_bytes=2 * size)
+        cache.set('/d', '/d', {}, scope='s')
+        self.assertEqual(['/c'], self._disk_paths(directory, paths))
+
+
+class TestClientResponseCache(test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestClientResponseCache, self).setUp()
+        self.clock = FakeClock()
+        self.cache = response_cache.ResponseCache(
+            ttl=10, revalidate=True, clock=self.clock)
+        self.client = self.create_client(response_cache=self.cache)
+
+    def _port(self, revision=1, **fields):
+        return {'port': dict({'id': 'p1', 'revision_number': revision},
+                             **fields)}
+
+    def test_show_is_cached(self):
+        port = self.requests.get(PORT_URL, text=jsonutils.dumps(
+            self._port(name='a')), headers={'X-OpenStack-Request-ID': 'r'})
+        first = self.client.show_port('p1')
+        second = self.client.show_port('p1')
+        self.assertEqual(first, second)
+        self.assertEqual(['r'], second.request_ids)
+        self.assertEqual(1, port.call_count)
+
+    def test_not_shared_between_tokens(self):
+        port = self.requests.get(PORT_URL,
+                                 text=jsonutils.dumps(self._port()))
+        self.client.show_port('p1')
+        other = test_client.client.Client(
+            token='other-token', endpoint_url=test_client.END_URL,
+            response_cache=self.cache)
+        other.show_port('p1')
+        self.client.show_port('p1')
+        self.assertEqual(2, port.call_count)
+
+    def test_write_invalidates(self):
+        port = self.requests.get(PORT_URL,
+                                 text=jsonutils.dumps(self._port()))
+        self.requests.put(PORT_URL, text=jsonutils.dumps(self._port(2)))
+        self.client.show_port('p1')
+        self.client.update_port('p1', {'port': {'name': 'b'}})
+        self.client.show_port('p1')
+        self.assertEqual(2, port.call_count)
+
+    def test_revalidation(self):
+        port = self.requests.get(PORT_URL, [
+            {'text': jsonutils.dumps(self._port(name='a'))},
+            {'text': jsonutils.dumps(self._port())},
+            {'text': jsonutils.dumps(self._port(2))},
+            {'text': jsonutils.dumps(self._port(2, name='b'))}])
+        self.client.show_port('p1')
+
+        self.clock.now += 11
+        self.assertEqual('a', self.client.show_port('p1')['port']['name'])
+        self.assertEqual('fields=id&fields=revision_number',
+                         self.requests.last_request.query)
+        self.assertEqual(1, self.cache.to_dict()['revalidated'])
+
+        self.clock.now += 11
+        self.assertEqual('b', self.client.show_port('p1')['port']['name'])
+        self.assertEqual(4, port.call_count)
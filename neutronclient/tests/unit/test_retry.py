@@ -0,0 +1,147 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+from unittest import mock
+
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import retry
+from neutronclient.tests.unit import test_client
+
+UNAVAILABLE = {'status_code': 503, 'text': jsonutils.dumps(
+    {'NeutronError': {'type': 'ServiceUnavailable', 'message': 'busy',
+                      'detail': ''}})}
+
+
+class TestRetryPolicy(testtools.TestCase):
+
+    def test_parse_retry_after(self):
+        now = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        self.assertEqual(3.0, retry.parse_retry_after('3'))
+        self.assertEqual(10.0, retry.parse_retry_after(
+            'Wed, 01 Jan 2020 00:00:10 GMT', now=now))
+        self.assertEqual(0.0, retry.parse_retry_after(
+            'Tue, 31 Dec 2019 00:00:00 GMT', now=now))
+        self.assertIsNone(retry.parse_retry_after('soon'))
+        self.assertIsNone(retry.parse_retry_after(None))
+
+    def test_exponential_backoff(self):
+        policy = retry.RetryPolicy(backoff_base=1, backoff_factor=2,
+                                   backoff_max=5, jitter=False)
+        self.assertEqual([1, 2, 4, 5],
+                         [policy.compute_backoff(i) for i in range(4)])
+
+    def test_full_jitter(self):
+        policy = retry.RetryPolicy(backoff_base=1, backoff_factor=2)
+        for i in range(20):
+            self.assertTrue(0 <= policy.compute_backoff(2) <= 4)
+
+    def test_max_retries(self):
+        policy = retry.RetryPolicy(max_retries=2, jitter=False)
+        state = policy.start()
+        exc = exceptions.ConnectionFailed(reason='down')
+        self.assertEqual(0.5, state.next_delay(exc))
+        self.assertEqual(1.0, state.next_delay(exc))
+        self.assertIsNone(state.next_delay(exc))
+        self.assertEqual(3, state.attempts)
+        self.assertEqual({'calls': 1, 'attempts': 3, 'retries': 2,
+                          'exhausted': 1, 'backoff_time': 1.5},
+                         policy.stats.to_dict())
+
+    def test_retryable(self):
+        policy = retry.RetryPolicy()
+        self.assertTrue(policy.is_retryable(exceptions.TooManyRequests()))
+        self.assertTrue(policy.is_retryable(
+            exceptions.ServiceUnavailable()))
+        self.assertFalse(policy.is_retryable(exceptions.NotFound()))
+        self.assertFalse(policy.is_retryable(ValueError()))
+        self.assertFalse(retry.RetryPolicy.fixed(3, 1).is_retryable(
+            exceptions.ServiceUnavailable()))
+
+    def test_retry_after_takes_precedence(self):
+        state = retry.RetryPolicy(jitter=False).start()
+        exc = exceptions.TooManyRequests()
+        exc.retry_after = 7.0
+        self.assertEqual(7.0, state.next_delay(exc))
+
+    def test_retry_after_is_capped(self):
+        state = retry.RetryPolicy(backoff_max=5, jitter=False).start()
+        exc = exceptions.TooManyRequests()
+        exc.retry_after = 3600.0
+        self.assertEqual(5, state.next_delay(exc))
+
+    def test_deadline(self):
+        state = retry.RetryPolicy(deadline=1, jitter=False).start()
+        exc = exceptions.ServiceUnavailable()
+        exc.retry_after = 2.0
+        self.assertIsNone(state.next_delay(exc))
+
+
+class TestClientRetry(test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestClientRetry, self).setUp()
+        self.sleep = mock.Mock()
+        self.policy = retry.RetryPolicy(max_retries=2, jitter=False,
+                                        sleep=self.sleep)
+        self.client = self.create_client(retry_policy=self.policy)
+
+    def test_retry_on_unavailable(self):
+        ports = self.requests.get(test_client.PORTS_URL, [
+            dict(UNAVAILABLE, headers={'Retry-After': '3'}),
+            {'text': jsonutils.dumps({'ports': []})}])
+
+        self.assertEqual({'ports': []}, self.client.list_ports())
+        self.assertEqual(2, ports.call_count)
+        self.sleep.assert_called_once_with(3.0)
+
+    def test_retries_exhausted(self):
+        ports = self.requests.get(test_client.PORTS_URL, **UNAVAILABLE)
+
+        e = self.assertRaises(exceptions.ServiceUnavailable,
+                              self.client.list_ports)
+        self.assertEqual(503, e.status_code)
+        self.assertEqual(3, ports.call_count)
+        self.assertEqual([mock.call(0.5), mock.call(1.0)],
+                         self.sleep.call_args_list)
+
+    def test_post_is_not_retried(self):
+        ports = self.requests.post(test_client.PORTS_URL, **UNAVAILABLE)
+
+        self.assertRaises(exceptions.ServiceUnavailable,
+                          self.client.create_port, {'port': {}})
+        self.assertEqual(1, ports.call_count)
+        self.sleep.assert_not_called()
+
+    def test_too_many_requests(self):
+        self.requests.get(test_client.PORTS_URL, status_code=429,
+                          headers={'Retry-After': '1'}, text='slow down')
+        e = self.assertRaises(exceptions.TooManyRequests,
+                              self.client.list_ports)
+        self.assertEqual(1.0, e.retry_after)
+
+    @mock.patch('time.sleep')
+    def test_default_policy_keeps_legacy_behaviour(self, sleep):
+        neutron = self.create_client(retries=2, raise_errors=False)
+        neutron.retry_interval = 4
+        ports = self.requests.get(test_client.PORTS_URL,
+                                  exc=exceptions.ConnectionFailed)
+
+        e = self.assertRaises(exceptions.ConnectionFailed,
+                              neutron.list_ports)
+        self.assertIn('after 3 attempts', str(e))
+        self.assertEqual(3, ports.call_count)
+        self.assertEqual([mock.call(4), mock.call(4)],
+                         sleep.call_args_list)
@@ -0,0 +1,60 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_serialization import jsonutils
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import serializer
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestJSONCollectionDecoder(testtools.TestCase):
+
+    DOC = {'count': 12345,
+           'ports': [{'id': str(i), 'name': u'pért-%d' % i,
+                      'fixed_ips': [{'ip_address': '10.0.0.%d' % i}]}
+                     for i in range(10)],
+           'ports_links': [{'rel': 'next', 'href': 'http://n/ports?m=9'}]}
+
+    def _decode(self, data, collection='ports'):
+        decoder = serializer.JSONCollectionDecoder(data, collection)
+        return list(decoder), decoder.extra
+
+    def test_decode_any_chunk_size(self):
+        data = jsonutils.dump_as_bytes(self.DOC)
+        for size in (1, 2, 5, 64, len(data)):
+            items, extra = self._decode(_chunks(data, size))
+            self.assertEqual(self.DOC['ports'], items)
+            self.assertEqual({'count': 12345,
+                              'ports_links': self.DOC['ports_links']}, extra)
+
+    def test_decode_str_chunks(self):
+        items, extra = self._decode(_chunks(jsonutils.dumps(self.DOC), 7))
+        self.assertEqual(self.DOC['ports'], items)
+
+    def test_decode_empty_collection(self):
+        self.assertEqual(([], {}), self._decode([b'{"ports": [ ]}']))
+        self.assertEqual(([], {}), self._decode([b' { } ']))
+
+    def test_other_collection_is_kept_in_extra(self):
+        items, extra = self._decode([b'{"networks": [1, 2]}'])
+        self.assertEqual([], items)
+        self.assertEqual({'networks': [1, 2]}, extra)
+
+    def test_malformed(self):
+        for data in (b'', b'[1]', b'{"ports": [{"id": 1}', b'{"ports" 1}'):
+            self.assertRaises(exceptions.MalformedResponseBody,
+                              self._decode, [data])
@@ -0,0 +1,137 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import urllib.parse as urlparse
+
+from oslo_serialization import jsonutils
+import requests_mock
+import testtools
+
+from neutronclient.common import sharding
+from neutronclient.tests.unit import test_client
+
+
+class TestSharding(testtools.TestCase):
+
+    def test_boundaries(self):
+        self.assertEqual([(0, 3), (3, 6), (6, 10)],
+                         sharding.boundaries(list(range(10)), 3))
+        self.assertEqual([(0, 1), (1, 2)],
+                         sharding.boundaries(['a', 'b'], 5))
+        self.assertEqual([(0, 0)], sharding.boundaries([], 4))
+
+    def test_sort_key(self):
+        spec = sharding.sort_spec({'sort_key': ['name', 'id'],
+                                   'sort_dir': ['asc', 'desc']})
+        resources = [{'name': 'b', 'id': 1}, {'name': 'a', 'id': 1},
+                     {'name': 'a', 'id': 2}, {'name': None, 'id': 3}]
+        self.assertEqual(
+            [3, 2, 1, 1],
+            [r['id'] for r in sorted(
+                resources, key=lambda r: sharding.SortKey(r, spec))])
+
+    def test_merge_and_unique(self):
+        spec = sharding.sort_spec({'sort_key': 'name'})
+        merged = sharding.merge([[{'id': 1, 'name': 'a'},
+                                  {'id': 3, 'name': 'c'}],
+                                 [{'id': 2, 'name': 'b'},
+                                  {'id': 3, 'name': 'c'}]], spec)
+        self.assertEqual([1, 2, 3],
+                         [r['id'] for r in sharding.unique_by_id(merged)])
+
+
+class TestShardedList(test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestShardedList, self).setUp()
+        self.ports = [{'id': '%03d' % i, 'name': 'port-%d' % (i % 7),
+                       'project_id': 'p%d' % (i % 3)} for i in range(50)]
+        self.calls = []
+        self.requests.get(requests_mock.ANY, text=self._list)
+
+    def _list(self, request, context):
+        """A fake Neutron server supporting sort, marker and limit."""
+        query = urlparse.parse_qs(request.query)
+        self.calls.append(query)
+        context.headers['X-OpenStack-Request-ID'] = 'req-%d' % len(
+            self.calls)
+        ports = [p for p in self.ports
+                 if p['project_id'] in query.get('project_id',
+                                                 [p['project_id']]) and
+                 p['id'] in query.get('id', [p['id']])]
+        spec = sharding.sort_spec(query) or [('id', False)]
+        ports.sort(key=lambda p: sharding.SortKey(p, spec))
+        if 'marker' in query:
+            ids = [p['id'] for p in ports]
+            ports = ports[ids.index(query['marker'][0]) + 1:]
+        body = {}
+        if 'limit' in query:
+            limit = int(query['limit'][0])
+            if len(ports) > limit:
+                params = dict(query, marker=ports[limit - 1]['id'])
+                body['ports_links'] = [{
+                    'rel': 'next', 'href': '%s?%s' % (
+                        test_client.PORTS_URL,
+                        urlparse.urlencode(params, doseq=True))}]
+            ports = ports[:limit]
+        if 'fields' in query:
+            ports = [dict((k, v) for k, v in p.items()
+                          if k in query['fields']) for p in ports]
+        body['ports'] = ports
+        return jsonutils.dumps(body)
+
+    def test_id_ranges(self):
+        ports = self.client.list_ports(shards=4, limit=5)
+        self.assertEqual(self.ports, ports['ports'])
+        # The probes only ask for ids, shards pages at a time.
+        probes = [c for c in self.calls if c.get('fields') == ['id']]
+        self.assertEqual(self.calls[0], probes[0])
+        self.assertEqual([['20']] * 3, [c['limit'] for c in probes])
+        self.assertEqual(['019', '039'],
+                         [c['marker'][0] for c in probes[1:]])
+        # Every range is fetched in a single page.
+        self.assertEqual(len(probes) + 12, len(self.calls))
+        self.assertEqual(len(self.calls), len(ports.request_ids))
+
+    def test_id_ranges_from_marker(self):
+        ports = self.client.list_ports(shards=2, limit=10, marker='029')
+        self.assertEqual(self.ports[30:], ports['ports'])
+
+    def test_id_ranges_with_sort_and_fields(self):
+        ports = self.client.list_ports(shards=3, sort_key='name',
+                                       fields='name')
+        self.assertEqual(sorted(p['name'] for p in self.ports),
+                         [p['name'] for p in ports['ports']])
+        self.assertEqual([{'name'}], list(set(frozenset(p)
+                                              for p in ports['ports'])))
+        # The server sorts every partition, which are then merged.
+        fetches = [c for c in self.calls if c.get('fields') != ['id']]
+        self.assertEqual(3, len(fetches))
+        for call in fetches:
+            self.assertEqual(['name'], call['sort_key'])
+            self.assertEqual({'id', 'name'}, set(call['fields']))
+
+    def test_id_ranges_sorted_desc(self):
+        ports = self.client.list_ports(shards=4, limit=5,
+                                       sort_key=['name', 'id'],
+                                       sort_dir=['desc', 'asc'])
+        spec = [('name', True), ('id', False)]
+        self.assertEqual(
+            sorted(self.ports, key=lambda p: sharding.SortKey(p, spec)),
+            ports['ports'])
+
+    def test_shard_filters(self):
+        ports = self.client.list_ports(
+            shard_filters=[{'project_id': 'p0'}, {'project_id': 'p1'},
+                           {'project_id': ['p1', 'p2']}],
+            sort_key='id', limit=4)
+        self.assertEqual(self.ports, ports['ports'])
@@ -0,0 +1,122 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+from unittest import mock
+
+from oslo_serialization import jsonutils
+import requests
+import testtools
+
+from neutronclient.common import exceptions
+from neutronclient.common import single_flight
+from neutronclient.tests.unit import test_client
+
+
+class TestSingleFlight(testtools.TestCase):
+
+    def test_make_key(self):
+        self.assertEqual(
+            single_flight.make_key('GET', '/ports', {'a': 1, 'b': ['x']}),
+            single_flight.make_key('GET', '/ports', {'b': ('x',), 'a': '1'}))
+        self.assertNotEqual(
+            single_flight.make_key('GET', '/ports', {'s': ['a', 'b']}),
+            single_flight.make_key('GET', '/ports', {'s': ['b', 'a']}))
+
+    def _run_concurrently(self, group, func, count=4):
+        release = threading.Event()
+        results = []
+        errors = []
+
+        def _func():
+            release.wait(5)
+            return func()
+
+        def _call():
+            try:
+                results.append(group.do('key', _func))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_call) for _ in range(count)]
+        for t in threads:
+            t.start()
+        while group.to_dict()['calls'] < count:
+            threading.Event().wait(0.001)
+        release.set()
+        for t in threads:
+            t.join()
+        return results, errors
+
+    def test_results_are_shared_and_copied(self):
+        group = single_flight.SingleFlight()
+        func = mock.Mock(side_effect=lambda: {'nets': [1]})
+
+        results, errors = self._run_concurrently(group, func)
+        self.assertEqual([], errors)
+        self.assertEqual(1, func.call_count)
+        self.assertEqual([{'nets': [1]}] * 4, results)
+        self.assertEqual(4, len(set(id(r['nets']) for r in results)))
+        self.assertEqual({'calls': 4, 'executed': 1, 'shared': 3},
+                         group.to_dict())
+
+    def test_errors_are_shared(self):
+        group = single_flight.SingleFlight()
+        func = mock.Mock(side_effect=exceptions.NotFound())
+
+        results, errors = self._run_concurrently(group, func, count=3)
+        self.assertEqual([], results)
+        self.assertEqual(3, len(errors))
+        self.assertEqual(1, func.call_count)
+
+    def test_sequential_calls_are_not_shared(self):
+        group = single_flight.SingleFlight()
+        group.do('key', dict)
+        group.do('key', dict)
+        self.assertEqual(2, group.to_dict()['executed'])
+
+
+class TestClientSingleFlight(test_client.ClientTestBase):
+
+    def test_concurrent_shows_are_coalesced(self):
+        neutron = self.create_client(single_flight=True)
+        release = threading.Event()
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.headers['X-OpenStack-Request-ID'] = 'req-1'
+        sent = []
+
+        def _do_request(action, method, **kwargs):
+            sent.append(action)
+            release.wait(5)
+            return resp, jsonutils.dumps({'network': {'id': 'n1'}})
+
+        neutron.httpclient.do_request = _do_request
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(neutron.show_network('n1')))
+            for _ in range(5)]
+        for t in threads:
+            t.start()
+        while neutron.single_flight.to_dict()['calls'] < 5:
+            release.wait(0.001)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(['/v2.0/networks/n1'], sent)
+        self.assertEqual([{'network': {'id': 'n1'}}] * 5, results)
+        self.assertEqual([['req-1']] * 5, [r.request_ids for r in results])
+        self.assertEqual(4, neutron.single_flight.to_dict()['shared'])
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(self.client.single_flight)
@@ -0,0 +1,207 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import io
+import os
+from unittest import mock
+
+import fixtures
+from oslo_serialization import jsonutils
+import osprofiler.profiler
+import testtools
+
+from neutronclient.common import tracing
+from neutronclient.neutron import v2_0 as neutronV20
+from neutronclient.tests.unit import test_client
+
+
+class RecordingExporter(object):
+
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(spans)
+
+    def names(self, trace=-1):
+        return [(s.name, s.parent_id and self.by_id(trace, s.parent_id).name)
+                for s in self.traces[trace]]
+
+    def by_id(self, trace, span_id):
+        return [s for s in self.traces[trace] if s.span_id == span_id][0]
+
+
+class FakeListCommand(neutronV20.ListCommand):
+    resource = 'port'
+    list_columns = ['id']
+
+
+class TracingTestMixin(object):
+
+    def set_exporter(self):
+        exporter = RecordingExporter()
+        tracing.set_exporter(exporter)
+        self.addCleanup(tracing.set_exporter, None)
+        return exporter
+
+
+class TestSpans(TracingTestMixin, testtools.TestCase):
+
+    def test_disabled(self):
+        with tracing.span('noop') as span:
+            self.assertIsNone(span)
+            self.assertIsNone(tracing.current())
+
+    def test_nested(self):
+        exporter = self.set_exporter()
+        with tracing.span('root', resource='port') as root:
+            with tracing.span('child', page=1) as child:
+                self.assertIs(child, tracing.current())
+            self.assertRaises(ValueError, self._fail)
+        self.assertIsNone(tracing.current())
+        spans, = exporter.traces
+        self.assertEqual([('child', 'root'), ('failing', 'root'),
+                          ('root', None)], exporter.names())
+        self.assertEqual(root.trace_id, child.trace_id)
+        self.assertGreaterEqual(root.duration, child.duration)
+        self.assertEqual('ValueError: boom', spans[1].error)
+
+    def _fail(self):
+        with tracing.span('failing'):
+            raise ValueError('boom')
+
+    def test_file_exporter(self):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'traces.json')
+        tracing.set_exporter(tracing.FileExporter(path))
+        self.addCleanup(tracing.set_exporter, None)
+        for i in range(2):
+            with tracing.span('root', count=i, ok=True):
+                with tracing.span('child', ratio=0.5, host='x'):
+                    pass
+        with open(path) as f:
+            lines = [jsonutils.loads(line) for line in f]
+        self.assertEqual(2, len(lines))
+        resource_spans, = lines[1]['resourceSpans']
+        self.assertEqual(
+            [{'key': 'service.name',
+              'value': {'stringValue': 'python-neutronclient'}}],
+            resource_spans['resource']['attributes'])
+        child, root = resource_spans['scopeSpans'][0]['spans']
+        self.assertEqual(root['spanId'], child['parentSpanId'])
+        self.assertEqual(root['traceId'], child['traceId'])
+        self.assertNotIn('parentSpanId', root)
+        self.assertEqual([{'key': 'count', 'value': {'intValue': '1'}},
+                          {'key': 'ok', 'value': {'boolValue': True}}],
+                         root['attributes'])
+        self.assertEqual([{'key': 'ratio', 'value': {'doubleValue': 0.5}},
+                          {'key': 'host', 'value': {'stringValue': 'x'}}],
+                         child['attributes'])
+        self.assertLessEqual(int(root['startTimeUnixNano']),
+                             int(child['startTimeUnixNano']))
+
+    def test_failing_exporter(self):
+        exporter = mock.Mock()
+        exporter.export.side_effect = IOError()
+        tracing.set_exporter(exporter)
+        self.addCleanup(tracing.set_exporter, None)
+        with tracing.span('root'):
+            pass
+        self.assertEqual(1, exporter.export.call_count)
+
+    def test_osprofiler(self):
+        osprofiler.profiler.init('SWORDFISH')
+        self.addCleanup(osprofiler.profiler.clean)
+        with mock.patch.object(osprofiler.profiler, 'Trace') as trace:
+            with tracing.span('neutronclient.list', collection='ports'):
+                pass
+        trace.assert_called_once_with('neutronclient.list',
+                                      info={'collection': 'ports'})
+
+
+class TestClientSpans(TracingTestMixin, test_client.ClientTestBase):
+
+    def setUp(self):
+        super(TestClientSpans, self).setUp()
+        self.exporter = self.set_exporter()
+
+    def test_list(self):
+        self.register_pages('ports', test_client.PORTS_URL,
+                            [[{'id': '1'}], [{'id': '2'}]])
+        self.client.list_ports()
+        self.assertEqual([('neutronclient.deserialize',
+                           'neutronclient.pagination.page'),
+                          ('neutronclient.pagination.page',
+                           'neutronclient.list'),
+                          ('neutronclient.deserialize',
+                           'neutronclient.pagination.page'),
+                          ('neutronclient.pagination.page',
+                           'neutronclient.list'),
+                          ('neutronclient.list', None)],
+                         self.exporter.names())
+        self.assertEqual(1, self.exporter.traces[0][3].attributes['page'])
+
+    def test_list_prefetch(self):
+        self.register_pages('ports', test_client.PORTS_URL,
+                            [[{'id': '1'}], [{'id': '2'}], [{'id': '3'}]])
+        with tracing.span('caller') as caller:
+            pages = self.client.list_ports(retrieve_all=False, prefetch=2)
+            self.assertEqual(3, len(list(pages)))
+        self.assertEqual(1, len(self.exporter.traces))
+        trace = self.exporter.traces[0]
+        pages = [s for s in trace
+                 if s.name == 'neutronclient.pagination.page']
+        self.assertEqual(3, len(pages))
+        for page in pages:
+            self.assertEqual(caller.trace_id, page.trace_id)
+            self.assertEqual(caller.span_id, page.parent_id)
+
+    def test_find_resource_by_name(self):
+        port_id = '4e8e5957-649f-477b-9e5b-f1f75b21c03c'
+        self.requests.get(test_client.PORTS_URL, [
+            {'json': {'ports': []}},
+            {'json': {'ports': [{'id': 'id-a', 'name': port_id}]}}])
+        self.client.find_resource('port', port_id)
+        names = self.exporter.names()
+        self.assertIn(('neutronclient.find_resource.by_id',
+                       'neutronclient.find_resource'), names)
+        self.assertIn(('neutronclient.find_resource.by_name',
+                       'neutronclient.find_resource'), names)
+        by_id = [s for s in self.exporter.traces[0]
+                 if s.name == 'neutronclient.find_resource.by_id'][0]
+        self.assertTrue(by_id.error.startswith('NotFound: '))
+
+    def test_serialize(self):
+        self.requests.post(test_client.PORTS_URL,
+                           json={'port': {'id': '1'}})
+        self.client.create_port({'port': {'name': 'a'}})
+        serialize = self.exporter.traces[0][0]
+        self.assertEqual('neutronclient.serialize', serialize.name)
+        self.assertEqual(len(self.requests.last_request.body),
+                         serialize.attributes['bytes'])
+
+    def test_list_command(self):
+        self.register_pages('ports', test_client.PORTS_URL,
+                            [[{'id': '1'}]])
+        app = mock.Mock(stdout=io.StringIO())
+        app.client_manager.neutron = self.client
+        cmd = FakeListCommand(app, None)
+        parsed_args = cmd.get_parser('list').parse_args([])
+        columns, rows = cmd.take_action(parsed_args)
+        self.assertEqual([('1',)], list(rows))
+        names = self.exporter.names()
+        self.assertEqual(('neutronclient.command.list', None), names[-1])
+        for phase in ('retrieve_list', 'extend_list', 'setup_columns'):
+            self.assertIn(('neutronclient.command.' + phase,
+                           'neutronclient.command.list'), names)
+        self.assertIn(('neutronclient.list',
+                       'neutronclient.command.retrieve_list'), names)
@@ -0,0 +1,584 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""asyncio flavour of the Neutron v2.0 client.
+
+:class:`AsyncClient` exposes the same ``list_*``, ``show_*``, ``create_*``,
+``update_*`` and ``delete_*`` methods as
+:class:`neutronclient.v2_0.client.Client`, but each of them returns an
+awaitable (or an async iterator for ``list_*(retrieve_all=False)``).
+Requests are sent through a single aiohttp connection pool which requires
+the optional ``aiohttp`` library.
+"""
+
+import asyncio
+import collections
+import logging
+import re
+import ssl
+import urllib.parse as urlparse
+
+from oslo_utils import importutils
+import requests
+from requests import structures
+
+from neutronclient._i18n import _
+from neutronclient import client
+from neutronclient.common import bulk
+from neutronclient.common import exceptions
+from neutronclient.v2_0 import client as client_v20
+
+aiohttp = importutils.try_import('aiohttp')
+osprofiler_web = importutils.try_import("osprofiler.web")
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_MAXSIZE = 100
+# Options of the synchronous client relying on threads or on its blocking
+# request path, which AsyncClient does not implement, with their defaults.
+UNSUPPORTED_OPTIONS = {
+    'limiter': None, 'single_flight': False, 'response_cache': None,
+    'resolution_cache': None, 'metrics': None, 'prefetch': 0,
+    'prefetch_max_bytes': None, 'adaptive_page_size': None,
+    'compression': False, 'request_compression_threshold': None,
+    'circuit_breaker': None, 'endpoint_urls': None,
+    'hedge_percentile': None, 'auth_cache': None, 'keepalive': True,
+    'pool_connections': client.DEFAULT_POOL_CONNECTIONS,
+    'pool_block': False,
+}
+UNSUPPORTED_LIST_OPTIONS = ('stream', 'prefetch', 'prefetch_max_bytes',
+                            'shards', 'shard_filters', 'adaptive_page_size')
+
+
+async def gather_limited(limit, *aws, return_exceptions=False):
+    """Run awaitables concurrently with at most ``limit`` of them in flight.
+
+    Results are returned in the order of ``aws`` like ``asyncio.gather``.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*[_run(aw) for aw in aws],
+                                return_exceptions=return_exceptions)
+
+
+def _to_response(status, reason, headers, content, url, method):
+    # NOTE: The response is converted into a requests.Response so that
+    # request ID handling and error mapping are shared with the sync client.
+    resp = requests.Response()
+    resp.status_code = status
+    resp.reason = reason
+    resp.headers = structures.CaseInsensitiveDict(headers)
+    resp._content = content
+    resp.encoding = 'utf-8'
+    resp.url = url
+    resp.request = requests.Request(method, url)
+    return resp
+
+
+class AsyncHTTPClient(object):
+    """Sends the REST calls of :class:`AsyncClient` through aiohttp.
+
+    Either a keystoneauth ``session`` (and optional ``auth``) or an
+    ``endpoint_url`` together with a ``token`` (or ``auth_strategy`` of
+    'noauth') must be given.
+    """
+
+    def __init__(self, session=None, auth=None, endpoint_url=None,
+                 token=None, auth_strategy='keystone', region_name=None,
+                 service_type='network', endpoint_type='public',
+                 interface=None, timeout=None, insecure=False, ca_cert=None,
+                 cert=None, global_request_id=None,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_maxsize_per_host=0,
+                 connector=None, **kwargs):
+        if aiohttp is None:
+            raise exceptions.NeutronClientException(
+                message=_('The aiohttp library is required to use '
+                          'AsyncClient'))
+        if not session and not endpoint_url:
+            raise exceptions.Unauthorized(
+                message=_('AsyncClient requires either a keystoneauth '
+                          'session or an endpoint URL'))
+        self.session = session
+        self.auth = auth
+        self.endpoint_url = endpoint_url
+        self.auth_token = token
+        self.auth_strategy = auth_strategy
+        self.region_name = region_name
+        self.service_type = service_type
+        self.interface = interface or endpoint_type
+        self.timeout = timeout
+        self.insecure = insecure
+        self.ca_cert = ca_cert
+        self.cert = cert
+        self.global_request_id = global_request_id
+        self.pool_maxsize = pool_maxsize
+        self.pool_maxsize_per_host = pool_maxsize_per_host
+        self._connector = connector
+        self._http = None
+
+    def _ssl_context(self):
+        if self.insecure:
+            return False
+        context = ssl.create_default_context(cafile=self.ca_cert)
+        if self.cert:
+            if isinstance(self.cert, (tuple, list)):
+                context.load_cert_chain(*self.cert)
+            else:
+                context.load_cert_chain(self.cert)
+        return context
+
+    def _get_http(self):
+        if self._http is None or self._http.closed:
+            connector = self._connector
+            if connector is None:
+                connector = aiohttp.TCPConnector(
+                    limit=self.pool_maxsize,
+                    limit_per_host=self.pool_maxsize_per_host,
+                    ssl=self._ssl_context())
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self._http = aiohttp.ClientSession(
+                connector=connector,
+                connector_owner=self._connector is None,
+                timeout=timeout)
+        return self._http
+
+    async def close(self):
+        """Close the connection pool of this client."""
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    async def _run_sync(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
+
+    async def authenticate(self):
+        if not self.session:
+            if self.auth_strategy == 'noauth' or self.auth_token:
+                return
+            raise exceptions.Unauthorized(
+                message=_('No token or keystoneauth session was provided'))
+        self.auth_token = await self._run_sync(
+            self.session.get_token, auth=self.auth)
+        if not self.endpoint_url:
+            self.endpoint_url = await self._run_sync(
+                self.session.get_endpoint, auth=self.auth,
+                service_type=self.service_type, interface=self.interface,
+                region_name=self.region_name)
+            if not self.endpoint_url:
+                raise exceptions.EndpointNotFound()
+
+    def _check_uri_length(self, action):
+        uri_len = len(self.endpoint_url) + len(action)
+        if uri_len > client.MAX_URI_LEN:
+            raise exceptions.RequestURITooLong(
+                excess=uri_len - client.MAX_URI_LEN)
+
+    async def request(self, url, method, body=None, headers=None, **kwargs):
+        """Request without authentication."""
+        content_type = kwargs.pop('content_type', None) or 'application/json'
+        raw_body = kwargs.pop('raw_body', False)
+        headers = headers or {}
+        headers.setdefault('Accept', content_type)
+        if body:
+            headers.setdefault('Content-Type', content_type)
+        if self.global_request_id:
+            headers.setdefault(client.REQ_ID_HEADER, self.global_request_id)
+        headers['User-Agent'] = client.USER_AGENT
+        if osprofiler_web:
+            headers.update(osprofiler_web.get_trace_id_headers())
+
+        try:
+            async with self._get_http().request(
+                    method, url, data=body, headers=headers) as r:
+                content = await r.read()
+        except aiohttp.ClientSSLError as e:
+            raise exceptions.SslCertificateValidationError(reason=str(e))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _logger.debug("throwing ConnectionFailed : %s", e)
+            raise exceptions.ConnectionFailed(reason=str(e) or repr(e))
+        resp = _to_response(r.status, r.reason, r.headers, content,
+                            str(r.url), method)
+        return resp, resp.content if raw_body else resp.text
+
+    async def do_request(self, url, method, **kwargs):
+        if (self.auth_token is None and self.auth_strategy != 'noauth' or
+                not self.endpoint_url):
+            await self.authenticate()
+        self._check_uri_length(url)
+
+        for attempt in range(2):
+            headers = dict(kwargs.get('headers') or {})
+            if self.auth_token:
+                headers['X-Auth-Token'] = self.auth_token
+            resp, body = await self.request(
+                self.endpoint_url + url, method, body=kwargs.get('body'),
+                headers=headers, raw_body=kwargs.get('raw_body', False))
+            if resp.status_code != 401 or attempt or not self.session:
+                break
+            # The token might have expired, get a new one and retry once.
+            if self.session.auth or self.auth:
+                await self._run_sync((self.auth or self.session.auth)
+                                     .invalidate)
+            await self.authenticate()
+        if resp.status_code == 401:
+            raise exceptions.Unauthorized(message=body)
+        return resp, body
+
+    def get_auth_info(self):
+        return {'auth_token': self.auth_token,
+                'endpoint_url': self.endpoint_url}
+
+
+class _AsyncGeneratorWithMeta(client_v20._RequestIdMixin):
+    """Async iterator counterpart of ``_GeneratorWithMeta``."""
+
+    def __init__(self, paginate_func, collection, path, **params):
+        self.paginate_func = paginate_func
+        self.collection = collection
+        self.path = path
+        self.params = params
+        self.generator = None
+        self._request_ids_setup()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.generator:
+            self.generator = self.paginate_func(
+                self.collection, self.path, **self.params)
+        obj = await self.generator.__anext__()
+        self._append_request_ids(obj.request_ids)
+        return obj
+
+
+class AsyncClient(client_v20.Client):
+    """asyncio client for the OpenStack Neutron v2.0 API.
+
+    Accepts the same arguments as :class:`neutronclient.v2_0.client.Client`
+    (with keystoneauth ``session`` or ``endpoint_url`` and ``token``) plus
+    ``pool_maxsize``, ``pool_maxsize_per_host`` and an aiohttp ``connector``
+    which can be shared between several clients. The options of
+    :data:`UNSUPPORTED_OPTIONS` (``limiter``, ``single_flight``, the
+    caches, ``metrics``, prefetching, adaptive page sizes, compression,
+    the circuit breaker, hedged endpoints and the ``requests`` pool
+    settings) raise TypeError unless left to their default; bound the
+    number of concurrent requests with :func:`gather_limited` instead of
+    a ``limiter``.
+
+    Example::
+
+        from neutronclient.v2_0 import async_client
+
+        async def main(sess):
+            async with async_client.AsyncClient(session=sess) as neutron:
+                nets = await neutron.list_networks()
+                ports = await async_client.gather_limited(
+                    10, *[neutron.show_port(p) for p in port_ids])
+    """
+
+    def __init__(self, **kwargs):
+        unsupported = [k for k, default in UNSUPPORTED_OPTIONS.items()
+                       if kwargs.get(k, default) != default]
+        if unsupported:
+            raise TypeError(_('AsyncClient does not support %s') %
+                            ', '.join(unsupported))
+        super(AsyncClient, self).__init__(**kwargs)
+
+    def _construct_http_client(self, **kwargs):
+        return AsyncHTTPClient(**kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        await self.httpclient.close()
+
+    async def do_request(self, method, action, body=None, headers=None,
+                         params=None):
+        action = self._build_action(action, params)
+        if body:
+            body = self.serialize(body)
+        resp, replybody = await self.httpclient.do_request(
+            action, method, body=body, headers=headers, raw_body=True)
+        return self._handle_response(resp, replybody)
+
+    async def retry_request(self, method, action, body=None,
+                            headers=None, params=None):
+        """Call do_request with the default retry configuration.
+
+        Only idempotent requests should retry failed connection attempts.
+        :raises: ConnectionFailed if the maximum # of retries is exceeded
+        """
+        state = self.get_retry_policy().start()
+        while True:
+            try:
+                return await self.do_request(method, action, body=body,
+                                             headers=headers, params=params)
+            except Exception as e:
+                delay = state.next_delay(e)
+                if delay is None:
+                    if (self.raise_errors or
+                            not client_v20._is_connection_error(e)):
+                        raise
+                    break
+                _logger.debug('Retrying request to Neutron service in '
+                              '%(delay).2f seconds after: %(error)s',
+                              {'delay': delay, 'error': e})
+                await asyncio.sleep(delay)
+
+        raise exceptions.ConnectionFailed(
+            reason=self._connection_failed_message(state.attempts))
+
+    async def delete(self, action, body=None, headers=None, params=None):
+        return await self.retry_request("DELETE", action, body=body,
+                                        headers=headers, params=params)
+
+    async def get(self, action, body=None, headers=None, params=None):
+        return await self.retry_request("GET", action, body=body,
+                                        headers=headers, params=params)
+
+    async def post(self, action, body=None, headers=None, params=None):
+        # Do not retry POST requests to avoid the orphan objects problem.
+        return await self.do_request("POST", action, body=body,
+                                     headers=headers, params=params)
+
+    async def put(self, action, body=None, headers=None, params=None):
+        return await self.retry_request("PUT", action, body=body,
+                                        headers=headers, params=params)
+
+    async def create_bulk(self, collection, path, resources,
+                          chunk_size=bulk.DEFAULT_CHUNK_SIZE,
+                          max_body_bytes=bulk.DEFAULT_MAX_BODY_BYTES,
+                          concurrency=1, fallback=True):
+        """Create many resources with as few POST requests as possible.
+
+        See :meth:`neutronclient.v2_0.client.ClientBase.create_bulk`, at
+        most ``concurrency`` chunks are submitted at the same time.
+        """
+        resources = list(resources)
+        result = bulk.BulkResult(collection, resources)
+        singular = self.EXTED_PLURALS.get(collection, collection[:-1])
+        chunks = bulk.chunks(resources, chunk_size, max_body_bytes,
+                             client_v20._json_size)
+        await gather_limited(
+            max(concurrency, 1),
+            *[self._create_chunk(collection, singular, path, result,
+                                 fallback, chunk) for chunk in chunks])
+        return result
+
+    async def _create_chunk(self, collection, singular, path, result,
+                            fallback, chunk):
+        items = [result.items[index] for index, _resource in chunk]
+        try:
+            created = await self.post(path, body={
+                collection: [resource for _index, resource in chunk]})
+        except client_v20.BULK_ERRORS as e:
+            result.add_request_ids(getattr(e, 'request_ids', None))
+            if (not fallback or len(chunk) == 1 or
+                    client_v20._is_connection_error(e)):
+                result.count_chunk()
+                for item in items:
+                    item.error = e
+                return
+            _logger.debug("Bulk creation of %(count)d %(collection)s "
+                          "failed, creating them one by one: %(error)s",
+                          {'count': len(chunk), 'collection': collection,
+                           'error': e})
+            result.count_chunk(fallback=True)
+            for item in items:
+                try:
+                    created = await self.post(path,
+                                              body={singular: item.request})
+                except client_v20.BULK_ERRORS as exc:
+                    result.add_request_ids(getattr(exc, 'request_ids', None))
+                    item.error = exc
+                else:
+                    result.add_request_ids(created.request_ids)
+                    item.resource = created[singular]
+            return
+        result.count_chunk()
+        result.add_request_ids(created.request_ids)
+        for item, resource in zip(items, created[collection]):
+            item.resource = resource
+
+    def list(self, collection, path, retrieve_all=True, compact=False,
+             columnar=False, **params):
+        """Fetch a collection, following pagination links.
+
+        ``compact`` and ``columnar`` are those of
+        :meth:`neutronclient.v2_0.client.ClientBase.list`, the options of
+        :data:`UNSUPPORTED_LIST_OPTIONS` raise TypeError.
+        """
+        unsupported = [k for k in UNSUPPORTED_LIST_OPTIONS
+                       if params.pop(k, None)]
+        if unsupported:
+            raise TypeError(_('AsyncClient.list does not support %s') %
+                            ', '.join(unsupported))
+        if retrieve_all:
+            return self._list_all(collection, path, compact, columnar,
+                                  **params)
+        else:
+            return _AsyncGeneratorWithMeta(self._pagination, collection,
+                                           path, **params)
+
+    async def _list_all(self, collection, path, compact, columnar,
+                        **params):
+        res = []
+        request_ids = []
+        async for r in self._pagination(collection, path, **params):
+            res.extend(r[collection])
+            request_ids.extend(r.request_ids)
+        return self._collect(collection, res, request_ids, compact, columnar)
+
+    async def _pagination(self, collection, path, **params):
+        if params.get('page_reverse', False):
+            linkrel = 'previous'
+        else:
+            linkrel = 'next'
+        next = True
+        while next:
+            res = await self.get(path, params=params)
+            yield res
+            next = False
+            try:
+                for link in res['%s_links' % collection]:
+                    if link['rel'] == linkrel:
+                        query_str = urlparse.urlparse(link['href']).query
+                        params = urlparse.parse_qs(query_str)
+                        next = True
+                        break
+            except KeyError:
+                break
+
+    async def find_resource_by_id(self, resource, resource_id,
+                                  cmd_resource=None, parent_id=None,
+                                  fields=None):
+        if not cmd_resource:
+            cmd_resource = resource
+        cmd_resource_plural = self.get_resource_plural(cmd_resource)
+        collection = self.get_resource_plural(resource)
+        obj_lister = getattr(self, "list_%s" % cmd_resource_plural)
+        if re.match(client_v20.UUID_PATTERN, resource_id):
+            params = {'id': resource_id}
+            if fields:
+                params['fields'] = fields
+            if parent_id:
+                data = await obj_lister(parent_id, **params)
+            else:
+                data = await obj_lister(**params)
+            if data and data[collection]:
+                return data[collection][0]
+        not_found_message = (_("Unable to find %(resource)s with id "
+                               "'%(id)s'") %
+                             {'resource': resource, 'id': resource_id})
+        raise exceptions.NotFound(message=not_found_message)
+
+    async def _find_resource_by_name(self, resource, name, project_id=None,
+                                     cmd_resource=None, parent_id=None,
+                                     fields=None):
+        if not cmd_resource:
+            cmd_resource = resource
+        cmd_resource_plural = self.get_resource_plural(cmd_resource)
+        collection = self.get_resource_plural(resource)
+        obj_lister = getattr(self, "list_%s" % cmd_resource_plural)
+        params = {'name': name}
+        if fields:
+            params['fields'] = fields
+        if project_id:
+            params['tenant_id'] = project_id
+        if parent_id:
+            data = await obj_lister(parent_id, **params)
+        else:
+            data = await obj_lister(**params)
+        info = data[collection]
+        if len(info) > 1:
+            raise exceptions.NeutronClientNoUniqueMatch(resource=resource,
+                                                        name=name)
+        elif len(info) == 0:
+            not_found_message = (_("Unable to find %(resource)s with name "
+                                   "'%(name)s'") %
+                                 {'resource': resource, 'name': name})
+            raise exceptions.NotFound(message=not_found_message)
+        return info[0]
+
+    async def find_resource(self, resource, name_or_id, project_id=None,
+                            cmd_resource=None, parent_id=None, fields=None):
+        try:
+            return await self.find_resource_by_id(
+                resource, name_or_id, cmd_resource, parent_id, fields)
+        except exceptions.NotFound:
+            try:
+                return await self._find_resource_by_name(
+                    resource, name_or_id, project_id,
+                    cmd_resource, parent_id, fields)
+            except exceptions.NotFound:
+                not_found_message = (_("Unable to find %(resource)s with name "
+                                       "or id '%(name_or_id)s'") %
+                                     {'resource': resource,
+                                      'name_or_id': name_or_id})
+                raise exceptions.NotFound(
+                    message=not_found_message)
+
+    async def find_resources(self, resource, names_or_ids, project_id=None,
+                             cmd_resource=None, parent_id=None, fields=None):
+        """Resolve many names or ids with as few list calls as possible.
+
+        See :meth:`neutronclient.v2_0.client.ClientBase.find_resources`.
+        """
+        collection, obj_lister, params, fields, names_or_ids = (
+            self._find_resources_args(resource, names_or_ids, cmd_resource,
+                                      parent_id, fields))
+        found = {}
+        ids = [v for v in names_or_ids
+               if re.match(client_v20.UUID_PATTERN, v)]
+        for res in await self._list_by_filter(obj_lister, collection, 'id',
+                                              ids, params):
+            found[res['id']] = res
+        names = [v for v in names_or_ids if v not in found]
+        if project_id:
+            params['tenant_id'] = project_id
+        by_name = collections.defaultdict(list)
+        for res in await self._list_by_filter(obj_lister, collection, 'name',
+                                              names, params):
+            by_name[res.get('name')].append(res)
+        return self._found_resources(resource, names, by_name, found, fields)
+
+    async def _list_by_filter(self, obj_lister, collection, key, values,
+                              params):
+        resources = []
+        for chunk in client_v20._filter_chunks(key, values,
+                                               client_v20.FIND_URI_LEN):
+            resources.extend(await self._list_chunk(obj_lister, collection,
+                                                    key, chunk, params))
+        return resources
+
+    async def _list_chunk(self, obj_lister, collection, key, chunk, params):
+        try:
+            return (await obj_lister(**dict(params, **{key: chunk})))[
+                collection]
+        except exceptions.RequestURITooLong:
+            if len(chunk) == 1:
+                raise
+            half = len(chunk) // 2
+            return (await self._list_chunk(obj_lister, collection, key,
+                                           chunk[:half], params) +
+                    await self._list_chunk(obj_lister, collection, key,
+                                           chunk[half:], params))
@@ -16,6 +16,9 @@
 #    under the License.
 #
 
+import collections
+from concurrent import futures
+import functools
 import inspect
 import itertools
 import logging
@@ -25,13 +28,26 @@ import urllib.parse as urlparse
 
 import debtcollector.renames
 from keystoneauth1 import exceptions as ksa_exc
+from oslo_serialization import jsonutils
 import requests
 
 from neutronclient._i18n import _
 from neutronclient import client
+from neutronclient.common import bulk
+from neutronclient.common import codec as codec_utils
+from neutronclient.common import columnar as columnar_utils
 from neutronclient.common import exceptions
 from neutronclient.common import extension as client_extension
+from neutronclient.common import metrics as metrics_utils
+from neutronclient.common import paging
+from neutronclient.common import prefetch as prefetch_utils
+from neutronclient.common import records
+from neutronclient.common import resolution_cache
+from neutronclient.common import retry
 from neutronclient.common import serializer
+from neutronclient.common import sharding
+from neutronclient.common import single_flight
+from neutronclient.common import tracing
 from neutronclient.common import utils
 
 
@@ -41,6 +57,13 @@ HEX_ELEM = '[0-9A-Fa-f]'
 UUID_PATTERN = '-'.join([HEX_ELEM + '{8}', HEX_ELEM + '{4}',
                          HEX_ELEM + '{4}', HEX_ELEM + '{4}',
                          HEX_ELEM + '{12}'])
+# Size of the chunks read from the socket when decoding streamed lists.
+STREAM_CHUNK_SIZE = 64 * 1024
+# Page size of the partitions of a sharded list without explicit limit.
+SHARD_PAGE_SIZE = 1000
+# Length of the multi-valued filters of a find_resources list call, leaving
+# room in MAX_URI_LEN for the endpoint, the path and the other parameters.
+FIND_URI_LEN = client.MAX_URI_LEN - 1024
 
 
 def exception_handler_v20(status_code, error_content):
@@ -92,8 +115,89 @@ def exception_handler_v20(status_code, error_content):
                      request_ids=request_ids)
 
 
+def _json_size(body):
+    return len(jsonutils.dump_as_bytes(body))
+
+
+def _body_size(page):
+    """Weigh a page by the body it was received in."""
+    size = getattr(page, 'body_size', None)
+    if size is None:
+        return _json_size(page)
+    return size
+
+
+def _item_size(resources, samples=3):
+    """Estimate the JSON size of a resource from a few of them."""
+    if not resources:
+        return None
+    step = max(1, len(resources) // samples)
+    sample = resources[::step][:samples]
+    return sum(_json_size(r) for r in sample) / float(len(sample))
+
+
+def _counted(chunks, sizes):
+    """Yield chunks, appending the length of each to sizes."""
+    for chunk in chunks:
+        sizes.append(len(chunk))
+        yield chunk
+
+
+def _revisions(body):
+    """Return the (id, revision_number) of the resources of a response.
+
+    None is returned when a resource has no revision number.
+    """
+    resources = [v for k, v in (body or {}).items()
+                 if not k.endswith('_links')]
+    if len(resources) != 1:
+        return None
+    resources = resources[0]
+    if isinstance(resources, dict):
+        resources = [resources]
+    elif not isinstance(resources, list):
+        return None
+    revisions = []
+    for resource in resources:
+        if not isinstance(resource, dict) or (
+                'revision_number' not in resource):
+            return None
+        revisions.append((resource.get('id'), resource['revision_number']))
+    return revisions
+
+
+def _filter_chunks(key, values, max_len):
+    """Split values so that each chunk encodes in a query under max_len."""
+    chunk = []
+    length = 0
+    for value in values:
+        # key=value&
+        value_len = len(key) + len(urlparse.quote_plus(value)) + 2
+        if chunk and length + value_len > max_len:
+            yield chunk
+            chunk = []
+            length = 0
+        chunk.append(value)
+        length += value_len
+    if chunk:
+        yield chunk
+
+
+# Failures reported per resource by create_bulk instead of raised. The
+# keystoneauth errors come from a SessionClient failing to connect.
+BULK_ERRORS = (exceptions.NeutronClientException, ksa_exc.ConnectionError)
+
+
+def _is_connection_error(exc):
+    return isinstance(exc, (exceptions.ConnectionFailed,
+                            ksa_exc.ConnectionError))
+
+
 class _RequestIdMixin(object):
     """Wrapper class to expose x-openstack-request-id to the caller."""
+    # Length of the response body the object was decoded from, if known.
+    body_size = None
+
     def _request_ids_setup(self):
         self._request_ids = []
 
@@ -152,17 +256,24 @@ class _StrWithMeta(str, _RequestIdMixin):
 
 
 class _GeneratorWithMeta(_RequestIdMixin):
-    def __init__(self, paginate_func, collection, path, **params):
+    def __init__(self, paginate_func, collection, path, prefetch=0,
+                 prefetch_max_bytes=None, **params):
         self.paginate_func = paginate_func
         self.collection = collection
         self.path = path
         self.params = params
+        self.prefetch = prefetch
+        self.prefetch_max_bytes = prefetch_max_bytes
         self.generator = None
         self._request_ids_setup()
 
     def _paginate(self):
-        for r in self.paginate_func(
-                self.collection, self.path, **self.params):
+        pages = self.paginate_func(self.collection, self.path, **self.params)
+        if self.prefetch:
+            pages = prefetch_utils.Prefetcher(pages, self.prefetch,
+                                              self.prefetch_max_bytes,
+                                              _body_size)
+        for r in pages:
             yield r, r.request_ids
 
     def __iter__(self):
@@ -185,6 +296,20 @@ class _GeneratorWithMeta(_RequestIdMixin):
         return obj
 
 
+class _StreamGeneratorWithMeta(_GeneratorWithMeta):
+    """Iterates over single resources decoded while they are received."""
+
+    def _paginate(self):
+        return self.paginate_func(self.collection, self.path,
+                                  on_response=self._append_request_ids,
+                                  **self.params)
+
+    def next(self):
+        if not self.generator:
+            self.generator = self._paginate()
+        return next(self.generator)
+
+
 class ClientBase(object):
     """Client for the OpenStack Neutron v2.0 API.
 
@@ -226,8 +351,81 @@ class ClientBase(object):
     :param bool raise_errors: If True then exceptions caused by connection
                               failure are propagated to the caller.
                               (default: True)
+    :param retry_policy: A :class:`neutronclient.common.retry.RetryPolicy`
+                         deciding which failures of idempotent requests are
+                         retried and how long to back off. Overrides
+                         ``retries``. (optional)
     :param session: Keystone client auth session to use. (optional)
     :param auth: Keystone auth plugin to use. (optional)
+    :param integer pool_connections: Number of per-host connection pools
+                                     kept by the client when no session is
+                                     given (default: 10). (optional)
+    :param integer pool_maxsize: Maximum number of connections kept alive
+                                 to a single host when no session is given
+                                 (default: 10). (optional)
+    :param bool pool_block: Whether to block waiting for a free connection
+                            when the pool is exhausted instead of opening a
+                            throwaway one (default: False). (optional)
+    :param bool keepalive: Keep connections to Neutron server alive between
+                           requests (default: True). (optional)
+    :param bool compression: Ask Neutron server for gzip compressed responses
+                             and count the transferred bytes in
+                             ``httpclient.transfer_stats`` (default: False).
+                             (optional)
+    :param integer request_compression_threshold: gzip request bodies of at
+                            least this many bytes when compression is
+                            enabled. The server (or a proxy in front of it)
+                            must accept gzip encoded requests. (optional)
+    :param auth_cache: A :class:`neutronclient.common.auth_cache.AuthCache`
+                       used to share keystone tokens and endpoint URLs
+                       between processes when no session is given.
+                       (optional)
+    :param circuit_breaker: A ``CircuitBreaker`` from
+                            :mod:`neutronclient.common.circuit_breaker`
+                            failing requests fast with
+                            ``EndpointCircuitOpen`` while the endpoint keeps
+                            failing. (optional)
+    :param limiter: A :class:`neutronclient.common.limiter.Limiter` bounding
+                    the rate and concurrency of the requests sent. It can be
+                    shared by several clients and threads. (optional)
+    :param list endpoint_urls: URLs of several Neutron servers to spread the
+                               requests over, picking the healthy one with
+                               the fewest requests in flight, when no
+                               session is given. (optional)
+    :param hedge_percentile: With ``endpoint_urls``, duplicate a GET to a
+                             second endpoint when the first one takes
+                             longer than this percentile of the recent GET
+                             latencies (e.g. 95). (optional)
+    :param bool single_flight: Let concurrent identical GET requests share
+                               the response of a single request, counted
+                               in ``single_flight.to_dict()``
+                               (default: False). (optional)
+    :param response_cache: A ``ResponseCache`` from
+                           :mod:`neutronclient.common.response_cache`
+                           serving GET requests from a cache invalidated by
+                           the writes made through the client. (optional)
+    :param integer prefetch: Number of pages fetched in a background thread
+                             ahead of the caller iterating over a list with
+                             ``retrieve_all=False`` (default: 0). (optional)
+    :param integer prefetch_max_bytes: Stop fetching pages ahead once those
+                                       waiting for the caller take this
+                                       many bytes of JSON. (optional)
+    :param adaptive_page_size: True, or a
+                       :class:`neutronclient.common.paging.AdaptivePageSize`,
+                       to tune the page size of the lists toward a target
+                       page time and size. (optional)
+    :param resolution_cache: A ``ResolutionCache`` from
+                       :mod:`neutronclient.common.resolution_cache`, or
+                       True for the one shared by the whole process,
+                       remembering the ids resolved from names by
+                       ``find_resource``. (optional)
+    :param metrics: A :class:`neutronclient.common.metrics.Metrics` timing
+                    the phases of each request and keeping latency
+                    histograms per method and path template. (optional)
+    :param codec: The JSON codec of the request and response bodies, either
+                  'json', 'orjson' or a codec object, see
+                  :mod:`neutronclient.common.codec` (default: 'orjson' when
+                  the library is installed, else 'json'). (optional)
 
     Example::
 
@@ -252,11 +450,30 @@ class ClientBase(object):
         super(ClientBase, self).__init__()
         self.retries = kwargs.pop('retries', 0)
         self.raise_errors = kwargs.pop('raise_errors', True)
-        self.httpclient = client.construct_http_client(**kwargs)
+        self.retry_policy = kwargs.pop('retry_policy', None)
+        self.limiter = kwargs.pop('limiter', None)
+        self.response_cache = kwargs.pop('response_cache', None)
+        self.prefetch = kwargs.pop('prefetch', 0)
+        self.prefetch_max_bytes = kwargs.pop('prefetch_max_bytes', None)
+        self.adaptive_page_size = kwargs.pop('adaptive_page_size', None)
+        self.resolution_cache = kwargs.pop('resolution_cache', None)
+        if self.resolution_cache is True:
+            self.resolution_cache = resolution_cache.shared_cache()
+        self.single_flight = None
+        if kwargs.pop('single_flight', False):
+            self.single_flight = single_flight.SingleFlight()
+        self.metrics = kwargs.pop('metrics', None)
+        if self.metrics is not None:
+            kwargs['metrics'] = self.metrics
+        self.codec = codec_utils.get_codec(kwargs.pop('codec', None))
+        self.httpclient = self._construct_http_client(**kwargs)
         self.version = '2.0'
         self.action_prefix = "/v%s" % (self.version)
         self.retry_interval = 1
 
+    def _construct_http_client(self, **kwargs):
+        return client.construct_http_client(**kwargs)
+
     def _handle_fault_response(self, status_code, response_body, resp):
         # Create exception with HTTP status code and message
         _logger.debug("Error message: %s", response_body)
@@ -269,122 +486,587 @@ class ClientBase(object):
             des_error_body = {'message': response_body}
         error_body = self._convert_into_with_meta(des_error_body, resp)
         # Raise the appropriate exception
-        exception_handler_v20(status_code, error_body)
+        try:
+            exception_handler_v20(status_code, error_body)
+        except exceptions.NeutronClientException as e:
+            e.retry_after = retry.parse_retry_after(
+                resp.headers.get('Retry-After'))
+            raise
 
-    def do_request(self, method, action, body=None, headers=None, params=None):
+    def _build_action(self, action, params=None):
         # Add format and project_id
         action = self.action_prefix + action
         if isinstance(params, dict) and params:
             params = utils.safe_encode_dict(params)
             action += '?' + urlparse.urlencode(params, doseq=1)
+        return action
+
+    def do_request(self, method, action, body=None, headers=None, params=None,
+                   stream=False):
+        """Send a request to Neutron server and deserialize its response.
+
+        With ``stream=True`` the successful response is returned with its
+        body left unread so that the caller can decode it incrementally.
+        """
+        if self.metrics is None:
+            return self._do_request(method, action, body, headers, params,
+                                    stream)
+        with self.metrics.request(method, action):
+            return self._do_request(method, action, body, headers, params,
+                                    stream)
+
+    def _do_request(self, method, action, body, headers, params, stream):
+        action = self._build_action(action, params)
 
         if body:
             body = self.serialize(body)
 
-        resp, replybody = self.httpclient.do_request(action, method, body=body,
-                                                     headers=headers)
-
+        resp, replybody = self._send_request(method, action, body, headers,
+                                             stream)
+        if stream:
+            if resp.status_code == requests.codes.ok:
+                return resp
+            replybody = resp.text
+        timing = metrics_utils.current()
+        if timing is None:
+            return self._handle_response(resp, replybody)
+        timing.status_code = resp.status_code
+        with timing.measure('deserialize'):
+            return self._handle_response(resp, replybody)
+
+    def _send_request(self, method, action, body, headers, stream):
+        # Response bodies are decoded by the codec straight from bytes.
+        kwargs = {'body': body, 'headers': headers, 'raw_body': True}
+        if stream:
+            kwargs['stream'] = True
+        if self.limiter is None:
+            return self.httpclient.do_request(action, method, **kwargs)
+        started = time.monotonic()
+        with self.limiter.acquire() as permit:
+            metrics_utils.add_phase('queue_wait', time.monotonic() - started)
+            resp, replybody = self.httpclient.do_request(action, method,
+                                                         **kwargs)
+            permit.status_code = resp.status_code
+        return resp, replybody
+
+    def _handle_response(self, resp, replybody):
         status_code = resp.status_code
         if status_code in (requests.codes.ok,
                            requests.codes.created,
                            requests.codes.accepted,
                            requests.codes.no_content):
             data = self.deserialize(replybody, status_code)
-            return self._convert_into_with_meta(data, resp)
+            result = self._convert_into_with_meta(data, resp)
+            if replybody and isinstance(result, _RequestIdMixin):
+                result.body_size = len(replybody)
+            return result
         else:
             if not replybody:
                 replybody = resp.reason
+            elif isinstance(replybody, bytes):
+                replybody = replybody.decode('utf-8', 'replace')
             self._handle_fault_response(status_code, replybody, resp)
 
     def get_auth_info(self):
         return self.httpclient.get_auth_info()
 
     def serialize(self, data):
-        """Serializes a dictionary into JSON.
+        """Serializes a dictionary into the bytes of a JSON body.
 
         A dictionary with a single key can be passed and it can contain any
-        structure.
+        structure. Bytes are taken as a body already serialized and sent
+        as is.
         """
-        if data is None:
-            return None
+        if data is None or isinstance(data, bytes):
+            return data
         elif isinstance(data, dict):
-            return serializer.Serializer().serialize(data)
+            with tracing.span('neutronclient.serialize') as span:
+                body = self.codec.dumps(data)
+                if span is not None:
+                    span.set_attribute('bytes', len(body))
+                return body
         else:
             raise Exception(_("Unable to serialize object of type = '%s'") %
                             type(data))
 
     def deserialize(self, data, status_code):
-        """Deserializes a JSON string into a dictionary."""
+        """Deserializes a JSON body, bytes or str, into a dictionary."""
         if not data:
             return data
-        return serializer.Serializer().deserialize(
-            data)['body']
+        with tracing.span('neutronclient.deserialize', bytes=len(data)):
+            return self.codec.loads(data)
 
     def retry_request(self, method, action, body=None,
-                      headers=None, params=None):
+                      headers=None, params=None, stream=False):
         """Call do_request with the default retry configuration.
 
         Only idempotent requests should retry failed connection attempts.
         :raises: ConnectionFailed if the maximum # of retries is exceeded
         """
-        max_attempts = self.retries + 1
-        for i in range(max_attempts):
+        state = self.get_retry_policy().start()
+        while True:
             try:
                 return self.do_request(method, action, body=body,
-                                       headers=headers, params=params)
-            except (exceptions.ConnectionFailed, ksa_exc.ConnectionError):
+                                       headers=headers, params=params,
+                                       stream=stream)
+            except Exception as e:
                 # Exception has already been logged by do_request()
-                if i < self.retries:
-                    _logger.debug('Retrying connection to Neutron service')
-                    time.sleep(self.retry_interval)
-                elif self.raise_errors:
-                    raise
-
-        if self.retries:
-            msg = (_("Failed to connect to Neutron server after %d attempts")
-                   % max_attempts)
-        else:
-            msg = _("Failed to connect Neutron server")
-
-        raise exceptions.ConnectionFailed(reason=msg)
+                delay = state.next_delay(e)
+                if delay is None:
+                    if self.raise_errors or not _is_connection_error(e):
+                        raise
+                    break
+                _logger.debug('Retrying request to Neutron service in '
+                              '%(delay).2f seconds after: %(error)s',
+                              {'delay': delay, 'error': e})
+                state.policy.sleep(delay)
+
+        raise exceptions.ConnectionFailed(
+            reason=self._connection_failed_message(state.attempts))
+
+    def _connection_failed_message(self, attempts):
+        if attempts > 1:
+            return (_("Failed to connect to Neutron server after %d "
+                      "attempts") % attempts)
+        return _("Failed to connect Neutron server")
+
+    def get_retry_policy(self):
+        """Return the retry policy applied to idempotent requests.
+
+        Without an explicit ``retry_policy``, connection failures are
+        retried ``retries`` times every ``retry_interval`` seconds.
+        """
+        if self.retry_policy is not None:
+            return self.retry_policy
+        return retry.RetryPolicy.fixed(self.retries, self.retry_interval)
 
     def delete(self, action, body=None, headers=None, params=None):
-        return self.retry_request("DELETE", action, body=body,
-                                  headers=headers, params=params)
+        try:
+            return self.retry_request("DELETE", action, body=body,
+                                      headers=headers, params=params)
+        finally:
+            self._invalidate_cache(action, named=False)
 
     def get(self, action, body=None, headers=None, params=None):
-        return self.retry_request("GET", action, body=body,
-                                  headers=headers, params=params)
+        if body:
+            return self.retry_request("GET", action, body=body,
+                                      headers=headers, params=params)
+        if self.response_cache is not None:
+            return self._cached_get(action, headers, params)
+        return self._get(action, headers, params)
+
+    def _get(self, action, headers=None, params=None):
+        if self.single_flight is not None:
+            key = single_flight.make_key("GET", action, params, headers)
+            return self.single_flight.do(key, self.retry_request, "GET",
+                                         action, headers=headers,
+                                         params=params)
+        return self.retry_request("GET", action, headers=headers,
+                                  params=params)
+
+    def _cached_get(self, action, headers, params):
+        cache = self.response_cache
+        key = single_flight.make_key("GET", action, params, headers)
+        scope = self._response_cache_scope()
+        cached = cache.get(key, scope)
+        if cached is not None:
+            value, fresh = cached
+            if fresh:
+                return self._with_meta(value)
+            if self._is_current(value, action, headers, params):
+                cache.refresh(key, scope)
+                return self._with_meta(value)
+        result = self._get(action, headers, params)
+        cache.set(key, action, result, scope)
+        return result
+
+    def _with_meta(self, value):
+        if isinstance(value, _RequestIdMixin):
+            return value
+        return self._convert_into_with_meta(value, None)
+
+    def _response_cache_scope(self):
+        """Identify the caller of the response cache."""
+        authenticate = getattr(self.httpclient,
+                               'authenticate_and_fetch_endpoint_url', None)
+        if authenticate:
+            authenticate()
+        info = self.httpclient.get_auth_info()
+        if not info.get('auth_token'):
+            return None
+        return '%s\0%s' % (info.get('endpoint_url'), info['auth_token'])
+
+    def _resolution_cache_scope(self):
+        """Identify the caller of the resolution cache.
+
+        Names resolve to different resources in different projects. The
+        authenticated project and user are used when known, they outlive
+        the token.
+        """
+        authenticate = getattr(self.httpclient,
+                               'authenticate_and_fetch_endpoint_url', None)
+        if authenticate:
+            # The endpoint URL is only known once authenticated.
+            authenticate()
+        info = self.httpclient.get_auth_info()
+        if info.get('auth_tenant_id') or info.get('auth_user_id'):
+            return (info.get('endpoint_url'), info.get('auth_tenant_id'),
+                    info.get('auth_user_id'))
+        return info.get('endpoint_url'), info.get('auth_token')
+
+    def _is_current(self, value, action, headers, params):
+        """Check the revision numbers of a cached response."""
+        if params and 'fields' in params:
+            return False
+        revisions = _revisions(value)
+        if revisions is None:
+            return False
+        probe = dict(params or {}, fields=['id', 'revision_number'])
+        return _revisions(self._get(action, headers, probe)) == revisions
+
+    def _invalidate_cache(self, action, created=False, named=True):
+        """Drop the cached responses and resolutions a write changes.
+
+        ``named`` tells whether the write may give a resource a name that
+        was not found before or was resolved to another resource, as
+        creations and updates do.
+        """
+        if self.response_cache is not None:
+            self.response_cache.invalidate(action,
+                                           self._response_cache_scope())
+        if self.resolution_cache is not None:
+            if not created:
+                self.resolution_cache.invalidate_path(action)
+            if named:
+                self.resolution_cache.invalidate_missing()
+                self.resolution_cache.invalidate_names(
+                    action, self.get_resource_plural)
 
     def post(self, action, body=None, headers=None, params=None):
         # Do not retry POST requests to avoid the orphan objects problem.
-        return self.do_request("POST", action, body=body,
-                               headers=headers, params=params)
+        try:
+            return self.do_request("POST", action, body=body,
+                                   headers=headers, params=params)
+        finally:
+            self._invalidate_cache(action, created=True)
 
     def put(self, action, body=None, headers=None, params=None):
-        return self.retry_request("PUT", action, body=body,
-                                  headers=headers, params=params)
+        try:
+            return self.retry_request("PUT", action, body=body,
+                                      headers=headers, params=params)
+        finally:
+            self._invalidate_cache(action)
+
+    def create_bulk(self, collection, path, resources,
+                    chunk_size=bulk.DEFAULT_CHUNK_SIZE,
+                    max_body_bytes=bulk.DEFAULT_MAX_BODY_BYTES,
+                    concurrency=1, fallback=True):
+        """Create many resources with as few POST requests as possible.
+
+        The resources are sent in chunks of at most ``chunk_size`` of them
+        and ``max_body_bytes`` of JSON. The server creates the resources
+        of a chunk atomically: when a chunk is rejected, its resources are
+        submitted one by one so that only the faulty ones fail. A chunk
+        failing on a connection error is not resubmitted because it may
+        have been created.
+
+        :param resources: list of the bodies of the resources, without the
+                          collection key.
+        :param concurrency: number of chunks submitted at the same time.
+        :param fallback: submit the resources of a rejected chunk one by
+                         one instead of failing all of them.
+        :returns: a :class:`neutronclient.common.bulk.BulkResult`. It does
+                  not raise on failures, they are reported per resource.
+        """
+        resources = list(resources)
+        result = bulk.BulkResult(collection, resources)
+        singular = self.EXTED_PLURALS.get(collection, collection[:-1])
+        submit = functools.partial(self._create_chunk, collection, singular,
+                                   path, result, fallback)
+        chunks = bulk.chunks(resources, chunk_size, max_body_bytes,
+                             _json_size)
+        if concurrency > 1:
+            with futures.ThreadPoolExecutor(
+                    max_workers=concurrency) as executor:
+                # Consume the results to surface unexpected errors.
+                list(executor.map(submit, chunks))
+        else:
+            for chunk in chunks:
+                submit(chunk)
+        return result
 
-    def list(self, collection, path, retrieve_all=True, **params):
+    def _create_chunk(self, collection, singular, path, result, fallback,
+                      chunk):
+        items = [result.items[index] for index, _resource in chunk]
+        try:
+            created = self.post(path, body={
+                collection: [resource for _index, resource in chunk]})
+        except BULK_ERRORS as e:
+            result.add_request_ids(getattr(e, 'request_ids', None))
+            if (not fallback or len(chunk) == 1 or
+                    _is_connection_error(e)):
+                result.count_chunk()
+                for item in items:
+                    item.error = e
+                return
+            _logger.debug("Bulk creation of %(count)d %(collection)s "
+                          "failed, creating them one by one: %(error)s",
+                          {'count': len(chunk), 'collection': collection,
+                           'error': e})
+            result.count_chunk(fallback=True)
+            for item in items:
+                try:
+                    created = self.post(path, body={singular: item.request})
+                except BULK_ERRORS as exc:
+                    result.add_request_ids(getattr(exc, 'request_ids', None))
+                    item.error = exc
+                else:
+                    result.add_request_ids(created.request_ids)
+                    item.resource = created[singular]
+            return
+        result.count_chunk()
+        result.add_request_ids(created.request_ids)
+        for item, resource in zip(items, created[collection]):
+            item.resource = resource
+
+    def list(self, collection, path, retrieve_all=True, stream=False,
+             prefetch=None, prefetch_max_bytes=None, shards=None,
+             shard_filters=None, adaptive_page_size=None, compact=False,
+             columnar=False, **params):
+        """Fetch a collection, following pagination links.
+
+        :param retrieve_all: return all the resources at once instead of an
+                             iterator over the pages.
+        :param stream: decode the resources one at a time while they are
+                       read from the socket instead of loading each page in
+                       memory first. Without ``retrieve_all`` the iterator
+                       then yields single resources instead of pages.
+        :param prefetch: without ``retrieve_all``, number of pages fetched
+                         in a background thread ahead of the caller.
+                         Defaults to the ``prefetch`` of the client, 0
+                         disables it.
+        :param prefetch_max_bytes: stop fetching ahead once the pages
+                                   waiting for the caller take this many
+                                   bytes of JSON.
+        :param shards: split the scan in this many partitions fetched
+                       concurrently. Without ``shard_filters`` the
+                       partitions are id ranges found by listing the ids
+                       alone, ``shards`` pages at a time, while the ranges
+                       already found are fetched. The whole collection is
+                       always returned.
+        :param shard_filters: list of dicts of filters, one per partition
+                              (e.g. one ``project_id`` each). Partitions
+                              may overlap, resources are deduplicated by id
+                              and merged according to ``sort_key``.
+        :param adaptive_page_size: True or an ``AdaptivePageSize`` from
+                                   :mod:`neutronclient.common.paging`
+                                   tuning the ``limit`` of every page from
+                                   the time and size of the previous ones.
+                                   Defaults to the setting of the client.
+        :param compact: with ``retrieve_all``, return the resources as
+                        read-only :class:`neutronclient.common.records.Record`
+                        mappings sharing their keys and repeated string
+                        values, which takes much less memory than dicts.
+        :param columnar: with ``retrieve_all``, return the resources as a
+                         :class:`neutronclient.common.columnar.Table` of
+                         NumPy arrays, True for all the fields or a list of
+                         the fields to keep. Requires ``numpy``.
+        """
+        with tracing.span('neutronclient.list', collection=collection,
+                          retrieve_all=retrieve_all, stream=stream):
+            return self._list(collection, path, retrieve_all, stream,
+                              prefetch, prefetch_max_bytes, shards,
+                              shard_filters, adaptive_page_size, compact,
+                              columnar, **params)
+
+    def _list(self, collection, path, retrieve_all, stream, prefetch,
+              prefetch_max_bytes, shards, shard_filters, adaptive_page_size,
+              compact, columnar, **params):
+        if shards or shard_filters:
+            result = self._sharded_list(collection, path, shards,
+                                        shard_filters, **params)
+            return self._collect(collection, result[collection],
+                                 result.request_ids, compact, columnar)
+        pager = self._get_pager(adaptive_page_size, params.get('limit'))
+        if pager is not None:
+            params['pager'] = pager
+        if stream:
+            generator = _StreamGeneratorWithMeta(
+                self._stream_pagination, collection, path, **params)
+            if retrieve_all:
+                return self._collect(collection, generator,
+                                     generator.request_ids, compact,
+                                     columnar)
+            return generator
         if retrieve_all:
-            res = []
             request_ids = []
-            for r in self._pagination(collection, path, **params):
-                res.extend(r[collection])
-                request_ids.extend(r.request_ids)
-            return _DictWithMeta({collection: res}, request_ids)
+            return self._collect(
+                collection, self._paginated_resources(
+                    collection, path, request_ids, **params),
+                request_ids, compact, columnar)
         else:
-            return _GeneratorWithMeta(self._pagination, collection,
-                                      path, **params)
+            if prefetch is None:
+                prefetch = self.prefetch
+            return _GeneratorWithMeta(
+                self._pagination, collection, path, prefetch=prefetch,
+                prefetch_max_bytes=(prefetch_max_bytes or
+                                    self.prefetch_max_bytes),
+                **params)
+
+    def _paginated_resources(self, collection, path, request_ids, **params):
+        for page in self._pagination(collection, path, **params):
+            request_ids.extend(page.request_ids)
+            for resource in page[collection]:
+                yield resource
+
+    @staticmethod
+    def _collect(collection, resources, request_ids, compact, columnar):
+        """Gather the resources of a list, the request ids once consumed."""
+        if columnar:
+            fields = None if columnar is True else columnar
+            result = columnar_utils.Table.from_resources(resources, fields)
+        elif compact:
+            result = list(map(records.Compactor().compact, resources))
+        else:
+            result = list(resources)
+        return _DictWithMeta({collection: result}, request_ids)
 
-    def _pagination(self, collection, path, **params):
+    def _get_pager(self, adaptive_page_size, limit=None):
+        if adaptive_page_size is None:
+            adaptive_page_size = self.adaptive_page_size
+        if not adaptive_page_size:
+            return None
+        if isinstance(adaptive_page_size, paging.AdaptivePageSize):
+            return adaptive_page_size
+        if isinstance(limit, (list, tuple)):
+            limit = limit[0]
+        if limit:
+            return paging.AdaptivePageSize(initial=int(limit))
+        return paging.AdaptivePageSize()
+
+    def _sharded_list(self, collection, path, shards, shard_filters,
+                      **params):
+        request_ids = []
+        spec = sharding.sort_spec(params)
+        fields = sharding.as_list(params.get('fields'))
+        # The partitions are merged by id and by the sort keys.
+        extra = [] if not fields else [
+            key for key in dict.fromkeys(['id'] + [k for k, _d in spec])
+            if key not in fields]
+        if extra:
+            params['fields'] = fields + extra
+        if shard_filters:
+            partitions = [functools.partial(self._list_partition, collection,
+                                            path, dict(params, **filters))
+                          for filters in shard_filters]
+            workers = len(partitions)
+        else:
+            partitions = self._id_range_partitions(
+                collection, path, shards, spec, request_ids, **params)
+            workers = shards
+        with futures.ThreadPoolExecutor(max_workers=workers or 1) as executor:
+            # The id probes run on this thread while the partitions they
+            # found are fetched by the pool.
+            pending = [executor.submit(p) for p in partitions]
+            results = [f.result() for f in pending]
+        resources = []
+        for partition_resources, partition_request_ids in results:
+            resources.append(partition_resources)
+            request_ids.extend(partition_request_ids)
+        merged = sharding.unique_by_id(sharding.merge(resources, spec))
+        if extra:
+            merged = (dict((k, v) for k, v in r.items() if k not in extra)
+                      for r in merged)
+        return _DictWithMeta({collection: list(merged)}, request_ids)
+
+    def _list_partition(self, collection, path, params, start=None,
+                        last=None):
+        """Fetch the resources of a partition, ids from start to last."""
+        resources = []
+        request_ids = []
+        pages = self._pagination(collection, path, **params)
+        try:
+            for page in pages:
+                request_ids.extend(page.request_ids)
+                for resource in page[collection]:
+                    if start is not None and resource['id'] < start:
+                        # The server ignored the marker.
+                        continue
+                    if last is not None and resource['id'] > last:
+                        return resources, request_ids
+                    resources.append(resource)
+        finally:
+            pages.close()
+        return resources, request_ids
+
+    def _id_range_partitions(self, collection, path, shards, spec,
+                             request_ids, **params):
+        """Yield the partitions of a scan as probes of the ids find them.
+
+        Neutron only accepts the id of an existing resource as a marker,
+        so the ranges are found by listing the ids alone, ``shards`` pages
+        at a time. The ids of every probe are split in ``shards`` ranges,
+        fetched while the next probe is sent. With a ``sort_key``, a range
+        is fetched sorted by the server with ``id`` filters, so that the
+        partitions only need merging.
+        """
+        params.pop('page_reverse', None)
+        limit = params.pop('limit', None) or SHARD_PAGE_SIZE
+        if isinstance(limit, (list, tuple)):
+            limit = limit[0]
+        probe = dict((k, v) for k, v in params.items()
+                     if k not in ('fields', 'sort_key', 'sort_dir'))
+        probe.update(fields='id', sort_key='id', sort_dir='asc',
+                     limit=int(limit) * shards)
+        if not spec:
+            params.update(sort_key='id', sort_dir='asc')
+        marker = params.pop('marker', None)
+        while True:
+            if marker:
+                probe['marker'] = marker
+            page = self.get(path, params=probe)
+            request_ids.extend(page.request_ids)
+            ids = [r['id'] for r in page[collection]]
+            for start, stop in sharding.boundaries(ids, shards):
+                if start == stop:
+                    continue
+                if spec:
+                    for chunk in _filter_chunks('id', ids[start:stop],
+                                                FIND_URI_LEN):
+                        yield functools.partial(
+                            self._list_partition, collection, path,
+                            dict(params, id=chunk))
+                    continue
+                # One more resource than the range, to stop at its end
+                # without asking for the next page.
+                range_params = dict(params, limit=stop - start + 1)
+                range_marker = ids[start - 1] if start else marker
+                if range_marker:
+                    # The marker is excluded from the page following it.
+                    range_params['marker'] = range_marker
+                yield functools.partial(
+                    self._list_partition, collection, path, range_params,
+                    start=ids[start], last=ids[stop - 1])
+            links = page.get('%s_links' % collection, [])
+            if not ids or not any(link['rel'] == 'next' for link in links):
+                return
+            marker = ids[-1]
+
+    def _pagination(self, collection, path, pager=None, **params):
         if params.get('page_reverse', False):
             linkrel = 'previous'
         else:
             linkrel = 'next'
         next = True
+        page = 0
         while next:
-            res = self.get(path, params=params)
+            with tracing.span('neutronclient.pagination.page',
+                              collection=collection, page=page):
+                if pager is None:
+                    res = self.get(path, params=params)
+                else:
+                    res = self._get_page(collection, path, pager, params)
+            page += 1
             yield res
             next = False
             try:
@@ -397,6 +1079,80 @@ class ClientBase(object):
             except KeyError:
                 break
 
+    def _get_page(self, collection, path, pager, params):
+        """Get a page sized by an AdaptivePageSize."""
+        while True:
+            limit = pager.limit
+            started = time.monotonic()
+            try:
+                res = self.get(path, params=dict(params, limit=limit))
+            except Exception as e:
+                # A page too large for the timeout, retry a smaller one.
+                if (not _is_connection_error(e) or
+                        isinstance(e, exceptions.EndpointCircuitOpen) or
+                        not pager.shrink()):
+                    raise
+                continue
+            resources = res.get(collection) or []
+            size = getattr(res, 'body_size', None)
+            if resources and size is not None:
+                item_size = size / float(len(resources))
+            else:
+                item_size = _item_size(resources)
+            pager.record(limit, len(resources), time.monotonic() - started,
+                         item_size)
+            return res
+
+    def _stream_pagination(self, collection, path, on_response=None,
+                           pager=None, **params):
+        if params.get('page_reverse', False):
+            linkrel = 'previous'
+        else:
+            linkrel = 'next'
+        while params is not None:
+            if pager is not None:
+                limit = pager.limit
+                params = dict(params, limit=limit)
+            started = time.monotonic()
+            try:
+                resp = self.retry_request('GET', path, params=params,
+                                          stream=True)
+            except Exception as e:
+                # A page too large for the timeout, retry a smaller one.
+                if (pager is None or not _is_connection_error(e) or
+                        isinstance(e, exceptions.EndpointCircuitOpen) or
+                        not pager.shrink()):
+                    raise
+                continue
+            if on_response:
+                on_response(resp)
+            received = []
+            decoder = serializer.JSONCollectionDecoder(
+                _counted(resp.iter_content(STREAM_CHUNK_SIZE), received),
+                collection)
+            count = 0
+            # The time the caller takes with each resource is not the
+            # time of the page.
+            elapsed = 0.0
+            try:
+                for item in decoder:
+                    count += 1
+                    elapsed += time.monotonic() - started
+                    yield item
+                    started = time.monotonic()
+                elapsed += time.monotonic() - started
+            finally:
+                resp.close()
+            if pager is not None:
+                pager.record(limit, count, elapsed,
+                             sum(received) / count if count else None)
+            params = None
+            for link in decoder.extra.get('%s_links' % collection, ()):
+                if link['rel'] == linkrel:
+                    query_str = urlparse.urlparse(link['href']).query
+                    params = urlparse.parse_qs(query_str)
+                    break
+
     def _convert_into_with_meta(self, item, resp):
         if item:
             if isinstance(item, dict):
@@ -472,14 +1228,48 @@ class ClientBase(object):
 
     def find_resource(self, resource, name_or_id, project_id=None,
                       cmd_resource=None, parent_id=None, fields=None):
+        with tracing.span('neutronclient.find_resource', resource=resource):
+            return self._cached_find_resource(resource, name_or_id,
+                                              project_id, cmd_resource,
+                                              parent_id, fields)
+
+    def _cached_find_resource(self, resource, name_or_id, project_id,
+                              cmd_resource, parent_id, fields):
+        cache = self.resolution_cache
+        if cache is None or sharding.as_list(fields) != ['id']:
+            return self._find_resource(resource, name_or_id, project_id,
+                                       cmd_resource, parent_id, fields)
+        key = (self._resolution_cache_scope(), resource,
+               cmd_resource or resource, name_or_id, project_id, parent_id)
+        cached = cache.get(key)
+        if isinstance(cached, resolution_cache.Missing):
+            raise exceptions.NotFound(message=cached.message)
+        if cached is not None:
+            return {'id': cached}
+        try:
+            found = self._find_resource(resource, name_or_id, project_id,
+                                        cmd_resource, parent_id, fields)
+        except exceptions.NotFound as e:
+            cache.set_missing(key, str(e))
+            raise
+        cache.set(key, found['id'])
+        return found
+
+    def _find_resource(self, resource, name_or_id, project_id=None,
+                       cmd_resource=None, parent_id=None, fields=None):
         try:
-            return self.find_resource_by_id(resource, name_or_id,
-                                            cmd_resource, parent_id, fields)
+            with tracing.span('neutronclient.find_resource.by_id',
+                              resource=resource):
+                return self.find_resource_by_id(resource, name_or_id,
+                                                cmd_resource, parent_id,
+                                                fields)
         except exceptions.NotFound:
             try:
-                return self._find_resource_by_name(
-                    resource, name_or_id, project_id,
-                    cmd_resource, parent_id, fields)
+                with tracing.span('neutronclient.find_resource.by_name',
+                                  resource=resource):
+                    return self._find_resource_by_name(
+                        resource, name_or_id, project_id,
+                        cmd_resource, parent_id, fields)
             except exceptions.NotFound:
                 not_found_message = (_("Unable to find %(resource)s with name "
                                        "or id '%(name_or_id)s'") %
@@ -488,6 +1278,95 @@ class ClientBase(object):
                 raise exceptions.NotFound(
                     message=not_found_message)
 
+    def find_resources(self, resource, names_or_ids, project_id=None,
+                       cmd_resource=None, parent_id=None, fields=None):
+        """Resolve many names or ids with as few list calls as possible.
+
+        The ids are looked up first with multi-valued ``id`` filters, then
+        the remaining entries with multi-valued ``name`` filters, split in
+        as many calls as needed to keep the URIs under ``MAX_URI_LEN``.
+
+        :returns: a dict of the resource of each name or id.
+        :raises UnresolvedResources: when some entries cannot be found or
+                                     match several resources; the
+                                     exception also carries those found.
+        """
+        collection, obj_lister, params, fields, names_or_ids = (
+            self._find_resources_args(resource, names_or_ids, cmd_resource,
+                                      parent_id, fields))
+        found = {}
+        ids = [v for v in names_or_ids if re.match(UUID_PATTERN, v)]
+        for res in self._list_by_filter(obj_lister, collection, 'id', ids,
+                                        params):
+            found[res['id']] = res
+        names = [v for v in names_or_ids if v not in found]
+        if project_id:
+            params['tenant_id'] = project_id
+        by_name = collections.defaultdict(list)
+        for res in self._list_by_filter(obj_lister, collection, 'name',
+                                        names, params):
+            by_name[res.get('name')].append(res)
+        return self._found_resources(resource, names, by_name, found, fields)
+
+    def _find_resources_args(self, resource, names_or_ids, cmd_resource,
+                             parent_id, fields):
+        if not cmd_resource:
+            cmd_resource = resource
+        collection = self.get_resource_plural(resource)
+        obj_lister = getattr(self, "list_%s" % self.get_resource_plural(
+            cmd_resource))
+        if parent_id:
+            obj_lister = functools.partial(obj_lister, parent_id)
+        params = {}
+        fields = sharding.as_list(fields)
+        if fields:
+            params['fields'] = list(set(fields) | {'id', 'name'})
+        return (collection, obj_lister, params, fields,
+                list(dict.fromkeys(names_or_ids)))
+
+    @staticmethod
+    def _found_resources(resource, names, by_name, found, fields):
+        """Resolve the names from the resources listed with each name."""
+        missing = []
+        ambiguous = []
+        for name in names:
+            matches = by_name.get(name, [])
+            if len(matches) == 1:
+                found[name] = matches[0]
+            elif matches:
+                ambiguous.append(name)
+            else:
+                missing.append(name)
+        if fields:
+            found = dict((k, dict((f, v) for f, v in res.items()
+                                  if f in fields))
+                         for k, res in found.items())
+        if missing or ambiguous:
+            raise exceptions.UnresolvedResources(
+                resource=resource, found=found, missing=missing,
+                ambiguous=ambiguous)
+        return found
+
+    def _list_by_filter(self, obj_lister, collection, key, values, params):
+        """List the resources matching any of values, in chunked calls."""
+        resources = []
+        for chunk in _filter_chunks(key, values, FIND_URI_LEN):
+            resources.extend(self._list_chunk(obj_lister, collection, key,
+                                              chunk, params))
+        return resources
+
+    def _list_chunk(self, obj_lister, collection, key, chunk, params):
+        try:
+            return obj_lister(**dict(params, **{key: chunk}))[collection]
+        except exceptions.RequestURITooLong:
+            if len(chunk) == 1:
+                raise
+            half = len(chunk) // 2
+            return (self._list_chunk(obj_lister, collection, key,
+                                     chunk[:half], params) +
+                    self._list_chunk(obj_lister, collection, key,
+                                     chunk[half:], params))
+
 
 class Client(ClientBase):
 
@@ -823,6 +1702,11 @@ class Client(ClientBase):
         """Creates a new port."""
         return self.post(self.ports_path, body=body)
 
+    def create_ports_bulk(self, resources, **kwargs):
+        """Creates many ports, see :meth:`create_bulk`."""
+        return self.create_bulk('ports', self.ports_path, resources,
+                                **kwargs)
+
     def update_port(self, port, body=None, revision_number=None):
         """Updates a port."""
         return self._update_resource(self.port_path % (port), body=body,
@@ -868,6 +1752,11 @@ class Client(ClientBase):
         """Creates a new network."""
         return self.post(self.networks_path, body=body)
 
+    def create_networks_bulk(self, resources, **kwargs):
+        """Creates many networks, see :meth:`create_bulk`."""
+        return self.create_bulk('networks', self.networks_path, resources,
+                                **kwargs)
+
     def update_network(self, network, body=None, revision_number=None):
         """Updates a network."""
         return self._update_resource(self.network_path % (network), body=body,
@@ -890,6 +1779,11 @@ class Client(ClientBase):
         """Creates a new subnet."""
         return self.post(self.subnets_path, body=body)
 
+    def create_subnets_bulk(self, resources, **kwargs):
+        """Creates many subnets, see :meth:`create_bulk`."""
+        return self.create_bulk('subnets', self.subnets_path, resources,
+                                **kwargs)
+
     def update_subnet(self, subnet, body=None, revision_number=None):
         """Updates a subnet."""
         return self._update_resource(self.subnet_path % (subnet), body=body,
@@ -1076,6 +1970,12 @@ class Client(ClientBase):
         """Creates a new security group rule."""
         return self.post(self.security_group_rules_path, body=body)
 
+    def create_security_group_rules_bulk(self, resources, **kwargs):
+        """Creates many security group rules, see :meth:`create_bulk`."""
+        return self.create_bulk('security_group_rules',
+                                self.security_group_rules_path, resources,
+                                **kwargs)
+
     def delete_security_group_rule(self, security_group_rule):
         """Deletes the specified security group rule."""
         return self.delete(self.security_group_rule_path %